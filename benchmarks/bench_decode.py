@@ -0,0 +1,150 @@
+"""
+Cost of decoding large invoice listings: JSON backends, compact records and compression
+
+    python -m benchmarks.bench_decode --size 100000
+
+First every page of a generated listing is decoded in-process with each JSON backend, keeping
+all invoices as dicts or as compact records of the listed fields, and the time taken and memory
+held by the kept invoices are reported. Then the same listing is fetched from FakeZoho through
+InvoiceManager with and without compression, reporting wall time and bytes transferred.
+"""
+
+import gc
+import json
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import click
+
+from zoho.client import Client
+from zoho.codec import get_loads, record_type
+from zoho.managers import InvoiceManager
+from zoho.settings import settings
+from zoho.token_cache import TokenCache
+
+from .fake_zoho import FakeZoho
+
+DEFAULT_FIELDS = "invoice_number,date,status,customer_name,total"
+LISTING = {"sort_column": "invoice_number", "sort_order": "A"}
+
+
+def backends():
+    names = ["json"]
+    try:
+        get_loads("orjson")
+    except ImportError:
+        pass
+    else:
+        names.append("orjson")
+    return names
+
+
+def page_bodies(zoho):
+    """Response bodies of every page of the listing, as sent by the server"""
+    bodies = []
+    page = 1
+    while True:
+        body = zoho.list_invoices({**LISTING, "page": page, "per_page": 200})
+        bodies.append(json.dumps(body).encode())
+        if not body["page_context"]["has_more_page"]:
+            return bodies
+        page += 1
+
+
+def keep_invoices(bodies, loads, fields):
+    make_record = record_type(fields, "InvoiceRecord") if fields else None
+    invoices = []
+    for body in bodies:
+        records = loads(body)["invoices"]
+        invoices.extend(records if make_record is None else map(make_record, records))
+    return invoices
+
+
+def measure_decoding(bodies, decoder, fields):
+    """Seconds to decode all pages, and bytes held by the kept invoices and at peak"""
+    loads = get_loads(decoder)
+
+    gc.collect()
+    started = time.perf_counter()
+    invoices = keep_invoices(bodies, loads, fields)
+    elapsed = time.perf_counter() - started
+    del invoices
+
+    # Memory is measured in a separate pass, tracing allocations slows decoding down
+    gc.collect()
+    tracemalloc.start()
+    invoices = keep_invoices(bodies, loads, fields)
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del invoices
+    return elapsed, held, peak
+
+
+def measure_transfer(zoho, url, directory, compression, decoder, fields, concurrency):
+    """Seconds to list every invoice through the client, and response bytes sent by the server"""
+    settings.ACCOUNTS_BASE_URL = f"{url}/oauth/v2"
+    settings.BOOKS_BASE_URL = f"{url}/books/v3"
+    settings.HTTP_COMPRESSION = compression
+    settings.JSON_DECODER = decoder
+
+    client = Client(
+        token_cache=TokenCache(directory / "tokens.json"),
+        rate_limit_per_minute=10**7,
+        rate_limit_per_day=10**9,
+        org_id=zoho.org_id,
+    )
+    bytes_sent = zoho.bytes_sent
+    with client:
+        started = time.perf_counter()
+        invoices = list(InvoiceManager(client).iter_records(LISTING, concurrency=concurrency, fields=fields))
+        elapsed = time.perf_counter() - started
+    return elapsed, zoho.bytes_sent - bytes_sent, len(invoices)
+
+
+@click.command()
+@click.option("--size", type=int, default=100000, show_default=True, help="Invoices in the listing")
+@click.option("--fields", default=DEFAULT_FIELDS, show_default=True, help="Fields kept in compact records")
+@click.option("--concurrency", type=int, default=4, show_default=True, help="Pages fetched in parallel")
+@click.option("--latency", type=float, default=0.0, show_default=True, help="Seconds of latency added per request")
+def main(size, fields, concurrency, latency):
+    fields = [field.strip() for field in fields.split(",") if field.strip()]
+    settings.client_id = "benchmark"
+    settings.client_secret = "benchmark"
+
+    zoho = FakeZoho(size, latency=latency)
+    bodies = page_bodies(zoho)
+    click.echo(f"{len(bodies)} pages, {sum(len(body) for body in bodies) / 2**20:.1f} MiB of JSON\n")
+
+    click.echo(f"{'Decoder':8s} {'Invoices as':12s} {'Time':>9s} {'Inv/s':>10s} {'Held MiB':>9s} {'Peak MiB':>9s}")
+    click.echo("-" * 62)
+    for decoder in backends():
+        for label, projected in (("dicts", None), ("records", fields)):
+            elapsed, held, peak = measure_decoding(bodies, decoder, projected)
+            click.echo(
+                f"{decoder:8s} {label:12s} {elapsed:8.2f}s {size / elapsed:10.0f} "
+                f"{held / 2**20:9.1f} {peak / 2**20:9.1f}"
+            )
+    del bodies
+
+    click.echo(
+        f"\n{'Decoder':8s} {'Compression':12s} {'Invoices as':12s} {'Time':>9s} {'Inv/s':>10s} {'Sent MiB':>9s}"
+    )
+    click.echo("-" * 65)
+    with tempfile.TemporaryDirectory(prefix="zoho-bench-") as directory, zoho.serve() as server:
+        for decoder in backends():
+            for compression in (False, True):
+                for label, projected in (("dicts", None), ("records", fields)):
+                    elapsed, sent, count = measure_transfer(
+                        zoho, server.url, Path(directory), compression, decoder, projected, concurrency
+                    )
+                    status = "" if count == size else f"  SHORT ({count})"
+                    click.echo(
+                        f"{decoder:8s} {'on' if compression else 'off':12s} {label:12s} {elapsed:8.2f}s "
+                        f"{size / elapsed:10.0f} {sent / 2**20:9.1f}{status}"
+                    )
+
+
+if __name__ == "__main__":
+    main()
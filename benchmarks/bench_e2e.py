@@ -0,0 +1,174 @@
+"""
+End-to-end throughput of the invoice commands against the offline Zoho Books stand-in
+
+    python -m benchmarks.bench_e2e --sizes 1000,10000,100000 --workers 8
+
+Each scenario runs the real CLI in-process against a fresh FakeZoho organization and reports
+wall time, invoices per second, API calls and request latency. Renumbering runs also check that
+the series ends up without gaps, so a regression in correctness fails the benchmark as well.
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import click
+from click.testing import CliRunner
+
+from zoho.client import client
+from zoho.commands import cli
+from zoho.metrics import Metrics
+from zoho.settings import settings
+from zoho.token_cache import TokenCache
+
+from .fake_zoho import FakeZoho
+
+SCENARIOS = ("list", "report-gaps", "fix", "export")
+
+
+def reset_client(directory):
+    """Start each run like a fresh process: no token, session, quotas or metrics"""
+    client.close()
+    client.access_token = None
+    client.token_expires_at = None
+    client.errors.clear()
+    client.token_cache = TokenCache(directory / "tokens.json")
+    client._rate_limiter = None
+    client.metrics = Metrics()
+    client.hooks = [client.metrics]
+    client.org_clients = {}
+
+
+def scenario_args(scenario, concurrency, workers, minimal, directory):
+    if scenario == "list":
+        return ["invoices", "list", "--limit", "0", "--format", "jsonl", "-o", "-", "--concurrency", str(concurrency)]
+
+    if scenario == "export":
+        # --refetch, so that full invoices cached by an earlier run are not reused
+        return [
+            "invoices",
+            "export",
+            "-o",
+            str(directory / "export.jsonl"),
+            "--refetch",
+            "--concurrency",
+            str(concurrency),
+            "--workers",
+            str(workers),
+        ]
+
+    args = ["invoices", "report-gaps", "--prefix", "INV-", "--concurrency", str(concurrency)]
+    if scenario == "fix":
+        args += ["--fix", "--workers", str(workers)]
+        if minimal:
+            args.append("--minimal")
+    return args
+
+
+def run(scenario, size, options, directory):
+    zoho = FakeZoho(
+        size,
+        gap_every=options["gap_every"],
+        latency=options["latency"],
+        error_rate=options["error_rate"],
+        rate_per_minute=options["server_rate_per_minute"],
+    )
+    reset_client(directory)
+
+    with zoho.serve() as server:
+        settings.ACCOUNTS_BASE_URL = f"{server.url}/oauth/v2"
+        settings.BOOKS_BASE_URL = f"{server.url}/books/v3"
+        settings.JOURNAL_DIR = str(directory / "journals")
+        settings.MIRROR_FILE = str(directory / "mirror.sqlite3")
+        settings.LATENCY_HISTORY_FILE = str(directory / "latency.json")
+
+        args = [
+            "--client-id",
+            "benchmark",
+            "--client-secret",
+            "benchmark",
+            "--org-id",
+            zoho.org_id,
+            "--rate-per-minute",
+            str(options["rate_per_minute"]),
+            "--rate-per-day",
+            str(options["rate_per_day"]),
+            *scenario_args(scenario, options["concurrency"], options["workers"], options["minimal"], directory),
+        ]
+
+        started = time.perf_counter()
+        result = CliRunner().invoke(cli, args, catch_exceptions=True)
+        elapsed = time.perf_counter() - started
+
+    client.close()
+
+    if result.exception is not None and not isinstance(result.exception, SystemExit):
+        raise result.exception
+
+    status = "ok"
+    if result.exit_code:
+        status = f"exit {result.exit_code}"
+    elif scenario == "fix":
+        numbers = zoho.numbers()
+        if numbers != list(range(1, len(numbers) + 1)):
+            status = "GAPS LEFT"
+    elif scenario == "list" and result.output.count("\n") < size:
+        status = "SHORT"
+    elif scenario == "export":
+        with open(directory / "export.jsonl", encoding="utf-8") as f:
+            if sum(1 for _ in f) != size:
+                status = "SHORT"
+
+    metrics = client.metrics.as_dict()
+    calls = sum(row["calls"] for row in metrics.values())
+    retries = sum(row["retries"] for row in metrics.values())
+    throttled = sum(row["throttled"] for row in metrics.values())
+    latency = [row["latency_seconds"]["p95"] for row in metrics.values() if row["latency_seconds"]["p95"] is not None]
+
+    click.echo(
+        f"{scenario:12s} {size:8d} {elapsed:8.2f}s {size / elapsed:10.1f} {calls:8d} {retries:7d} {throttled:7d} "
+        f"{max(latency, default=0) * 1000:8.1f}  {status}"
+    )
+    return status == "ok"
+
+
+@click.command()
+@click.option("--sizes", default="1000,10000", show_default=True, help="Comma separated invoice counts")
+@click.option(
+    "--scenario",
+    "scenarios",
+    type=click.Choice(SCENARIOS),
+    multiple=True,
+    help="Scenarios to run, all by default",
+)
+@click.option("--concurrency", type=int, default=4, show_default=True, help="Pages fetched in parallel")
+@click.option("--workers", type=int, default=8, show_default=True, help="Invoices renumbered or exported in parallel")
+@click.option("--minimal", is_flag=True, default=False, help="Renumber with minimal PUTs")
+@click.option("--gap-every", type=int, default=100, show_default=True, help="Leave out every Nth invoice number")
+@click.option("--latency", type=float, default=0.0, show_default=True, help="Seconds of latency added per request")
+@click.option("--error-rate", type=float, default=0.0, show_default=True, help="Share of requests failing with 503")
+@click.option("--server-rate-per-minute", type=int, default=None, help="Calls per minute before the server sends 429")
+@click.option("--rate-per-minute", type=int, default=10**7, show_default=True, help="Client side per minute limit")
+@click.option("--rate-per-day", type=int, default=10**9, show_default=True, help="Client side daily limit")
+def main(sizes, scenarios, **options):
+    sizes = [int(size) for size in sizes.split(",") if size.strip()]
+
+    click.echo(
+        f"{'Scenario':12s} {'Invoices':>8s} {'Time':>9s} {'Inv/s':>10s} {'Calls':>8s} {'Retries':>7s} "
+        f"{'Thrtl':>7s} {'p95 ms':>8s}  Result"
+    )
+    click.echo("-" * 86)
+
+    ok = True
+    with tempfile.TemporaryDirectory(prefix="zoho-bench-") as directory:
+        for size in sizes:
+            for scenario in scenarios or SCENARIOS:
+                ok = run(scenario, size, options, Path(directory)) and ok
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
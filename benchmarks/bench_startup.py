@@ -0,0 +1,82 @@
+"""
+Startup cost of short CLI invocations, measured in fresh interpreters
+
+    python -m benchmarks.bench_startup --runs 20
+
+Reports the median wall time of each command, the time spent importing modules and the
+slowest top-level imports, and whether the command had to import requests at all.
+"""
+
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import click
+
+COMMANDS = (
+    ("zoho --help", ["--help"]),
+    ("zoho config org <id>", ["config", "org", "123"]),
+    ("zoho invoices --help", ["invoices", "--help"]),
+)
+
+ROOT = Path(__file__).resolve().parents[1]
+
+IMPORT_TIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def run(args, cwd, import_time=False):
+    command = [sys.executable, *(["-X", "importtime"] if import_time else []), "-m", "zoho", *args]
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")]))}
+    started = time.perf_counter()
+    result = subprocess.run(command, cwd=cwd, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if result.returncode:
+        raise click.ClickException(f"{' '.join(args)} failed:\n{result.stderr}")
+    return elapsed, result.stderr
+
+
+def top_level_imports(stderr):
+    """(cumulative microseconds, module) of imports made directly by the entry point"""
+    imports = []
+    for _, cumulative_us, indent, module in IMPORT_TIME.findall(stderr):
+        if len(indent) == 1:
+            imports.append((int(cumulative_us), module))
+    return imports
+
+
+@click.command()
+@click.option("--runs", type=int, default=10, show_default=True, help="Interpreter starts per command")
+@click.option("--top", type=int, default=5, show_default=True, help="Slowest imports to show per command")
+def main(runs, top):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        timings.append(time.perf_counter() - started)
+    baseline = statistics.median(timings)
+    click.echo(f"{'python -c pass':24s} {baseline * 1000:8.1f} ms (interpreter startup)")
+
+    # An empty working directory, so no .env file is picked up
+    with tempfile.TemporaryDirectory(prefix="zoho-startup-") as cwd:
+        for label, args in COMMANDS:
+            timings = [run(args, cwd)[0] for _ in range(runs)]
+            _, stderr = run(args, cwd, import_time=True)
+            imports = top_level_imports(stderr)
+            modules = {module for _, _, _, module in IMPORT_TIME.findall(stderr)}
+
+            click.echo(
+                f"{label:24s} {statistics.median(timings) * 1000:8.1f} ms, "
+                f"imports {sum(us for us, _ in imports) / 1000:6.1f} ms, "
+                f"requests {'imported' if 'requests' in modules else 'not imported'}"
+            )
+            for cumulative_us, module in sorted(imports, reverse=True)[:top]:
+                click.echo(f"    {cumulative_us / 1000:8.1f} ms  {module}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Compare requests/sec of one-connection-per-request calls against the pooled Client session
+
+    python -m benchmarks.bench_transport --requests 2000
+"""
+
+import time
+
+import click
+import requests
+
+from zoho.client import Client
+from zoho.settings import settings
+
+from .stub_server import StubServer
+
+
+def run_unpooled(url, count):
+    for _ in range(count):
+        requests.request("GET", url, params={"organization_id": "1"}, timeout=30).json()
+
+
+def run_pooled(client, count):
+    for _ in range(count):
+        client.get("invoices")
+
+
+def measure(label, func, count):
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    click.echo(f"{label:20s} {count:6d} requests in {elapsed:6.2f}s  ({count / elapsed:8.1f} req/s)")
+
+
+@click.command()
+@click.option("--requests", "count", type=int, default=1000, help="Number of requests per run")
+def main(count):
+    with StubServer() as server:
+        settings.BOOKS_BASE_URL = server.url
+        settings.org_id = "1"
+
+        measure("requests.request", lambda: run_unpooled(f"{server.url}/invoices", count), count)
+
+        # Limits far above the request count, so that only the transport is measured
+        with Client(rate_limit_per_minute=10**7, rate_limit_per_day=10**9) as client:
+            client.access_token = "benchmark"
+            measure("Client (pooled)", lambda: run_pooled(client, count), count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,397 @@
+"""
+In-memory stand-in for the Zoho Books API, served over HTTP for offline benchmarks
+
+It implements the parts of the API the CLI uses: the OAuth token endpoint, ``organizations``,
+paginated and filtered ``invoices`` and ``invoices/{id}`` GET/PUT. Latency, random 5xx errors and
+per-minute / per-day rate limits can be injected to exercise the client's retry and throttling paths.
+Responses are gzip (or brotli, when installed) compressed for clients that accept it.
+"""
+
+import gzip
+import json
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlparse
+
+from .stub_server import StubServer
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Fields returned by the invoices listing, the single invoice endpoint returns everything
+SUMMARY_FIELDS = (
+    "invoice_id",
+    "invoice_number",
+    "date",
+    "due_date",
+    "status",
+    "customer_id",
+    "customer_name",
+    "total",
+    "balance",
+    "last_modified_time",
+)
+
+# Smaller responses are sent uncompressed
+COMPRESS_MIN_SIZE = 1024
+
+# Fields a PUT cannot change
+READ_ONLY_FIELDS = {"invoice_id", "last_modified_time", "balance"}
+
+STATUSES = ("sent", "paid", "overdue", "draft")
+
+
+def timestamp(value=None):
+    value = value or datetime.now(timezone.utc)
+    return value.strftime("%Y-%m-%dT%H:%M:%S%z")
+
+
+class FakeZoho:
+    """One Zoho Books organization with generated invoices.
+
+    Numbers run from ``{prefix}000001`` with every ``gap_every``-th number missing, so that
+    ``report-gaps --fix`` has work to do. Invoices are dated in number order.
+    """
+
+    def __init__(
+        self,
+        invoice_count=1000,
+        prefix="INV-",
+        gap_every=0,
+        org_id="1",
+        latency=0.0,
+        error_rate=0.0,
+        rate_per_minute=None,
+        rate_per_day=None,
+        token_expires_in=3600,
+        compression=True,
+        seed=0,
+    ):
+        self.org_id = org_id
+        self.compression = compression
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_per_minute = rate_per_minute
+        self.rate_per_day = rate_per_day
+        self.token_expires_in = token_expires_in
+
+        self.invoices = {}
+        self.invoice_ids_by_number = {}
+        self.tokens = set()
+        self.requests = {}
+        self.used_today = 0
+        # Response body bytes as sent, after compression
+        self.bytes_sent = 0
+
+        self._random = random.Random(seed)
+        self._recent = deque()
+        self._version = 0
+        self._listings = {}
+        self._lock = threading.Lock()
+
+        self._generate(invoice_count, prefix, gap_every)
+
+    def _generate(self, invoice_count, prefix, gap_every):
+        first_date = date(2020, 1, 1)
+        modified = timestamp(datetime(2024, 1, 1, tzinfo=timezone.utc))
+        number = 0
+        for i in range(invoice_count):
+            number += 1
+            if gap_every and number % gap_every == 0:
+                number += 1
+
+            invoice_id = str(460000000000000 + i)
+            customer = i % 50
+            total = float(100 + i % 900)
+            self.invoice_ids_by_number[f"{prefix}{number:06d}"] = invoice_id
+            self.invoices[invoice_id] = {
+                "invoice_id": invoice_id,
+                "invoice_number": f"{prefix}{number:06d}",
+                "date": (first_date + timedelta(days=i * 1000 // max(invoice_count, 1))).isoformat(),
+                "due_date": (first_date + timedelta(days=30 + i * 1000 // max(invoice_count, 1))).isoformat(),
+                "status": STATUSES[i % len(STATUSES)],
+                "customer_id": str(470000000000000 + customer),
+                "customer_name": f"Customer {customer:02d}",
+                "total": total,
+                "balance": 0.0 if i % len(STATUSES) == 1 else total,
+                "last_modified_time": modified,
+                "reference_number": "",
+                "notes": "Thanks for your business.",
+                "line_items": [
+                    {"line_item_id": f"{invoice_id}1", "name": "Plywood", "rate": total, "quantity": 1.0}
+                ],
+                "billing_address": {"address": "1 Main Street", "city": "Springfield"},
+                "shipping_address": {"address": "1 Main Street", "city": "Springfield"},
+                "contact_persons_details": [],
+            }
+
+    def numbers(self, prefix="INV-"):
+        """Numeric parts of the invoice numbers of a series, sorted"""
+        return sorted(
+            int(invoice["invoice_number"][len(prefix):])
+            for invoice in self.invoices.values()
+            if invoice["invoice_number"].startswith(prefix)
+        )
+
+    def count(self, method, route):
+        return self.requests.get((method, route), 0)
+
+    def handler(self):
+        """A request handler class bound to this organization"""
+        return type("FakeZohoHandler", (FakeZohoHandler,), {"zoho": self})
+
+    def serve(self, host="127.0.0.1", port=0):
+        """A StubServer context manager serving this organization"""
+        return StubServer(self.handler(), host, port)
+
+    def issue_token(self):
+        token = uuid.uuid4().hex
+        with self._lock:
+            self.tokens.add(token)
+        return token
+
+    def rate_limited(self):
+        """None, or the Retry-After seconds of a 429 to send"""
+        with self._lock:
+            if self.rate_per_day is not None and self.used_today >= self.rate_per_day:
+                return 3600
+
+            now = time.monotonic()
+            while self._recent and now - self._recent[0] >= 60:
+                self._recent.popleft()
+            if self.rate_per_minute is not None and len(self._recent) >= self.rate_per_minute:
+                return max(1, int(60 - (now - self._recent[0])) + 1)
+
+            self._recent.append(now)
+            self.used_today += 1
+            return None
+
+    def daily_remaining(self):
+        if self.rate_per_day is None:
+            return None
+        return max(self.rate_per_day - self.used_today, 0)
+
+    def encode(self, payload, accept_encoding):
+        """Compress a response body for a client accepting ``accept_encoding``, returning (encoding, body)"""
+        if not self.compression or len(payload) < COMPRESS_MIN_SIZE:
+            return None, payload
+
+        accepted = {encoding.split(";")[0].strip().lower() for encoding in accept_encoding.split(",")}
+        if "br" in accepted and brotli is not None:
+            return "br", brotli.compress(payload, quality=5)
+        if "gzip" in accepted:
+            return "gzip", gzip.compress(payload, compresslevel=6)
+        return None, payload
+
+    def list_invoices(self, query):
+        """The invoices listing, with the filters and sorting Zoho understands"""
+        page = int(query.get("page", 1))
+        per_page = min(int(query.get("per_page", 200)), 200)
+
+        filters = tuple(
+            (name, query[name])
+            for name in (
+                "status",
+                "customer_id",
+                "customer_name",
+                "date_start",
+                "date_end",
+                "last_modified_time",
+                "invoice_number_startswith",
+                "invoice_number_contains",
+            )
+            if query.get(name)
+        )
+        sort_column = query.get("sort_column", "date")
+        sort_order = query.get("sort_order", "D")
+        key = (filters, sort_column, sort_order)
+
+        with self._lock:
+            # Pages of one listing are requested many times, keep the matching IDs until an update
+            cached = self._listings.get(key)
+            if cached is None or cached[0] != self._version:
+                matches = dict(filters)
+                ids = [invoice["invoice_id"] for invoice in self.invoices.values() if self._matches(invoice, matches)]
+                ids.sort(key=lambda invoice_id: self.invoices[invoice_id].get(sort_column) or "")
+                if sort_order == "D":
+                    ids.reverse()
+                cached = self._listings[key] = (self._version, ids)
+
+            start = (page - 1) * per_page
+            ids = cached[1][start:start + per_page]
+            invoices = [{field: self.invoices[invoice_id][field] for field in SUMMARY_FIELDS} for invoice_id in ids]
+            has_more_page = page * per_page < len(cached[1])
+
+        return {
+            "code": 0,
+            "message": "success",
+            "invoices": invoices,
+            "page_context": {
+                "page": page,
+                "per_page": per_page,
+                "has_more_page": has_more_page,
+                "sort_column": sort_column,
+                "sort_order": sort_order,
+            },
+        }
+
+    @staticmethod
+    def _matches(invoice, filters):
+        number = invoice["invoice_number"]
+        if "status" in filters and invoice["status"] != filters["status"]:
+            return False
+        if "customer_id" in filters and invoice["customer_id"] != filters["customer_id"]:
+            return False
+        if "customer_name" in filters and invoice["customer_name"] != filters["customer_name"]:
+            return False
+        if "date_start" in filters and invoice["date"] < filters["date_start"]:
+            return False
+        if "date_end" in filters and invoice["date"] > filters["date_end"]:
+            return False
+        if "last_modified_time" in filters and invoice["last_modified_time"] < filters["last_modified_time"]:
+            return False
+        if "invoice_number_startswith" in filters and not number.startswith(filters["invoice_number_startswith"]):
+            return False
+        if "invoice_number_contains" in filters and filters["invoice_number_contains"] not in number:
+            return False
+        return True
+
+    def get_invoice(self, invoice_id):
+        with self._lock:
+            invoice = self.invoices.get(invoice_id)
+            if invoice is None:
+                return 404, {"code": 1002, "message": "Invoice does not exist."}
+            return 200, {"code": 0, "message": "success", "invoice": json.loads(json.dumps(invoice))}
+
+    def update_invoice(self, invoice_id, fields):
+        with self._lock:
+            invoice = self.invoices.get(invoice_id)
+            if invoice is None:
+                return 404, {"code": 1002, "message": "Invoice does not exist."}
+
+            number = fields.get("invoice_number")
+            if number and number != invoice["invoice_number"]:
+                if number in self.invoice_ids_by_number:
+                    return 400, {"code": 1001, "message": f'Invoice "{number}" already exists.'}
+                del self.invoice_ids_by_number[invoice["invoice_number"]]
+                self.invoice_ids_by_number[number] = invoice_id
+
+            for field, value in fields.items():
+                if field not in READ_ONLY_FIELDS:
+                    invoice[field] = value
+            invoice["last_modified_time"] = timestamp()
+            self._version += 1
+
+            return 200, {
+                "code": 0,
+                "message": "Invoice information has been updated.",
+                "invoice": json.loads(json.dumps(invoice)),
+            }
+
+
+class FakeZohoHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    zoho = None
+
+    def _reply(self, status, body, headers=None):
+        encoding, payload = self.zoho.encode(json.dumps(body).encode(), self.headers.get("Accept-Encoding", ""))
+        with self.zoho._lock:
+            self.zoho.bytes_sent += len(payload)
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        for name, value in (headers or {}).items():
+            self.send_header(name, str(value))
+        self.end_headers()
+        try:
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up on the request, e.g. a cancelled page prefetch
+            self.close_connection = True
+
+    def _handle(self):
+        zoho = self.zoho
+        url = urlparse(self.path)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+        parts = url.path.strip("/").split("/")
+        route = "/".join("{id}" if part.isdigit() else part for part in parts)
+        with zoho._lock:
+            zoho.requests[(self.command, route)] = zoho.requests.get((self.command, route), 0) + 1
+
+        if zoho.latency:
+            time.sleep(zoho.latency)
+
+        if route == "oauth/v2/token" and self.command == "POST":
+            return self._reply(
+                200,
+                {
+                    "access_token": zoho.issue_token(),
+                    "api_domain": "https://www.zohoapis.com",
+                    "token_type": "Bearer",
+                    "expires_in": zoho.token_expires_in,
+                },
+            )
+
+        if parts[:2] != ["books", "v3"]:
+            return self._reply(404, {"code": 5, "message": "Invalid URL Passed"})
+
+        authorization = self.headers.get("Authorization", "")
+        if authorization.removeprefix("Zoho-oauthtoken ") not in zoho.tokens:
+            return self._reply(401, {"code": 57, "message": "You are not authorized to perform this operation"})
+
+        retry_after = zoho.rate_limited()
+        headers = {}
+        if zoho.daily_remaining() is not None:
+            headers["X-Rate-Limit-Remaining"] = zoho.daily_remaining()
+        if retry_after is not None:
+            headers["Retry-After"] = retry_after
+            return self._reply(
+                429, {"code": 44, "message": "You have made too many requests continuously."}, headers
+            )
+
+        if zoho.error_rate and zoho._random.random() < zoho.error_rate:
+            return self._reply(503, {"code": 503, "message": "Service temporarily unavailable"}, headers)
+
+        resource = parts[2:]
+        if resource == ["organizations"] and self.command == "GET":
+            organizations = [{"organization_id": zoho.org_id, "name": "Fake Organization", "is_default_org": True}]
+            return self._reply(200, {"code": 0, "message": "success", "organizations": organizations}, headers)
+
+        if query.get("organization_id") != zoho.org_id:
+            return self._reply(400, {"code": 6041, "message": "Invalid value passed for organization_id"}, headers)
+
+        if resource == ["invoices"] and self.command == "GET":
+            return self._reply(200, zoho.list_invoices(query), headers)
+
+        if len(resource) == 2 and resource[0] == "invoices":
+            if self.command == "GET":
+                status, response = zoho.get_invoice(resource[1])
+                return self._reply(status, response, headers)
+            if self.command == "PUT":
+                status, response = zoho.update_invoice(resource[1], body)
+                return self._reply(status, response, headers)
+
+        return self._reply(404, {"code": 5, "message": "Invalid URL Passed"}, headers)
+
+    do_GET = _handle
+    do_POST = _handle
+    do_PUT = _handle
+    do_DELETE = _handle
+
+    def log_message(self, format, *args):
+        pass
@@ -0,0 +1,46 @@
+import pytest
+from click.testing import CliRunner
+
+from benchmarks.bench_e2e import reset_client
+from zoho.client import client
+from zoho.commands import cli
+from zoho.settings import settings
+
+
+@pytest.fixture
+def zoho_cli(tmp_path, monkeypatch):
+    """Serve a FakeZoho organization, returning a function running CLI commands against it"""
+    for name in ("client_id", "client_secret", "org_id", "RATE_LIMIT_PER_MINUTE", "RATE_LIMIT_PER_DAY"):
+        monkeypatch.setattr(settings, name, getattr(settings, name))
+    monkeypatch.setattr(settings, "TOKEN_CACHE_FILE", str(tmp_path / "tokens.json"))
+    monkeypatch.setattr(settings, "JOURNAL_DIR", str(tmp_path / "journals"))
+    monkeypatch.setattr(settings, "MIRROR_FILE", str(tmp_path / "mirror.sqlite3"))
+    monkeypatch.setattr(settings, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(settings, "LATENCY_HISTORY_FILE", str(tmp_path / "latency.json"))
+
+    servers = []
+
+    def start(zoho):
+        server = zoho.serve()
+        servers.append(server.__enter__())
+        monkeypatch.setattr(settings, "ACCOUNTS_BASE_URL", f"{servers[-1].url}/oauth/v2")
+        monkeypatch.setattr(settings, "BOOKS_BASE_URL", f"{servers[-1].url}/books/v3")
+
+        def run(*args, exit_code=0):
+            """Run a command like a fresh process, returning its click Result"""
+            reset_client(tmp_path)
+            options = ["--client-id", "test", "--client-secret", "test", "--org-id", zoho.org_id]
+            options += ["--rate-per-minute", "100000", "--rate-per-day", "1000000"]
+            result = CliRunner().invoke(cli, [*options, *args])
+            client.close()
+            if result.exception is not None and not isinstance(result.exception, SystemExit):
+                raise result.exception
+            assert result.exit_code == exit_code, result.output
+            return result
+
+        return run
+
+    yield start
+    for server in servers:
+        server.__exit__(None, None, None)
+    reset_client(tmp_path)
@@ -0,0 +1,118 @@
+"""
+AsyncClient against the offline Zoho Books stand-in
+"""
+
+import asyncio
+
+import pytest
+
+from benchmarks.fake_zoho import FakeZoho
+from zoho.async_client import AsyncClient
+from zoho.cache import ResponseCache
+from zoho.client import Client
+from zoho.retry import RetryPolicy
+from zoho.settings import settings
+from zoho.token_cache import TokenCache
+
+pytest.importorskip("httpx")
+
+
+@pytest.fixture
+def serve(zoho_cli, tmp_path, monkeypatch):
+    """Serve a FakeZoho organization, returning a sync Client of it"""
+    monkeypatch.setattr(settings, "client_id", "test")
+    monkeypatch.setattr(settings, "client_secret", "test")
+    monkeypatch.setattr(settings, "RATE_LIMIT_PER_MINUTE", 100000)
+    clients = []
+
+    def start(zoho):
+        zoho_cli(zoho)
+        clients.append(Client(org_id=zoho.org_id, token_cache=TokenCache(tmp_path / "tokens.json")))
+        return clients[-1]
+
+    yield start
+    for client in clients:
+        client.close()
+
+
+def run(client, work):
+    """Run ``work(async_client)`` in a new event loop, closing the client's connections afterwards"""
+
+    async def main():
+        async with AsyncClient(client) as async_client:
+            return await work(async_client)
+
+    return asyncio.run(main())
+
+
+def test_requests_are_made_concurrently_with_the_token_of_the_sync_client(serve):
+    zoho = FakeZoho(30)
+    client = serve(zoho)
+    invoice_ids = list(zoho.invoices)[:10]
+    client.get("invoices")
+
+    async def fetch(async_client):
+        return await asyncio.gather(*(async_client.get(f"invoices/{invoice_id}") for invoice_id in invoice_ids))
+
+    responses = run(client, fetch)
+    assert [response["invoice"]["invoice_id"] for response in responses] == invoice_ids
+    assert zoho.count("POST", "oauth/v2/token") == 1
+    # Requests of both clients are counted against the same quota and metrics
+    assert client.api_budget()["used_today"] == 11
+    assert client.metrics.as_dict()["GET invoices/{id}"]["calls"] == 10
+
+
+def test_updates_and_zoho_errors(serve):
+    zoho = FakeZoho(30)
+    client = serve(zoho)
+    first, second = list(zoho.invoices)[:2]
+
+    async def update(async_client):
+        renamed = await async_client.put(f"invoices/{first}", {"invoice_number": "INV-999999"})
+        taken = await async_client.put(f"invoices/{second}", {"invoice_number": "INV-999999"})
+        return renamed, taken
+
+    renamed, taken = run(client, update)
+    assert renamed["invoice"]["invoice_number"] == "INV-999999"
+    assert taken["code"] == 1001
+    assert 1001 in client.errors
+    assert zoho.invoices[second]["invoice_number"] != "INV-999999"
+
+
+def test_a_rejected_token_is_replaced_once(serve):
+    zoho = FakeZoho(30)
+    client = serve(zoho)
+    client.access_token = "revoked"
+
+    response = run(client, lambda async_client: async_client.get("invoices"))
+    assert len(response["invoices"]) == 30
+    assert client.access_token != "revoked"
+    assert zoho.count("POST", "oauth/v2/token") == 1
+
+
+def test_failed_requests_are_retried(serve):
+    zoho = FakeZoho(30, error_rate=0.3)
+    client = serve(zoho)
+    client.retry_policy = RetryPolicy(max_attempts=10, backoff=0.001)
+    invoice_ids = list(zoho.invoices)
+
+    async def fetch(async_client):
+        return await asyncio.gather(*(async_client.get(f"invoices/{invoice_id}") for invoice_id in invoice_ids))
+
+    responses = run(client, fetch)
+    assert all(response["code"] == 0 for response in responses)
+    assert zoho.count("GET", "books/v3/invoices/{id}") > len(invoice_ids)
+
+
+def test_responses_are_cached_for_both_clients(serve):
+    zoho = FakeZoho(30)
+    client = serve(zoho)
+    client.cache = ResponseCache(default_ttl=60)
+    client.get("invoices")
+
+    async def fetch(async_client):
+        return await async_client.get("invoices"), await async_client.get("invoices")
+
+    first, second = run(client, fetch)
+    assert first == second
+    assert zoho.count("GET", "books/v3/invoices") == 1
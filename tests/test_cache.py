@@ -0,0 +1,123 @@
+import pytest
+
+from zoho.cache import ResponseCache
+from zoho.client import Client
+
+
+class FakeResponse:
+    def __init__(self, content, status_code=200, headers=None):
+        self.content = content
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """time.time of the cache, advanced by hand"""
+    now = [1000.0]
+    monkeypatch.setattr("zoho.cache.time.time", lambda: now[0])
+    return now
+
+
+def test_ttl_of_the_first_matching_pattern():
+    cache = ResponseCache(ttls={"invoices/*": 300, "invoices": 60}, default_ttl=5)
+    assert cache.ttl("invoices/1") == 300
+    assert cache.ttl("invoices") == 60
+    assert cache.ttl("contacts") == 5
+
+
+def test_entries_expire_unless_they_can_be_revalidated(clock):
+    cache = ResponseCache(default_ttl=60)
+    cache.set("invoices", {"page": 1}, {"invoices": []})
+    cache.set("invoices", {"page": 2}, {"invoices": []}, etag='"v1"')
+    assert cache.is_fresh(cache.get("invoices", {"page": 1}))
+
+    clock[0] += 61
+    assert cache.get("invoices", {"page": 1}) is None
+    entry = cache.get("invoices", {"page": 2})
+    assert not cache.is_fresh(entry)
+    assert cache.conditional_headers(entry) == {"If-None-Match": '"v1"'}
+
+
+def test_entries_are_kept_on_disk_for_later_runs(tmp_path):
+    ResponseCache(directory=tmp_path).set("invoices/1", {"organization_id": "1"}, {"invoice": {"id": 1}})
+    entry = ResponseCache(directory=tmp_path).get("invoices/1", {"organization_id": "1"})
+    assert entry["response"] == {"invoice": {"id": 1}}
+    assert ResponseCache(directory=tmp_path).get("invoices/1", {"organization_id": "2"}) is None
+
+
+def test_least_recently_used_entries_are_evicted_from_memory():
+    cache = ResponseCache(max_entries=2)
+    cache.set("invoices/1", None, {})
+    cache.set("invoices/2", None, {})
+    cache.get("invoices/1", None)
+    cache.set("invoices/3", None, {})
+    assert cache.get("invoices/2", None) is None
+    assert cache.get("invoices/1", None) is not None
+
+
+def test_invalidate_drops_every_query_of_an_endpoint(tmp_path):
+    cache = ResponseCache(directory=tmp_path)
+    cache.set("invoices", {"page": 1}, {})
+    cache.set("invoices", {"page": 2}, {})
+    cache.set("invoices/1", None, {})
+    cache.invalidate("invoices")
+
+    for cache in (cache, ResponseCache(directory=tmp_path)):
+        assert cache.get("invoices", {"page": 1}) is None
+        assert cache.get("invoices", {"page": 2}) is None
+        assert cache.get("invoices/1", None) is not None
+
+
+@pytest.fixture
+def cached_client():
+    sent = []
+    responses = []
+
+    def send(method, endpoint, params, json_data, headers):
+        sent.append((method, endpoint, headers))
+        return responses.pop(0)
+
+    client = Client(cache=ResponseCache(default_ttl=60), org_id="1")
+    client.access_token = "token"
+    client._send = send
+    return client, sent, responses
+
+
+def test_client_answers_fresh_requests_from_the_cache(cached_client):
+    client, sent, responses = cached_client
+    responses.append(FakeResponse(b'{"code": 0, "invoice": {"invoice_number": "INV-1"}}'))
+
+    assert client.get("invoices/1") == client.get("invoices/1")
+    assert len(sent) == 1
+    assert (client.cache.hits, client.cache.misses) == (1, 1)
+
+
+def test_client_writes_make_the_resource_and_its_listing_stale(cached_client):
+    client, sent, responses = cached_client
+    responses.append(FakeResponse(b'{"code": 0, "invoices": []}'))
+    responses.append(FakeResponse(b'{"code": 0, "invoice": {}}'))
+    client.get("invoices")
+    client.get("invoices/1")
+
+    responses.append(FakeResponse(b'{"code": 0, "invoice": {}}'))
+    client.put("invoices/1", {"invoice_number": "INV-2"})
+    responses.append(FakeResponse(b'{"code": 0, "invoices": [{}]}'))
+    assert client.get("invoices") == {"code": 0, "invoices": [{}]}
+    assert [method for method, *_ in sent] == ["GET", "GET", "PUT", "GET"]
+
+
+def test_client_revalidates_expired_entries(cached_client, clock):
+    client, sent, responses = cached_client
+    body = b'{"code": 0, "invoices": []}'
+    responses.append(FakeResponse(body, headers={"ETag": '"v1"'}))
+    client.get("invoices")
+
+    clock[0] += 61
+    responses.append(FakeResponse(b"", status_code=304))
+    assert client.get("invoices") == {"code": 0, "invoices": []}
+    assert sent[-1][2] == {"If-None-Match": '"v1"'}
+    assert client.cache.revalidated == 1
+    # The entry is fresh again
+    client.get("invoices")
+    assert len(sent) == 2
@@ -0,0 +1,47 @@
+import pytest
+
+from zoho.client import Client
+from zoho.retry import RetryPolicy
+
+
+class FakeResponse:
+    def __init__(self, content, status_code=200):
+        self.content = content
+        self.status_code = status_code
+        self.headers = {}
+
+
+@pytest.fixture
+def make_client(monkeypatch):
+    monkeypatch.setattr("time.sleep", lambda seconds: None)
+
+    def make(send):
+        client = Client(retry_policy=RetryPolicy(max_attempts=3), org_id="1")
+        client.access_token = "token"
+        client._send = send
+        return client
+
+    return make
+
+
+def test_a_cut_off_response_is_retried(make_client, capsys):
+    responses = [FakeResponse(b'{"code": 0, "invoi'), FakeResponse(b'{"code": 0, "invoices": []}')]
+    client = make_client(lambda *args: responses.pop(0))
+
+    assert client.get("invoices") == {"code": 0, "invoices": []}
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert "retrying in" in captured.err
+
+
+def test_a_failed_reauthentication_is_not_retried(make_client):
+    calls = []
+
+    def send(*args):
+        calls.append(args)
+        raise ValueError("Failed to get access token: invalid_client")
+
+    client = make_client(send)
+    with pytest.raises(ValueError, match="Failed to get access token"):
+        client.get("invoices")
+    assert len(calls) == 1
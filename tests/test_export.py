@@ -0,0 +1,107 @@
+"""
+invoices export, and resuming an interrupted export, against the offline Zoho Books stand-in
+"""
+
+import csv
+import json
+
+from benchmarks.fake_zoho import FakeZoho
+from zoho.commands.invoices.export import CSV_COLUMNS, ExportProgress
+
+
+def exported_ids(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line)["invoice_id"] for line in f]
+
+
+def test_export_writes_every_full_invoice_once(zoho_cli, tmp_path):
+    zoho = FakeZoho(30)
+    path = tmp_path / "invoices.jsonl"
+    output = zoho_cli(zoho)("invoices", "export", "-o", str(path), "--workers", "4").output
+
+    assert "Exported 30 invoices" in output
+    assert sorted(exported_ids(path)) == sorted(zoho.invoices)
+    with open(path, encoding="utf-8") as f:
+        assert all(invoice["line_items"] for invoice in map(json.loads, f))
+    assert not ExportProgress(path).exists()
+
+
+def test_export_shares_the_list_filters(zoho_cli, tmp_path):
+    zoho = FakeZoho(30)
+    path = tmp_path / "invoices.csv"
+    zoho_cli(zoho)("invoices", "export", "-o", str(path), "--format", "csv", "--status", "paid", "--to-number", "20")
+
+    with open(path, encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert list(rows[0]) == CSV_COLUMNS
+    expected = [
+        invoice["invoice_number"]
+        for invoice in zoho.invoices.values()
+        if invoice["status"] == "paid" and int(invoice["invoice_number"][4:]) <= 20
+    ]
+    assert [row["invoice_number"] for row in rows] == sorted(expected)
+
+
+def test_resume_an_interrupted_export(zoho_cli, tmp_path, monkeypatch):
+    zoho = FakeZoho(40)
+    path = tmp_path / "invoices.jsonl"
+    run = zoho_cli(zoho)
+
+    record = ExportProgress.record
+    recorded = []
+
+    def record_then_crash(progress, invoice_id, offset):
+        record(progress, invoice_id, offset)
+        recorded.append(invoice_id)
+        if len(recorded) == 15:
+            # Killed halfway through writing the next invoice and its progress entry
+            with open(path, "a", encoding="utf-8") as f:
+                f.write('{"invoice_id": "4600')
+            progress._file.write('{"invoice_id": "4600')
+            progress._file.flush()
+            raise KeyboardInterrupt
+
+    with monkeypatch.context() as patch:
+        patch.setattr(ExportProgress, "record", record_then_crash)
+        run("invoices", "export", "-o", str(path), "--workers", "1", exit_code=1)
+    assert ExportProgress(path).exists()
+
+    output = run("invoices", "export", "-o", str(path), "--resume").output
+    assert "Resuming after 15 exported invoices" in output
+    assert "Exported 25 invoices" in output
+    assert sorted(exported_ids(path)) == sorted(zoho.invoices)
+    assert not ExportProgress(path).exists()
+
+
+def test_progress_entries_after_a_torn_write_survive_the_next_resume(tmp_path):
+    path = tmp_path / "invoices.jsonl"
+    progress = ExportProgress(path)
+    progress.start({"format": "jsonl", "offset": 0})
+    progress.record("1", 100)
+    progress.close()
+    with open(progress.path, "a", encoding="utf-8") as f:
+        f.write('{"invoice_id": "2", "off')
+
+    job, done, offset = progress.resume(output_size=150)
+    assert (done, offset) == ({"1"}, 100)
+    progress.record("2", 200)
+    progress.record("3", 300)
+    progress.close()
+
+    assert progress.resume(output_size=300)[1:] == ({"1", "2", "3"}, 300)
+    progress.close()
+
+
+def test_progress_is_only_trusted_as_far_as_the_output_goes(tmp_path):
+    progress = ExportProgress(tmp_path / "invoices.jsonl")
+    progress.start({"format": "jsonl", "offset": 0})
+    for invoice_id, offset in (("1", 100), ("2", 200), ("3", 300)):
+        progress.record(invoice_id, offset)
+    progress.close()
+
+    assert progress.resume(output_size=150)[1:] == ({"1"}, 100)
+    # Invoices 2 and 3 are exported again, their earlier entries must not be trusted anymore
+    progress.record("3", 140)
+    progress.close()
+    assert progress.resume(output_size=250)[1:] == ({"1", "3"}, 140)
+    progress.close()
@@ -0,0 +1,41 @@
+"""
+Commands run against several organizations at once, against the offline Zoho Books stand-in
+"""
+
+import json
+
+from benchmarks.fake_zoho import FakeZoho
+from zoho.client import client
+
+
+def listed(output):
+    return [json.loads(line) for line in output.splitlines() if line.startswith("{")]
+
+
+def test_a_failing_organization_does_not_stop_the_others(zoho_cli):
+    zoho = FakeZoho(30)
+    output = zoho_cli(zoho)("invoices", "list", "--orgs", "1,999", "--format", "jsonl", "--limit", "0").output
+
+    invoices = listed(output)
+    assert len(invoices) == 30
+    assert {invoice["organization_id"] for invoice in invoices} == {"1"}
+    assert "Organization 999 failed: Error 6041" in output
+
+
+def test_the_api_budget_of_every_organization_is_reported(zoho_cli):
+    output = zoho_cli(FakeZoho(30))("invoices", "list", "--orgs", "1,999", "--format", "jsonl").output
+
+    assert "API budget of organization 1: " in output
+    assert "API budget of organization 999: " in output
+    assert "API calls in total: 2 used today" in output
+
+
+def test_organizations_share_the_response_cache(zoho_cli, monkeypatch):
+    monkeypatch.setattr(client, "cache", None)
+    zoho = FakeZoho(30)
+    run = zoho_cli(zoho)
+
+    first = run("--cache", "invoices", "list", "--orgs", "1", "--format", "jsonl", "--limit", "0").output
+    second = run("--cache", "invoices", "list", "--orgs", "1", "--format", "jsonl", "--limit", "0").output
+    assert listed(first) == listed(second)
+    assert zoho.count("GET", "books/v3/invoices") == 1
@@ -0,0 +1,75 @@
+from zoho.journal import RenumberingJournal
+
+JOB = {"prefix": "INV-", "suffix": "", "start_number": 1, "from_number": None, "to_number": None}
+PLANS = [
+    {"invoice_id": "1", "old_number": "INV-000002", "date": "2024-01-01", "new_numeric_index": 1},
+    {"invoice_id": "2", "old_number": "INV-000003", "date": "2024-01-02", "new_numeric_index": 2},
+    {"invoice_id": "3", "old_number": "INV-000005", "date": "2024-01-03", "new_numeric_index": 3},
+]
+
+
+def test_resume_returns_the_plan_and_the_invoices_done(tmp_path):
+    path = tmp_path / "journals" / "renumber.jsonl"
+    with RenumberingJournal(path) as journal:
+        journal.start(JOB, PLANS)
+        journal.record("done", "1", new_number="INV-000001")
+        journal.record("parked", "2", new_number="INV-000002")
+        journal.record("failed", "3", error="Invoice is locked")
+
+    journal = RenumberingJournal(path)
+    job, plans, done = journal.resume()
+    assert job == JOB
+    assert plans == PLANS
+    # Parked and failed invoices still need their final number
+    assert done == {"1"}
+
+    # Resuming keeps appending to the same journal
+    journal.record("done", "2", new_number="INV-000002")
+    journal.close()
+    assert RenumberingJournal(path).resume()[2] == {"1", "2"}
+
+
+def test_resume_stops_at_a_torn_write(tmp_path):
+    path = tmp_path / "renumber.jsonl"
+    with RenumberingJournal(path) as journal:
+        journal.start(JOB, PLANS)
+        journal.record("done", "1", new_number="INV-000001")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"type": "done", "invoice_id": "2", "new_')
+
+    with RenumberingJournal(path) as journal:
+        job, plans, done = journal.resume()
+    assert len(plans) == 3
+    assert done == {"1"}
+
+
+def test_entries_after_a_torn_write_survive_the_next_resume(tmp_path):
+    path = tmp_path / "renumber.jsonl"
+    with RenumberingJournal(path) as journal:
+        journal.start(JOB, PLANS)
+        journal.record("done", "1", new_number="INV-000001")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"type": "done", "invoice_id": "2", "new_')
+
+    with RenumberingJournal(path) as journal:
+        journal.resume()
+        journal.record("done", "2", new_number="INV-000002")
+        journal.record("done", "3", new_number="INV-000003")
+
+    with RenumberingJournal(path) as journal:
+        assert journal.resume()[2] == {"1", "2", "3"}
+
+
+def test_start_replaces_an_earlier_job(tmp_path):
+    path = tmp_path / "renumber.jsonl"
+    with RenumberingJournal(path) as journal:
+        journal.start(JOB, PLANS)
+        journal.record("done", "1")
+    with RenumberingJournal(path) as journal:
+        journal.start({**JOB, "start_number": 100}, PLANS[:1])
+
+    with RenumberingJournal(path) as journal:
+        job, plans, done = journal.resume()
+    assert job["start_number"] == 100
+    assert plans == PLANS[:1]
+    assert done == set()
@@ -0,0 +1,153 @@
+import asyncio
+import threading
+
+import pytest
+
+from zoho.managers import BillManager, ContactManager, CreditNoteManager, InvoiceManager, ItemManager
+
+
+class FakeClient:
+    """Serves pages of ``count`` invoices, recording every request"""
+
+    def __init__(self, count=0, total_pages=False):
+        self.invoices = {str(i): {"invoice_id": str(i), "invoice_number": f"INV-{i:06d}"} for i in range(1, count + 1)}
+        self.total_pages = total_pages
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def get(self, endpoint, params=None):
+        with self.lock:
+            self.requests.append(("GET", endpoint, dict(params or {})))
+        if endpoint != "invoices":
+            return {"code": 0, "invoice": self.invoices[endpoint.split("/")[1]]}
+
+        page, per_page = params["page"], params["per_page"]
+        invoices = list(self.invoices.values())
+        page_context = {"page": page, "per_page": per_page, "has_more_page": page * per_page < len(invoices)}
+        if self.total_pages:
+            page_context["total_pages"] = -(-len(invoices) // per_page)
+        return {"code": 0, "invoices": invoices[(page - 1) * per_page:page * per_page], "page_context": page_context}
+
+    def put(self, endpoint, json_data, params=None, verify=None):
+        with self.lock:
+            self.requests.append(("PUT", endpoint, dict(json_data)))
+        invoice = self.invoices.get(endpoint.split("/")[1])
+        if invoice is None:
+            return {"code": 1002, "message": "Invoice does not exist."}
+        invoice.update(json_data)
+        return {"code": 0, "message": "The invoice has been updated.", "invoice": dict(invoice)}
+
+    def pages_fetched(self):
+        return sorted(params["page"] for method, endpoint, params in self.requests if endpoint == "invoices")
+
+
+@pytest.mark.parametrize("count", [0, 5, 10, 25, 30])
+def test_prefetching_speculates_at_most_one_page_ahead(count):
+    client = FakeClient(count)
+    invoices = list(InvoiceManager(client).iter_records(per_page=10, concurrency=8))
+
+    assert [invoice["invoice_id"] for invoice in invoices] == list(client.invoices)
+    pages = max(1, -(-count // 10))
+    assert client.pages_fetched() == list(range(1, pages + 1 + (pages > 1)))
+
+
+def test_prefetching_stops_at_the_reported_page_count():
+    client = FakeClient(30, total_pages=True)
+    invoices = list(InvoiceManager(client).iter_records(per_page=10, concurrency=8))
+
+    assert len(invoices) == 30
+    assert client.pages_fetched() == [1, 2, 3]
+
+
+class FakeAsyncClient:
+    def __init__(self, client):
+        self.client = client
+
+    async def get(self, endpoint, params=None):
+        return self.client.get(endpoint, params)
+
+
+def test_async_prefetching_speculates_at_most_one_page_ahead():
+    client = FakeClient(25)
+    manager = InvoiceManager(client, FakeAsyncClient(client))
+
+    async def collect():
+        return [invoice async for invoice in manager.iter_records_async(per_page=10, concurrency=8)]
+
+    invoices = asyncio.run(collect())
+
+    assert len(invoices) == 25
+    # The speculative request for page 4 may be cancelled before it is sent
+    assert client.pages_fetched() in ([1, 2, 3], [1, 2, 3, 4])
+
+
+def test_bulk_update_returns_a_result_per_update_in_order(capsys):
+    client = FakeClient(20)
+    updates = [(str(i), {"reference_number": f"REF-{i}"}) for i in range(20, 0, -1)]
+    updates.insert(5, ("404", {"reference_number": "REF-404"}))
+    results = InvoiceManager(client).bulk_update(updates, workers=4)
+
+    assert [result.record_id for result in results] == [record_id for record_id, fields in updates]
+    failed = [result for result in results if not result.ok]
+    assert [(result.record_id, result.error, result.record) for result in failed] == [
+        ("404", "Invoice does not exist.", None)
+    ]
+    assert all(result.record["reference_number"] == f"REF-{result.record_id}" for result in results if result.ok)
+    # Only the given fields are sent, without fetching the invoices first
+    assert len(client.requests) == len(updates)
+    assert all(method == "PUT" and list(payload) == ["reference_number"] for method, _, payload in client.requests)
+
+
+class FakeStore:
+    """Records of any endpoint by ID, updated by PUT, for the sync and async clients alike"""
+
+    def __init__(self, manager_class, count):
+        self.resource_key, self.id_field = manager_class.resource_key, manager_class.id_field
+        self.records = {str(i): {self.id_field: str(i)} for i in range(1, count + 1)}
+        self.in_flight = self.most_in_flight = 0
+
+    def put(self, endpoint, json_data, params=None, verify=None):
+        record = self.records.get(endpoint.split("/")[1])
+        if record is None:
+            return {"code": 1002, "message": "Record does not exist."}
+        record.update(json_data)
+        return {"code": 0, "message": "Updated.", self.resource_key: dict(record)}
+
+    async def put_async(self, endpoint, json_data, params=None, verify=None):
+        self.in_flight += 1
+        self.most_in_flight = max(self.most_in_flight, self.in_flight)
+        await asyncio.sleep(0)
+        self.in_flight -= 1
+        return self.put(endpoint, json_data, params, verify)
+
+
+class FakeAsyncStore:
+    def __init__(self, store):
+        self.put = store.put_async
+
+
+MANAGERS = [InvoiceManager, ItemManager, BillManager, ContactManager, CreditNoteManager]
+
+
+@pytest.mark.parametrize("manager_class", MANAGERS)
+def test_every_manager_updates_in_bulk(manager_class, capsys):
+    store = FakeStore(manager_class, 10)
+    updates = [(str(i), {"reference_number": f"REF-{i}"}) for i in (3, 11, 1)]
+    results = manager_class(store, FakeAsyncStore(store)).bulk_update(updates, workers=2)
+
+    assert [(result.record_id, result.ok) for result in results] == [("3", True), ("11", False), ("1", True)]
+    assert results[0].record == {store.id_field: "3", "reference_number": "REF-3"}
+    assert store.records["1"]["reference_number"] == "REF-1"
+
+
+@pytest.mark.parametrize("manager_class", MANAGERS)
+def test_every_manager_updates_in_bulk_asynchronously(manager_class, capsys):
+    store = FakeStore(manager_class, 10)
+    updates = [(str(i), {"reference_number": f"REF-{i}"}) for i in range(12, 0, -1)]
+    manager = manager_class(store, FakeAsyncStore(store))
+    results = asyncio.run(manager.bulk_update_async(updates, concurrency=3))
+
+    assert [result.record_id for result in results] == [record_id for record_id, fields in updates]
+    assert [result.record_id for result in results if not result.ok] == ["12", "11"]
+    assert all(store.records[str(i)]["reference_number"] == f"REF-{i}" for i in range(1, 11))
+    assert store.most_in_flight == 3
@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from benchmarks.fake_zoho import FakeZoho
+from zoho.metrics import Metrics, endpoint_label
+
+
+def request(metrics, endpoint, elapsed, status=200, method="GET"):
+    data = {"method": method, "endpoint": endpoint, "status": status, "elapsed": elapsed, "bytes_out": 0}
+    metrics("request", {**data, "bytes_in": 2048})
+
+
+@pytest.fixture
+def metrics():
+    metrics = Metrics()
+    for elapsed in (0.02, 0.03, 0.04, 0.2):
+        request(metrics, "invoices/460000000000001", elapsed)
+    request(metrics, "invoices/460000000000002", 0.04, status=404)
+    metrics("retry", {"method": "GET", "endpoint": "invoices/1", "attempt": 1, "error": "HTTP 503"})
+    metrics("cache_hit", {"method": "GET", "endpoint": "invoices"})
+    return metrics
+
+
+def test_resource_ids_share_one_series():
+    assert endpoint_label("invoices/460000000000001") == "invoices/{id}"
+    assert endpoint_label("invoices/1/email") == "invoices/{id}/email"
+    assert endpoint_label("invoices") == "invoices"
+
+
+def test_counters_and_latency_per_endpoint(metrics):
+    row = metrics.as_dict()["GET invoices/{id}"]
+    assert (row["calls"], row["errors"], row["retries"], row["bytes_in"]) == (5, 1, 1, 5 * 2048)
+    assert row["latency_seconds"]["total"] == pytest.approx(0.33)
+    # The median falls in the 25-50 ms bucket, the slowest call in the 100-250 ms one
+    assert 0.025 <= row["latency_seconds"]["p50"] <= 0.05
+    assert 0.1 <= row["latency_seconds"]["p99"] <= 0.25
+    assert metrics.as_dict()["GET invoices"]["cache_hits"] == 1
+
+
+def test_prometheus_exposition(metrics):
+    lines = metrics.to_prometheus().splitlines()
+    assert "# TYPE zoho_api_requests_total counter" in lines
+    assert 'zoho_api_requests_total{method="GET",endpoint="invoices/{id}"} 5' in lines
+    assert 'zoho_api_request_duration_seconds_bucket{method="GET",endpoint="invoices/{id}",le="0.05"} 4' in lines
+    assert 'zoho_api_request_duration_seconds_bucket{method="GET",endpoint="invoices/{id}",le="+Inf"} 5' in lines
+    assert 'zoho_api_request_duration_seconds_count{method="GET",endpoint="invoices/{id}"} 5' in lines
+
+
+def test_json_and_text(metrics):
+    assert json.loads(metrics.to_json()) == metrics.as_dict()
+    text = metrics.to_text().splitlines()
+    assert text[0].startswith("Endpoint")
+    assert [line.split()[:3] for line in text[2:]] == [["GET", "invoices", "0"], ["GET", "invoices/{id}", "5"]]
+
+
+def test_stats_of_a_command_are_written_to_a_file(zoho_cli, tmp_path):
+    zoho = FakeZoho(30)
+    path = tmp_path / "stats.json"
+    zoho_cli(zoho)("--stats-format", "json", "--stats-file", str(path), "invoices", "list", "--limit", "0")
+
+    stats = json.loads(path.read_text())
+    assert stats["GET invoices"]["calls"] == zoho.count("GET", "books/v3/invoices")
+    assert stats["GET invoices"]["errors"] == 0
+
+
+def test_stats_are_printed_to_stderr(zoho_cli):
+    result = zoho_cli(FakeZoho(30))("--stats", "--stats-format", "prometheus", "invoices", "list")
+    assert 'zoho_api_requests_total{method="GET",endpoint="invoices"} 1' in result.output
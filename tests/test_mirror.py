@@ -0,0 +1,99 @@
+"""
+The local invoice mirror and invoices sync, against the offline Zoho Books stand-in
+"""
+
+import json
+
+import pytest
+
+from benchmarks.fake_zoho import FakeZoho
+from zoho.mirror import InvoiceMirror
+from zoho.settings import settings
+
+
+class FakeInvoiceManager:
+    """Lists the given invoices, failing after ``fail_after`` of them when set"""
+
+    def __init__(self, invoices, fail_after=None):
+        self.invoices = invoices
+        self.fail_after = fail_after
+        self.params = []
+
+    def iter_invoices(self, params, concurrency=1):
+        self.params.append(params)
+        for i, invoice in enumerate(self.invoices):
+            if i == self.fail_after:
+                raise ConnectionError("listing failed")
+            yield invoice
+
+
+def invoice(number, modified="2024-01-01T00:00:00+0000"):
+    return {"invoice_id": str(number), "invoice_number": f"INV-{number:06d}", "last_modified_time": modified}
+
+
+def mirrored_numbers(mirror):
+    return [invoice["invoice_number"] for invoice in mirror.iter_invoices()]
+
+
+def test_a_full_sync_drops_deleted_invoices(tmp_path):
+    with InvoiceMirror(tmp_path / "mirror.sqlite3", "1") as mirror:
+        assert mirror.sync(FakeInvoiceManager([invoice(1), invoice(2), invoice(3)]), full=True) == (3, 0)
+        assert mirror.sync(FakeInvoiceManager([invoice(1), invoice(3)]), full=True) == (2, 1)
+        assert mirrored_numbers(mirror) == ["INV-000001", "INV-000003"]
+
+
+def test_a_failed_full_sync_leaves_the_mirror_as_it_was(tmp_path):
+    with InvoiceMirror(tmp_path / "mirror.sqlite3", "1") as mirror:
+        mirror.sync(FakeInvoiceManager([invoice(1), invoice(2)]), full=True)
+        state = mirror.sync_state()
+        with pytest.raises(ConnectionError):
+            mirror.sync(FakeInvoiceManager([invoice(1, "2024-02-01T00:00:00+0000"), invoice(3)], 1), full=True)
+
+        assert mirrored_numbers(mirror) == ["INV-000001", "INV-000002"]
+        assert mirror.sync_state() == state
+
+
+def test_an_incremental_sync_lists_invoices_modified_since_the_last_one(tmp_path):
+    with InvoiceMirror(tmp_path / "mirror.sqlite3", "1") as mirror:
+        mirror.sync(FakeInvoiceManager([invoice(1), invoice(2, "2024-03-01T10:00:00+0100")]))
+        manager = FakeInvoiceManager([invoice(2, "2024-03-02T00:00:00+0000")])
+        assert mirror.sync(manager) == (1, 0)
+
+        assert manager.params == [{"last_modified_time": "2024-03-01T10:00:00+0100"}]
+        assert mirror.sync_state()["last_modified_time"] == "2024-03-02T00:00:00+0000"
+
+
+def test_mirrors_of_organizations_are_kept_apart(tmp_path):
+    with InvoiceMirror(tmp_path / "mirror.sqlite3", "1") as mirror:
+        mirror.upsert([invoice(1)])
+    with InvoiceMirror(tmp_path / "mirror.sqlite3", "2") as mirror:
+        assert mirror.count() == 0
+
+
+def test_full_invoices_are_only_reused_while_unmodified(tmp_path):
+    with InvoiceMirror(tmp_path / "mirror.sqlite3", "1") as mirror:
+        mirror.store_details([{**invoice(1), "line_items": [{}]}])
+        assert mirror.cached_details("1", "2024-01-01T00:00:00+0000")["line_items"] == [{}]
+        assert mirror.cached_details("1", "2024-02-01T00:00:00+0000") is None
+
+
+def test_list_reads_the_synced_mirror_without_calls(zoho_cli):
+    zoho = FakeZoho(30)
+    run = zoho_cli(zoho)
+    assert "Fetching all invoices" in run("invoices", "sync").output
+    calls = dict(zoho.requests)
+
+    zoho.update_invoice("460000000000003", {"status": "void"})
+    output = run("invoices", "sync").output
+    assert "Fetching invoices modified since 2024-01-01T00:00:00+0000" in output
+    # Zoho lists invoices modified at the given time too
+    assert "Synced 30 invoices, 30 invoices in" in output
+    assert "Synced 1 invoices, 30 invoices in" in run("invoices", "sync").output
+
+    result = run("invoices", "list", "--local", "--status", "void", "--format", "jsonl", "--fields", "invoice_id")
+    assert [json.loads(line) for line in result.output.splitlines() if line.startswith("{")] == [
+        {"invoice_id": "460000000000003"}
+    ]
+    assert zoho.count("GET", "books/v3/invoices") == calls[("GET", "books/v3/invoices")] + 2
+    with InvoiceMirror(settings.MIRROR_FILE, zoho.org_id) as mirror:
+        assert mirror.count() == 30
@@ -0,0 +1,126 @@
+import pytest
+
+from zoho.numbering import GapTracker, SeriesReport, analyze_series, count_cycles, find_counters, parse_number
+
+SERIES = ("INV-", "")
+
+
+def report(values, dates=None):
+    report = SeriesReport("INV-", "")
+    for value, date in zip(values, dates or ["2024-01-01"] * len(values)):
+        report.add(value, f"INV-{value:06d}", date)
+    return report.analyze()
+
+
+def test_parse_number_keeps_fiscal_year_in_series():
+    record = parse_number("INV/24-25/0007")
+    assert (record.prefix, record.value, record.width, record.suffix) == ("INV/24-25/", 7, 4, "")
+    assert record.format(12) == "INV/24-25/0012"
+    assert parse_number("no digits") is None
+
+
+def test_the_counter_is_the_part_that_varies_within_a_shape():
+    numbers = ["INV-0001-2024", "INV-0002-2024", "INV-0004-2024", "INV-0001-2025", "CN-0001"]
+    counters = find_counters(numbers)
+    # A shape with a single run of digits always counts in it
+    assert counters == {"INV-#-#": 0, "CN-#": 0}
+
+    series, unparsed = analyze_series([{"invoice_number": number} for number in numbers])
+    assert sorted(series) == [("CN-", ""), ("INV-", "-2024"), ("INV-", "-2025")]
+    assert series[("INV-", "-2024")].gaps == [(2, 4)]
+    assert unparsed == []
+
+
+def test_gap_tracker_learns_the_counter_from_a_listing():
+    tracker = GapTracker()
+    invoices = [{"invoice_id": str(i), "invoice_number": f"INV-{i:04d}-2024"} for i in (1, 2, 4)]
+    tracker.rebuild(invoices)
+    assert tracker.gaps() == {(("INV-", "-2024"), (2, 4))}
+
+    tracker.update({"invoice_id": "3", "invoice_number": "INV-0003-2024"})
+    assert tracker.gaps() == set()
+
+
+def test_series_report_gaps_and_duplicates():
+    series = report([7, 1, 2, 4, 5, 5])
+    assert series.first == 1 and series.last == 7
+    assert series.gaps == [(2, 4), (5, 7)]
+    assert series.missing_count == 2
+    assert series.duplicates == [("INV-000005", "INV-000005")]
+
+
+def test_series_report_out_of_order_dates():
+    series = report([1, 2, 3], ["2024-01-01", "2024-02-01", "2024-01-15"])
+    assert series.out_of_order == [("INV-000003", "2024-01-15", "INV-000002", "2024-02-01")]
+
+
+def test_sequential_renumbering_keeps_order():
+    assert report([1, 2, 4, 5, 7]).renumbering(1, "sequential") == [1, 2, 3, 4, 5]
+
+
+def test_fill_renumbering_moves_the_last_invoices_into_the_gaps():
+    assert report([1, 2, 4, 5, 7]).renumbering(1, "fill") == [1, 2, 4, 5, 3]
+    assert report([3, 5, 9]).renumbering(1, "fill") == [3, 1, 2]
+
+
+def test_date_renumbering_follows_dates():
+    series = report([1, 2, 3], ["2024-01-03", "2024-01-01", "2024-01-02"])
+    assert series.renumbering(1, "date") == [3, 1, 2]
+
+
+def test_unknown_strategy():
+    with pytest.raises(ValueError):
+        report([1, 2]).renumbering(1, "random")
+
+
+def test_count_cycles():
+    assert count_cycles([1, 2, 3], [3, 1, 2]) == 1
+    assert count_cycles([1, 2, 3, 4], [2, 1, 4, 3]) == 2
+    # A chain ends on a free number, so it needs no temporary number
+    assert count_cycles([2, 3, 5], [1, 2, 3]) == 0
+    assert count_cycles([1, 2], [1, 2]) == 0
+
+
+def test_gap_tracker_reports_changes_once():
+    tracker = GapTracker()
+    for invoice_id, number in (("a", "INV-000001"), ("b", "INV-000002"), ("c", "INV-000004")):
+        tracker.update({"invoice_id": invoice_id, "invoice_number": number})
+    assert tracker.changes() == ([(SERIES, (2, 4))], [])
+    assert tracker.changes() == ([], [])
+
+    tracker.update({"invoice_id": "c", "invoice_number": "INV-000003"})
+    assert tracker.changes() == ([], [(SERIES, (2, 4))])
+
+    tracker.remove("b")
+    assert tracker.gaps() == {(SERIES, (1, 3))}
+    assert tracker.changes() == ([(SERIES, (1, 3))], [])
+
+
+def test_gap_tracker_ignores_gaps_opened_and_closed_in_between():
+    tracker = GapTracker()
+    tracker.update({"invoice_id": "a", "invoice_number": "INV-000001"})
+    tracker.update({"invoice_id": "b", "invoice_number": "INV-000003"})
+    tracker.update({"invoice_id": "c", "invoice_number": "INV-000002"})
+    assert tracker.changes() == ([], [])
+
+
+def test_gap_tracker_temporary_numbers_leave_the_series():
+    tracker = GapTracker("INV-", "")
+    tracker.update({"invoice_id": "a", "invoice_number": "INV-000001"})
+    tracker.update({"invoice_id": "b", "invoice_number": "INV-000002"})
+    tracker.update({"invoice_id": "c", "invoice_number": "INV-000003"})
+    tracker.changes()
+
+    tracker.update({"invoice_id": "b", "invoice_number": "TMP-b"})
+    assert tracker.changes() == ([(SERIES, (1, 3))], [])
+
+
+def test_gap_tracker_rebuild_reports_invoices_deleted_without_notice():
+    tracker = GapTracker()
+    invoices = [{"invoice_id": str(i), "invoice_number": f"INV-{i:06d}"} for i in range(1, 6)]
+    for invoice in invoices:
+        tracker.update(invoice)
+    tracker.changes()
+
+    tracker.rebuild(invoice for invoice in invoices if invoice["invoice_id"] != "3")
+    assert tracker.changes() == ([(SERIES, (2, 4))], [])
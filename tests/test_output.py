@@ -0,0 +1,77 @@
+import csv
+import io
+import json
+
+import pytest
+
+from benchmarks.fake_zoho import FakeZoho
+from zoho.codec import record_type
+from zoho.output import WRITERS, get_writer
+
+FIELDS = ["invoice_number", "customer_name", "total"]
+RECORDS = [
+    {"invoice_number": "INV-000001", "customer_name": "Customer 01", "total": 100.0, "status": "paid"},
+    {"invoice_number": "INV-000002", "customer_name": None, "total": 250.5},
+]
+
+
+def write(output_format, records=RECORDS, fields=FIELDS):
+    stream = io.StringIO()
+    writer = get_writer(output_format, stream, fields)
+    for record in records:
+        writer.write(record)
+    writer.close()
+    assert writer.count == len(records)
+    return stream.getvalue()
+
+
+def projected(records=RECORDS, fields=FIELDS):
+    return [{field: record.get(field) for field in fields} for record in records]
+
+
+def test_json_lines():
+    assert [json.loads(line) for line in write("jsonl").splitlines()] == projected()
+
+
+def test_json_array():
+    assert json.loads(write("json")) == projected()
+    assert json.loads(write("json", records=[])) == []
+
+
+def test_csv():
+    rows = list(csv.DictReader(io.StringIO(write("csv"))))
+    assert [list(row) for row in rows] == [FIELDS, FIELDS]
+    assert rows[1] == {"invoice_number": "INV-000002", "customer_name": "", "total": "250.5"}
+
+
+def test_table_columns_have_a_fixed_width():
+    lines = write("table").splitlines()
+    assert lines[0].split() == FIELDS
+    assert lines[2][:20].rstrip() == "INV-000001"
+    assert lines[3][21:41].strip() == ""
+
+
+def test_text_labels_missing_values():
+    text = write("text")
+    assert "Number: INV-000001\nCustomer: Customer 01\nAmount: 100.0\n" in text
+    assert "Customer: N/A" in text
+
+
+def test_whole_records_are_written_without_fields():
+    assert [json.loads(line) for line in write("jsonl", fields=None).splitlines()] == RECORDS
+
+
+@pytest.mark.parametrize("output_format", sorted(WRITERS))
+def test_compact_records_are_written_like_dicts(output_format):
+    make_record = record_type(FIELDS, "InvoiceRecord")
+    assert write(output_format, records=[make_record(record) for record in RECORDS]) == write(output_format)
+
+
+def test_list_writes_every_page_to_a_file(zoho_cli, tmp_path):
+    path = tmp_path / "invoices.json"
+    output = zoho_cli(FakeZoho(450))("invoices", "list", "--limit", "0", "--format", "json", "-o", str(path)).output
+
+    invoices = json.loads(path.read_text())
+    assert len(invoices) == 450
+    assert list(invoices[0]) == ["invoice_number", "date", "status", "customer_name", "total"]
+    assert "Found 450 invoices." in output
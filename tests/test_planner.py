@@ -0,0 +1,125 @@
+import json
+from datetime import datetime, time, timedelta
+
+import pytest
+
+from zoho.planner import Estimate, LatencyHistory, Schedule, format_duration, parse_window
+from zoho.settings import settings
+
+NOON = datetime(2026, 1, 5, 12, 0)
+
+
+@pytest.fixture
+def history(tmp_path):
+    path = tmp_path / "latency.json"
+    path.write_text(json.dumps({"PUT invoices/{id}": {"mean": 0.1, "calls": 10}}))
+    return LatencyHistory(path)
+
+
+def test_estimate_uses_measured_latency_or_the_default(history):
+    estimate = Estimate(history).add("PUT invoices/{id}", 10).add("GET invoices/{id}", 10)
+    estimate.add_listing("invoices", 401, spent=True)
+
+    assert estimate.total == 20
+    assert estimate.spent == {"GET invoices": 3}
+    assert estimate.latency("PUT invoices/{id}") == 0.1
+    assert estimate.latency("GET invoices/{id}") == settings.PLANNER_DEFAULT_LATENCY
+    assert estimate.seconds(workers=2) == pytest.approx((1 + 10 * settings.PLANNER_DEFAULT_LATENCY) / 2)
+
+
+def test_estimate_is_bound_by_the_rate_limit(history):
+    estimate = Estimate(history).add("PUT invoices/{id}", 120)
+    assert estimate.seconds(workers=8, per_minute=60) == 120
+    assert estimate.calls_per_second(workers=8, per_minute=60) == 1
+
+
+def test_latency_history_folds_in_new_runs(tmp_path):
+    class Metrics:
+        def as_dict(self):
+            return {"PUT invoices/{id}": {"calls": 4, "latency_seconds": {"total": 2.0}}}
+
+    history = LatencyHistory(tmp_path / "latency.json", weight=0.5)
+    history.record(Metrics())
+    history.record(Metrics())
+    assert LatencyHistory(tmp_path / "latency.json").latency("PUT invoices/{id}") == 0.5
+    assert history.latency("GET invoices") is None
+
+
+def test_schedule_reserves_within_the_daily_budget():
+    schedule = Schedule(per_day=50)
+    assert schedule.allows(2, now=NOON)
+    schedule.take(49)
+    assert not schedule.allows(2, now=NOON)
+    assert schedule.allows(1, now=NOON)
+    assert schedule.next_opening(2, now=NOON) == datetime(2026, 1, 6)
+    assert schedule.allows(2, now=NOON + timedelta(days=1))
+
+
+def test_schedule_counts_calls_in_flight_against_what_zoho_reports_left():
+    schedule = Schedule(remaining=lambda: 4)
+    schedule.take(2)
+    schedule.take(2)
+    # Zoho only counts the calls once they are made
+    assert not schedule.allows(1, now=NOON)
+    schedule.release(2)
+    assert schedule.allows(2, now=NOON)
+
+
+def test_schedule_is_capped_by_what_zoho_reports_left():
+    schedule = Schedule(per_day=50, remaining=lambda: 3)
+    assert schedule.left_today(NOON) == 3
+    assert not schedule.allows(4, now=NOON)
+
+
+def test_schedule_window_wrapping_past_midnight():
+    schedule = Schedule(window=(time(22), time(6)))
+    assert schedule.in_window(datetime(2026, 1, 5, 23, 0))
+    assert schedule.in_window(datetime(2026, 1, 5, 5, 0))
+    assert not schedule.in_window(NOON)
+    assert schedule.window_seconds() == 8 * 3600
+
+    # Calls that would run past the end of the window wait for the next one
+    assert schedule.allows(1, seconds=1800, now=datetime(2026, 1, 5, 5, 0))
+    assert not schedule.allows(1, seconds=7200, now=datetime(2026, 1, 5, 5, 0))
+    assert schedule.next_opening(now=NOON) == datetime(2026, 1, 5, 22, 0)
+    # The move does not fit before the window closes at six, so it waits until ten that night
+    assert schedule.next_opening(now=datetime(2026, 1, 5, 5, 0)) == datetime(2026, 1, 5, 22, 0)
+
+
+def test_schedule_next_opening_after_the_budget_is_spent_within_a_window():
+    # The window is open past midnight, when the budget is renewed
+    schedule = Schedule(per_day=10, window=(time(22), time(6)))
+    assert schedule.allows(10, now=datetime(2026, 1, 5, 23, 0))
+    schedule.take(10)
+    assert schedule.next_opening(now=datetime(2026, 1, 5, 23, 0)) == datetime(2026, 1, 6)
+
+    schedule = Schedule(per_day=10, window=(time(9), time(17)))
+    assert schedule.allows(10, now=NOON)
+    schedule.take(10)
+    assert schedule.next_opening(now=NOON) == datetime(2026, 1, 6, 9, 0)
+
+
+def test_schedule_days_split_in_whole_moves():
+    assert Schedule(per_day=50).days(120, calls_per_second=100, step=2, now=NOON) == [50, 50, 20]
+    assert Schedule(per_day=51).days(120, calls_per_second=100, step=2, now=NOON) == [50, 50, 20]
+    assert Schedule(per_day=50, remaining=lambda: 9).days(30, calls_per_second=100, step=2, now=NOON) == [8, 22]
+    assert Schedule().days(0, calls_per_second=1, now=NOON) == [0]
+
+
+def test_schedule_days_start_with_the_next_window():
+    schedule = Schedule(window=(time(22), time(6)))
+    # Nothing runs before the window opens, then eight hours at one call per second each night
+    assert schedule.days(40000, calls_per_second=1, now=NOON) == [0, 28800, 11200]
+
+
+def test_format_duration():
+    assert format_duration(59.2) == "1m 00s"
+    assert format_duration(3725) == "1h 02m"
+
+
+def test_parse_window():
+    assert parse_window("22:00-06:00") == (time(22), time(6))
+    with pytest.raises(ValueError):
+        parse_window("22:00")
+    with pytest.raises(ValueError):
+        parse_window("06:00-06:00")
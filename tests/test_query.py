@@ -0,0 +1,74 @@
+from zoho.managers import InvoiceQuery
+
+
+class Source:
+    """Lists the given invoices whatever the parameters, remembering the last call"""
+
+    def __init__(self, invoices):
+        self.invoices = invoices
+        self.params = None
+        self.fields = None
+
+    def iter_invoices(self, params, per_page=200, concurrency=1, fields=None):
+        self.params = params
+        self.fields = fields
+        return iter(self.invoices)
+
+
+def invoice(number, status="sent"):
+    return {"invoice_number": number, "status": status}
+
+
+def test_filters_the_api_understands_are_sent():
+    query = (
+        InvoiceQuery()
+        .status("paid")
+        .customer("42", name="Acme")
+        .dates("2024-01-01", "2024-01-31")
+        .modified("2024-02-01T00:00:00+0000")
+        .numbers("INV-", "-2024")
+        .sort("invoice_number", descending=True)
+    )
+    assert query.params() == {
+        "status": "paid",
+        "customer_id": "42",
+        "customer_name": "Acme",
+        "date_start": "2024-01-01",
+        "date_end": "2024-01-31",
+        "last_modified_time": "2024-02-01T00:00:00+0000",
+        "invoice_number_startswith": "INV-",
+        "invoice_number_contains": "-2024",
+        "sort_column": "invoice_number",
+        "sort_order": "D",
+    }
+    assert not query.filters_locally
+
+
+def test_several_statuses_are_filtered_locally():
+    source = Source([invoice("INV-1", "sent"), invoice("INV-2", "draft"), invoice("INV-3", "paid")])
+    query = InvoiceQuery(source).status("sent", "paid", None)
+
+    assert [item["invoice_number"] for item in query] == ["INV-1", "INV-3"]
+    assert "status" not in source.params
+
+
+def test_number_range_reads_the_whole_listing():
+    # Sorted as strings, a number of another width comes after numbers past the range
+    numbers = ["INV-000004", "INV-000005", "INV-000011", "INV-7", "X"]
+    source = Source([invoice(number) for number in numbers])
+    query = InvoiceQuery(source).numbers("INV-", None, 5, 10).sort("invoice_number")
+
+    assert [item["invoice_number"] for item in query] == ["INV-000005", "INV-7"]
+    assert source.params == {
+        "invoice_number_startswith": "INV-",
+        "sort_column": "invoice_number",
+        "sort_order": "A",
+    }
+
+
+def test_fields_read_by_local_filters_are_listed():
+    source = Source([])
+    query = InvoiceQuery(source).status("sent", "paid").numbers("INV-", None, 1)
+
+    list(query.iter_invoices(fields=("invoice_id",)))
+    assert source.fields == ["invoice_id", "status", "invoice_number"]
@@ -0,0 +1,43 @@
+import pytest
+
+from zoho.ratelimit import RateLimiter, RateLimitExceeded
+
+
+def test_rate_limiter_waits_for_the_bucket_to_refill():
+    limiter = RateLimiter(per_minute=2)
+    assert limiter.reserve() == 0
+    assert limiter.reserve() == 0
+    assert 0 < limiter.reserve() <= 30
+
+
+def test_rate_limiter_daily_budget():
+    limiter = RateLimiter(per_minute=60, per_day=2)
+    limiter.reserve()
+    limiter.reserve()
+    assert limiter.remaining()["day"] == 0
+    with pytest.raises(RateLimitExceeded):
+        limiter.reserve()
+
+
+def test_rate_limiter_trusts_what_zoho_reports_left():
+    limiter = RateLimiter(per_minute=60, per_day=1)
+    limiter.reserve()
+    limiter.record_success(daily_remaining=5)
+    assert limiter.remaining()["day"] == 5
+    assert limiter.reserve() == 0
+    assert limiter.remaining()["day"] == 4
+
+    limiter.exhaust_daily()
+    with pytest.raises(RateLimitExceeded):
+        limiter.reserve()
+
+
+def test_rate_limiter_backs_off_when_throttled():
+    limiter = RateLimiter(per_minute=600)
+    limiter.throttle(retry_after=5)
+    assert limiter.rate == 5
+    assert 4 < limiter.reserve() <= 5
+    assert limiter.remaining()["throttled"] == 1
+
+    limiter.record_success()
+    assert limiter.rate == 5 + 10 / 20
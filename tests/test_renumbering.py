@@ -0,0 +1,158 @@
+import io
+
+import pytest
+
+from zoho.commands.invoices.report_gaps import InvoiceRenumberer, InvoiceRenumberingPlan
+
+
+class FakeInvoices:
+    """Invoices by ID, refusing a number another invoice still holds like Zoho does"""
+
+    def __init__(self, numbers, failing=()):
+        self.invoices = {
+            invoice_id: {"invoice_id": invoice_id, "invoice_number": number, "date": "2024-01-01"}
+            for invoice_id, number in numbers.items()
+        }
+        # (invoice ID, number) writes that fail
+        self.failing = set(failing)
+        self.calls = []
+
+    def numbers(self):
+        return {invoice_id: invoice["invoice_number"] for invoice_id, invoice in self.invoices.items()}
+
+    def get(self, invoice_id):
+        self.calls.append("GET")
+        return dict(self.invoices[invoice_id])
+
+    def update(self, record, params=None, changed=None):
+        return self.update_fields(record["invoice_id"], {"invoice_number": record["invoice_number"]}, params)
+
+    def update_fields(self, invoice_id, fields, params=None):
+        self.calls.append("PUT")
+        number = fields["invoice_number"]
+        if (invoice_id, number) in self.failing:
+            return None
+        holders = {invoice["invoice_number"]: other for other, invoice in self.invoices.items()}
+        if holders.get(number, invoice_id) != invoice_id:
+            raise AssertionError(f"{number} is still held by {holders[number]}")
+        self.invoices[invoice_id]["invoice_number"] = number
+        return dict(self.invoices[invoice_id])
+
+
+def renumberer(moves, failing=(), **kwargs):
+    """A renumberer with a plan moving the invoice with ID and number ``old`` to each ``new`` value"""
+    invoices = FakeInvoices({str(old): f"INV-{old:06d}" for old in moves}, failing)
+    renumberer = InvoiceRenumberer(invoices, 1, "INV-", "", None, None, output=io.StringIO(), **kwargs)
+    renumberer.renumbering_plan = []
+    for old, new in moves.items():
+        plan = InvoiceRenumberingPlan(invoices.get(str(old)), "INV-", "")
+        plan.new_numeric_index = new
+        renumberer.renumbering_plan.append(plan)
+    invoices.calls.clear()
+    return renumberer, invoices
+
+
+def chain(plan, dependents):
+    moves = []
+    while plan is not None:
+        moves.append((plan.invoice_id, plan.new_number))
+        plan = dependents.get(plan)
+    return moves
+
+
+def test_chains_wait_for_the_holder_of_each_number():
+    renumber, _ = renumberer({2: 1, 3: 2, 5: 3, 6: 4})
+    ready, dependents = renumber._chains()
+    assert [chain(plan, dependents) for plan in ready] == [
+        [("2", "INV-000001"), ("3", "INV-000002"), ("5", "INV-000003")],
+        [("6", "INV-000004")],
+    ]
+    assert renumber.critical_path() == 3
+
+
+def test_chains_park_one_invoice_of_each_cycle():
+    renumber, _ = renumberer({1: 2, 2: 3, 3: 1, 4: 5, 5: 4})
+    ready, dependents = renumber._chains()
+    assert [plan.temporary_number for plan in ready] == ["TMP-1", "TMP-4"]
+    assert chain(ready[0], dependents) == [
+        ("1", "TMP-1"),
+        ("3", "INV-000001"),
+        ("2", "INV-000003"),
+        ("1", "INV-000002"),
+    ]
+    assert chain(ready[1], dependents) == [("4", "TMP-4"), ("5", "INV-000004"), ("4", "INV-000005")]
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+@pytest.mark.parametrize("minimal", [False, True])
+def test_renumber_swaps_through_temporary_numbers(workers, minimal):
+    renumber, invoices = renumberer({1: 2, 2: 3, 3: 1, 5: 4, 6: 5}, workers=workers, minimal=minimal, two_phase="off")
+    renumber._renumber()
+
+    assert invoices.numbers() == {
+        "1": "INV-000002",
+        "2": "INV-000003",
+        "3": "INV-000001",
+        "5": "INV-000004",
+        "6": "INV-000005",
+    }
+    assert renumber.renumbered_count == 5
+    assert renumber.errors == []
+    assert invoices.calls.count("PUT") == 6
+
+
+def test_failed_move_skips_the_rest_of_its_chain():
+    renumber, invoices = renumberer({2: 1, 3: 2, 4: 3}, failing={("2", "INV-000001")}, minimal=True)
+    renumber._renumber()
+
+    assert invoices.numbers() == {"2": "INV-000002", "3": "INV-000003", "4": "INV-000004"}
+    assert renumber.renumbered_count == 0
+    assert renumber.errors[-2:] == [
+        "Skipped INV-000003: INV-000002 is still in use",
+        "Skipped INV-000004: INV-000003 is still in use",
+    ]
+
+
+def test_two_phases_when_one_chain_dominates():
+    moves = {old: old - 1 for old in range(2, 42)}
+    renumber, invoices = renumberer(moves, workers=8)
+    assert renumber.critical_path() == 40
+    assert renumber.two_phases()
+    # Every invoice but the first and the last of the chain is parked
+    assert len(renumber.parks()) == 38
+
+    renumber._renumber()
+    assert sorted(invoices.numbers().values()) == [f"INV-{value:06d}" for value in range(1, 41)]
+    assert renumber.errors == []
+    # Parked invoices are not fetched again for their final number
+    assert invoices.calls.count("GET") == 40
+    assert invoices.calls.count("PUT") == 40 + 38
+
+
+def test_two_phases_not_worth_it_for_short_chains():
+    renumber, _ = renumberer({2: 1, 3: 2, 5: 4, 7: 6, 9: 8}, workers=2)
+    assert not renumber.two_phases()
+    renumber.two_phase = "on"
+    assert renumber.two_phases()
+    renumber.workers = 1
+    assert not renumber.two_phases()
+
+
+def test_two_phases_failed_park_goes_first():
+    renumber, invoices = renumberer(
+        {2: 1, 3: 2, 4: 3, 5: 4}, failing={("3", "TMP-3")}, minimal=True, workers=4, two_phase="on"
+    )
+    renumber._renumber()
+
+    assert sorted(invoices.numbers().values()) == [f"INV-{value:06d}" for value in range(1, 5)]
+    assert renumber.renumbered_count == 4
+
+
+def test_two_phases_report_invoices_left_parked():
+    renumber, invoices = renumberer(
+        {2: 1, 3: 2, 4: 3}, failing={("2", "INV-000001")}, minimal=True, workers=4, two_phase="on"
+    )
+    renumber._renumber()
+
+    assert invoices.numbers()["3"] == "TMP-3"
+    assert renumber.errors[-1] == "1 invoices left on temporary numbers, finish with --resume"
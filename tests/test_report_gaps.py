@@ -0,0 +1,116 @@
+"""
+report-gaps --fix and --resume end to end, against the offline Zoho Books stand-in
+"""
+
+import pytest
+
+from benchmarks.fake_zoho import FakeZoho
+
+
+@pytest.fixture
+def serve(zoho_cli):
+    """Serve a FakeZoho organization, returning a function running report-gaps against it"""
+
+    def start(zoho):
+        run = zoho_cli(zoho)
+
+        def invoke(*args, exit_code=0):
+            return run("invoices", "report-gaps", "--prefix", "INV-", *args, exit_code=exit_code).output
+
+        return invoke
+
+    return start
+
+
+def invoice_calls(zoho, method):
+    return zoho.count(method, "books/v3/invoices/{id}")
+
+
+def gap_free(zoho):
+    numbers = zoho.numbers()
+    return numbers == list(range(1, len(numbers) + 1))
+
+
+def out_of_place(zoho):
+    """Invoices a sequential renumbering from 1 moves"""
+    return sum(1 for value, number in enumerate(zoho.numbers(), 1) if value != number)
+
+
+def test_dry_run_changes_nothing(serve):
+    zoho = FakeZoho(50, gap_every=10)
+    moves = out_of_place(zoho)
+    output = serve(zoho)()
+
+    assert f"Estimated API calls: {2 * moves} ({moves} GET, {moves} PUT)" in output
+    assert invoice_calls(zoho, "PUT") == 0
+    assert not gap_free(zoho)
+
+
+@pytest.mark.parametrize("options", [[], ["--workers", "4"], ["--minimal", "--workers", "4"]])
+def test_fix_closes_every_gap(serve, options):
+    zoho = FakeZoho(60, gap_every=7)
+    moves = out_of_place(zoho)
+    output = serve(zoho)("--fix", *options)
+
+    assert f"Successfully renumbered {moves} invoices" in output
+    assert gap_free(zoho)
+
+
+def test_fix_swaps_invoices_into_date_order(serve):
+    zoho = FakeZoho(30)
+    dates = sorted(invoice["date"] for invoice in zoho.invoices.values())
+    for invoice, date in zip(sorted(zoho.invoices.values(), key=lambda invoice: invoice["date"]), reversed(dates)):
+        invoice["date"] = date
+    serve(zoho)("--fix", "--strategy", "date", "--workers", "4", "--two-phase", "off")
+
+    ordered = sorted(zoho.invoices.values(), key=lambda invoice: invoice["invoice_number"])
+    assert [invoice["date"] for invoice in ordered] == dates
+    assert gap_free(zoho)
+
+
+def test_fix_in_two_phases(serve):
+    zoho = FakeZoho(40)
+    del zoho.invoices[zoho.invoice_ids_by_number.pop("INV-000001")]
+    output = serve(zoho)("--fix", "--workers", "4")
+
+    assert "Longest chain: 39 moves, renumbering in two phases with 37 invoices parked" in output
+    assert gap_free(zoho)
+
+
+@pytest.mark.parametrize("options", [[], ["--minimal", "--workers", "4"], ["--workers", "4", "--two-phase", "on"]])
+def test_resume_after_the_daily_budget_ran_out(serve, options):
+    zoho = FakeZoho(60, gap_every=5)
+    invoke = serve(zoho)
+
+    output = invoke("--fix", "--daily-budget", "20", *options)
+    assert "Stopped within the API budget" in output
+    assert 0 < invoice_calls(zoho, "GET") + invoice_calls(zoho, "PUT") <= 20
+    assert not gap_free(zoho)
+
+    output = invoke("--resume", *options)
+    assert "Resuming job started" in output
+    assert gap_free(zoho)
+    assert not any(number.startswith("TMP-") for number in zoho.invoice_ids_by_number)
+
+
+def test_fix_refuses_to_strand_invoices_parked_by_an_unfinished_job(serve):
+    zoho = FakeZoho(40)
+    del zoho.invoices[zoho.invoice_ids_by_number.pop("INV-000001")]
+    invoke = serve(zoho)
+
+    output = invoke("--fix", "--workers", "4", "--two-phase", "on", "--daily-budget", "60")
+    assert "Stopped within the API budget" in output
+    parked = [number for number in zoho.invoice_ids_by_number if number.startswith("TMP-")]
+    assert parked
+
+    output = invoke("--fix", exit_code=1)
+    assert "is unfinished" in output and "--resume" in output
+    assert invoice_calls(zoho, "PUT") <= 60
+
+    # Starting over renumbers the parked invoices too, back into the places they had
+    output = invoke("--fix", "--workers", "4", "--discard-journal")
+    assert f"{len(parked)} invoices of the series are parked on temporary numbers" in output
+    assert gap_free(zoho)
+    assert not any(number.startswith("TMP-") for number in zoho.invoice_ids_by_number)
+    ordered = sorted(zoho.invoices.values(), key=lambda invoice: invoice["invoice_number"])
+    assert [invoice["date"] for invoice in ordered] == sorted(invoice["date"] for invoice in ordered)
@@ -0,0 +1,23 @@
+import requests
+
+from zoho.retry import RetryPolicy
+
+
+def test_retry_delay_is_jittered_within_the_backoff(monkeypatch):
+    policy = RetryPolicy(backoff=0.5, max_backoff=3.0)
+    monkeypatch.setattr("random.uniform", lambda low, high: high)
+    assert [policy.delay(attempt) for attempt in range(1, 5)] == [1.0, 2.0, 3.0, 3.0]
+
+
+def test_retry_replays_only_what_is_safe():
+    policy = RetryPolicy()
+    assert policy.is_retryable_status(503)
+    assert not policy.is_retryable_status(400)
+    assert not policy.is_retryable_status(429)
+
+    assert policy.can_replay("POST", sent=False)
+    assert not policy.can_replay("POST", sent=True)
+    assert policy.can_replay("PUT", sent=True)
+
+    assert not RetryPolicy.was_sent(requests.ConnectTimeout())
+    assert RetryPolicy.was_sent(requests.ReadTimeout())
@@ -0,0 +1,56 @@
+import json
+
+from benchmarks.fake_zoho import FakeZoho
+from zoho.token_cache import TokenCache
+
+
+def test_tokens_are_kept_until_they_expire(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("zoho.token_cache.time.time", lambda: now[0])
+    cache = TokenCache(tmp_path / "tokens.json")
+    cache.set(TokenCache.key("client", "1"), "token", 3600)
+
+    assert TokenCache(tmp_path / "tokens.json").get("client:1")["access_token"] == "token"
+    assert cache.get("client:1", margin=300) is not None
+    now[0] += 3400
+    assert cache.get("client:1") is not None
+    assert cache.get("client:1", margin=300) is None
+
+
+def test_expired_tokens_are_dropped_when_the_file_is_rewritten(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("zoho.token_cache.time.time", lambda: now[0])
+    cache = TokenCache(tmp_path / "tokens.json")
+    cache.set("client:1", "first", 60)
+    now[0] += 120
+    cache.set("client:2", "second", 60)
+
+    assert list(json.loads((tmp_path / "tokens.json").read_text())) == ["client:2"]
+    cache.delete("client:2")
+    assert cache.get("client:2") is None
+
+
+def test_an_unreadable_file_is_treated_as_empty(tmp_path):
+    (tmp_path / "tokens.json").write_text('{"client:1": ')
+    cache = TokenCache(tmp_path / "tokens.json")
+    assert cache.get("client:1") is None
+    cache.set("client:1", "token", 60)
+    assert cache.get("client:1")["access_token"] == "token"
+
+
+def test_runs_reuse_the_token_of_an_earlier_run(zoho_cli):
+    zoho = FakeZoho(10)
+    run = zoho_cli(zoho)
+    run("invoices", "list")
+    run("invoices", "list")
+    assert zoho.count("POST", "oauth/v2/token") == 1
+
+
+def test_a_rejected_token_is_replaced(zoho_cli, tmp_path):
+    zoho = FakeZoho(10)
+    run = zoho_cli(zoho)
+    TokenCache(tmp_path / "tokens.json").set(TokenCache.key("test", zoho.org_id), "revoked", 3600)
+
+    assert "Found 10 invoices" in run("invoices", "list").output
+    assert zoho.count("POST", "oauth/v2/token") == 1
+    assert TokenCache(tmp_path / "tokens.json").get("test:1")["access_token"] != "revoked"
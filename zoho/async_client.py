@@ -0,0 +1,166 @@
+"""
+Asyncio counterpart of the Zoho Books API client
+"""
+
+import asyncio
+import time
+
+from .client import InvalidResponse, client as default_client
+from .settings import settings
+
+
+class AsyncClient:
+    """Asyncio Zoho Books API client built on httpx.
+
+    Authentication, rate limiting, retry policy and error tracking are shared with the wrapped
+    synchronous Client, so both can be used side by side against the same token and quotas.
+    """
+
+    def __init__(self, client=None, max_connections=None, max_keepalive_connections=None):
+        self.client = client or default_client
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self._session = None
+
+    @property
+    def errors(self):
+        return self.client.errors
+
+    @property
+    def session(self):
+        """httpx connection pool, created on first use inside the running event loop"""
+        if self._session is None:
+            try:
+                import httpx
+            except ImportError as e:
+                raise ImportError("AsyncClient requires httpx (poetry install --extras async)") from e
+
+            limits = httpx.Limits(
+                max_connections=self.max_connections or settings.ASYNC_MAX_CONNECTIONS,
+                max_keepalive_connections=self.max_keepalive_connections or self.client.pool_maxsize,
+            )
+            # httpx asks for gzip and deflate by default, and for brotli when it can decode it
+            headers = None if settings.HTTP_COMPRESSION else {"Accept-Encoding": "identity"}
+            self._session = httpx.AsyncClient(limits=limits, timeout=self.client.timeout, headers=headers)
+        return self._session
+
+    async def aclose(self):
+        """Close pooled connections"""
+        if self._session is not None:
+            await self._session.aclose()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def _ensure_access_token(self):
+        # Token refreshes are rare and go through the sync client's lock and on-disk cache
+        if not self.client.token_is_fresh():
+            await asyncio.to_thread(self.client.ensure_access_token)
+
+    async def _acquire(self):
+        while True:
+            wait = self.client.rate_limiter.reserve()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    async def _make_request(self, method, endpoint, params=None, json_data=None, verify=None):
+        """Make API request with error handling, see Client._make_request.
+
+        ``verify`` may be a coroutine function.
+        """
+        import httpx
+
+        await self._ensure_access_token()
+        params, cached, headers, response_json = self.client.start_request(method, endpoint, params)
+        if response_json is not None:
+            return response_json
+
+        attempt = 1
+        while True:
+            try:
+                response = await self._send(method, endpoint, params, json_data, headers)
+                revalidated = self.client.revalidated(endpoint, params, cached, response)
+                if revalidated is not None:
+                    return revalidated
+                response_json = self.client.decode(response.content)
+                if not self.client.retry_policy.is_retryable_status(response.status_code):
+                    break
+                error = httpx.HTTPStatusError(
+                    f"HTTP {response.status_code}", request=response.request, response=response
+                )
+            except (httpx.TransportError, InvalidResponse) as e:
+                response_json = None
+                error = e
+
+            sent = not isinstance(error, httpx.ConnectTimeout)
+            if sent and verify is not None:
+                verified = verify()
+                if asyncio.iscoroutine(verified):
+                    verified = await verified
+                if verified is not None:
+                    return verified
+
+            delay = self.client.retry_delay(method, endpoint, attempt, error, sent)
+            if delay is None:
+                if response_json is None:
+                    raise error
+                break
+            await asyncio.sleep(delay)
+            attempt += 1
+
+        return self.client.finish_request(method, endpoint, params, response, response_json)
+
+    async def _send(self, method, endpoint, params, json_data, headers=None):
+        """Send a request, waiting out throttling and re-authenticating once if the token was rejected"""
+        import httpx
+
+        url = f"{settings.BOOKS_BASE_URL}/{endpoint}"
+        reauthenticated = False
+        for _ in range(settings.RATE_LIMIT_MAX_WAITS):
+            await self._ensure_access_token()
+            access_token = self.client.access_token
+
+            await self._acquire()
+            request_headers = {**self.client.headers, **(headers or {})}
+            started = time.perf_counter()
+            try:
+                response = await self.session.request(
+                    method, url, params=params, json=json_data, headers=request_headers
+                )
+            except httpx.HTTPError:
+                self.client.record_request(method, endpoint, started)
+                raise
+            self.client.record_request(method, endpoint, started, response, len(response.request.content))
+
+            action = self.client.response_action(method, endpoint, response, reauthenticated)
+            if action is None:
+                break
+            if action == "reauthenticate":
+                reauthenticated = True
+                await asyncio.to_thread(self.client.invalidate_access_token, access_token)
+
+        return response
+
+    async def get(self, endpoint, params=None):
+        """Make GET request"""
+        return await self._make_request("GET", endpoint, params=params)
+
+    async def post(self, endpoint, json_data, params=None, verify=None):
+        """Make POST request"""
+        return await self._make_request("POST", endpoint, params=params, json_data=json_data, verify=verify)
+
+    async def put(self, endpoint, json_data, params=None, verify=None):
+        """Make PUT request"""
+        return await self._make_request("PUT", endpoint, params=params, json_data=json_data, verify=verify)
+
+    async def delete(self, endpoint, params=None, verify=None):
+        """Make DELETE request"""
+        return await self._make_request("DELETE", endpoint, params=params, verify=verify)
+
+
+async_client = AsyncClient()
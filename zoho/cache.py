@@ -0,0 +1,132 @@
+"""
+Response cache for read-only Zoho Books API endpoints
+"""
+
+import hashlib
+import json
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+from pathlib import Path
+from urllib.parse import urlencode
+
+from .files import write_json
+
+
+class ResponseCache:
+    """Two-tier cache of GET responses: an in-memory LRU backed by an optional directory on disk.
+
+    Entries expire after a TTL chosen by the first pattern in ``ttls`` matching the endpoint.
+    Expired entries that carried an ETag or Last-Modified header are kept so the request can be
+    revalidated with If-None-Match / If-Modified-Since instead of downloaded again.
+    """
+
+    def __init__(self, ttls=None, default_ttl=60, max_entries=1024, directory=None):
+        self.ttls = ttls or {}
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.directory = Path(directory).expanduser() if directory else None
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def ttl(self, endpoint):
+        for pattern, ttl in self.ttls.items():
+            if fnmatchcase(endpoint, pattern):
+                return ttl
+        return self.default_ttl
+
+    @staticmethod
+    def key(endpoint, params):
+        return (endpoint, urlencode(sorted((params or {}).items())))
+
+    def _path(self, key):
+        endpoint, query = key
+        # One directory per endpoint so that invalidation can drop every query of it at once
+        folder = hashlib.sha256(endpoint.encode()).hexdigest()[:32]
+        return self.directory / folder / (hashlib.sha256(query.encode()).hexdigest()[:32] + ".json")
+
+    def get(self, endpoint, params):
+        """The cached entry, fresh or not, or None"""
+        key = self.key(endpoint, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is None and self.directory is not None:
+            try:
+                with open(self._path(key), encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                entry = None
+            if entry is not None:
+                self._remember(key, entry)
+
+        if entry is not None and (self.is_fresh(entry) or self.can_revalidate(entry)):
+            return entry
+        return None
+
+    @staticmethod
+    def is_fresh(entry):
+        return entry["expires_at"] > time.time()
+
+    @staticmethod
+    def can_revalidate(entry):
+        return bool(entry.get("etag") or entry.get("last_modified"))
+
+    @staticmethod
+    def conditional_headers(entry):
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def set(self, endpoint, params, response, etag=None, last_modified=None):
+        key = self.key(endpoint, params)
+        entry = {
+            "response": response,
+            "expires_at": time.time() + self.ttl(endpoint),
+            "etag": etag,
+            "last_modified": last_modified,
+        }
+        self._remember(key, entry)
+        self._store(key, entry)
+
+    def refresh(self, endpoint, params, entry):
+        """Extend an entry the server confirmed as unchanged"""
+        self.revalidated += 1
+        self.set(endpoint, params, entry["response"], entry.get("etag"), entry.get("last_modified"))
+
+    def invalidate(self, endpoint):
+        """Drop every cached query of an endpoint"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == endpoint]:
+                del self._entries[key]
+
+        if self.directory is not None:
+            shutil.rmtree(self._path((endpoint, "")).parent, ignore_errors=True)
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _store(self, key, entry):
+        if self.directory is None:
+            return
+
+        try:
+            write_json(self._path(key), entry, prefix=".entry-")
+        except OSError:
+            # The disk tier is best effort, the entry is still kept in memory
+            pass
@@ -1,68 +1,411 @@
-import requests
+import threading
+import time
 
+import click
+
+from .codec import get_loads
+from .metrics import Metrics
+from .ratelimit import RateLimiter
+from .retry import RetryPolicy
 from .settings import settings
+from .token_cache import TokenCache
+
+
+class InvalidResponse(ValueError):
+    """A response body that is not valid JSON, such as one cut off in transit"""
+
+
+def transferred_size(response):
+    """Size of a response body as it came over the wire, compressed or not"""
+    length = response.headers.get("Content-Length")
+    return int(length) if length and length.isdigit() else len(response.content)
 
 
 class Client:
     """Base Zoho Books API client with authentication and common operations"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        pool_connections=None,
+        pool_maxsize=None,
+        pool_block=None,
+        timeout=None,
+        rate_limit_per_minute=None,
+        rate_limit_per_day=None,
+        retry_policy=None,
+        token_cache=None,
+        cache=None,
+        org_id=None,
+    ):
+        # Organization this client works on, settings.org_id unless given
+        self.org_id = org_id
         # Use provided credentials or load from settings
         # Initialize access_token as None, will be set when needed
         self.access_token = None
+        self.token_expires_at = None
         self.headers = {}
         self.errors = {}
+        self.token_cache = token_cache or TokenCache(settings.TOKEN_CACHE_FILE)
+        self._token_lock = threading.Lock()
+        # Optional ResponseCache for GET requests
+        self.cache = cache
+
+        # Callables notified of every request, retry, throttling and cache hit as hook(event, data)
+        self.metrics = Metrics()
+        self.hooks = [self.metrics]
+        # Clients made by fanout.fan_out for other organizations, by organization ID
+        self.org_clients = {}
+
+        # Transport settings, the session itself is created on first use
+        self.pool_connections = pool_connections or settings.HTTP_POOL_CONNECTIONS
+        self.pool_maxsize = pool_maxsize or settings.HTTP_POOL_MAXSIZE
+        self.pool_block = settings.HTTP_POOL_BLOCK if pool_block is None else pool_block
+        self.timeout = timeout or settings.HTTP_TIMEOUT
+        self._session = None
+        self._loads = None
+
+        # Rate limits are read when the first request is made, after the CLI options were applied
+        self.rate_limit_per_minute = rate_limit_per_minute
+        self.rate_limit_per_day = rate_limit_per_day
+        self._rate_limiter = None
+        self._lock = threading.Lock()
+
+        self.retry_policy = retry_policy or RetryPolicy(
+            settings.RETRY_MAX_ATTEMPTS, settings.RETRY_BACKOFF, settings.RETRY_MAX_BACKOFF
+        )
+
+    @property
+    def session(self):
+        """Pooled keep-alive session shared by every request made through this client"""
+        if self._session is None:
+            # requests is imported on first use, which keeps CLI startup fast
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            adapter = HTTPAdapter(
+                pool_connections=self.pool_connections,
+                pool_maxsize=self.pool_maxsize,
+                pool_block=self.pool_block,
+            )
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            # requests already asks for gzip and deflate, and for brotli when it can decode it
+            if not settings.HTTP_COMPRESSION:
+                session.headers["Accept-Encoding"] = "identity"
+            self._session = session
+        return self._session
+
+    @property
+    def rate_limiter(self):
+        """Token bucket shared by every thread using this client"""
+        if self._rate_limiter is None:
+            with self._lock:
+                if self._rate_limiter is None:
+                    self._rate_limiter = RateLimiter(
+                        self.rate_limit_per_minute or settings.RATE_LIMIT_PER_MINUTE,
+                        self.rate_limit_per_day or settings.RATE_LIMIT_PER_DAY,
+                    )
+        return self._rate_limiter
+
+    def decode(self, body):
+        """Decode a JSON response body with the configured decoder"""
+        if self._loads is None:
+            self._loads = get_loads(settings.JSON_DECODER)
+        try:
+            return self._loads(body)
+        except ValueError as e:
+            raise InvalidResponse(f"Invalid JSON response: {e}") from e
+
+    def api_budget(self):
+        """Remaining API budget, or None if no request has been made"""
+        if self._rate_limiter is None:
+            return None
+        return self._rate_limiter.remaining()
+
+    def close(self):
+        """Close pooled connections"""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
 
-    def _ensure_access_token(self):
-        """Ensure access token is available"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def organization_id(self):
+        return self.org_id or settings.org_id
+
+    def token_is_fresh(self):
         if not self.access_token:
-            self.access_token = self._get_access_token()
+            return False
+        # Tokens assigned by hand carry no expiry and are trusted as is
+        return self.token_expires_at is None or time.time() < self.token_expires_at - settings.TOKEN_REFRESH_MARGIN
+
+    def ensure_access_token(self):
+        """Ensure an access token is available, refreshing it shortly before it expires"""
+        if self.token_is_fresh():
+            return
+
+        with self._token_lock:
+            # Another thread may have refreshed the token while we waited
+            if self.token_is_fresh():
+                return
+
+            key = TokenCache.key(settings.client_id, self.organization_id)
+            token = self.token_cache.get(key, margin=settings.TOKEN_REFRESH_MARGIN)
+            if token is None:
+                token_data = self._get_access_token()
+                token = self.token_cache.set(key, token_data["access_token"], token_data["expires_in"])
+
+            self.access_token = token["access_token"]
+            self.token_expires_at = token["expires_at"]
             self.headers = {
                 "Authorization": f"Zoho-oauthtoken {self.access_token}",
                 "content-type": "application/json",
             }
 
+    def invalidate_access_token(self, access_token):
+        """Forget a token Zoho rejected, unless another thread already replaced it"""
+        with self._token_lock:
+            if self.access_token != access_token:
+                return
+            self.access_token = None
+            self.token_cache.delete(TokenCache.key(settings.client_id, self.organization_id))
+
     def _get_access_token(self):
         """Get access token using Self Client credentials flow"""
         if not settings.client_id or not settings.client_secret:
             raise ValueError("Client ID and Client Secret are required for Self Client flow")
 
-        token_data = self.get_self_client_access_token(
+        return self.get_self_client_access_token(
             settings.client_id,
             settings.client_secret,
-            soid=f"ZohoBooks.{settings.org_id}" if settings.org_id else None,
+            soid=f"ZohoBooks.{self.organization_id}" if self.organization_id else None,
         )
-        return token_data["access_token"]
 
-    def _make_request(self, method, endpoint, params=None, json_data=None):
-        """Make API request with error handling"""
-        self._ensure_access_token()
-        url = f"{settings.BOOKS_BASE_URL}/{endpoint}"
+    def _make_request(self, method, endpoint, params=None, json_data=None, verify=None):
+        """Make API request with error handling.
+
+        Transient failures are retried according to the retry policy. If a failed attempt may
+        have been applied, ``verify`` is called first and its result returned when it is not None.
+        """
+        import requests
+
+        self.ensure_access_token()
+        params, cached, headers, response_json = self.start_request(method, endpoint, params)
+        if response_json is not None:
+            return response_json
+
+        attempt = 1
+        while True:
+            try:
+                response = self._send(method, endpoint, params, json_data, headers)
+                revalidated = self.revalidated(endpoint, params, cached, response)
+                if revalidated is not None:
+                    return revalidated
+                response_json = self.decode(response.content)
+                if not self.retry_policy.is_retryable_status(response.status_code):
+                    break
+                error = requests.HTTPError(f"HTTP {response.status_code}", response=response)
+            except (requests.ConnectionError, requests.Timeout, InvalidResponse) as e:
+                response_json = None
+                error = e
+
+            sent = self.retry_policy.was_sent(error)
+            if sent and verify is not None:
+                verified = verify()
+                if verified is not None:
+                    return verified
+
+            delay = self.retry_delay(method, endpoint, attempt, error, sent)
+            if delay is None:
+                if response_json is None:
+                    raise error
+                break
+            time.sleep(delay)
+            attempt += 1
+
+        return self.finish_request(method, endpoint, params, response, response_json)
+
+    # The steps of a request shared by Client and AsyncClient, which only differ in how requests
+    # are sent and how they wait
+
+    def start_request(self, method, endpoint, params):
+        """Add the organization to ``params`` and look the request up in the cache.
+
+        Returns the parameters, the cache entry the server may revalidate, the conditional
+        headers to send, and the cached response when it is fresh enough to be used as is.
+        """
         params = params or {}
-        params["organization_id"] = settings.org_id
+        params["organization_id"] = self.organization_id
+
+        cached = self._cached(method, endpoint, params)
+        if cached is not None and self.cache.is_fresh(cached):
+            self._emit("cache_hit", method=method, endpoint=endpoint)
+            return params, cached, None, cached["response"]
+        headers = self.cache.conditional_headers(cached) if cached is not None else None
+        return params, cached, headers, None
 
-        response = requests.request(method, url, params=params, json=json_data, headers=self.headers, timeout=30)
-        response_json = response.json()
+    def revalidated(self, endpoint, params, cached, response):
+        """The cached response when the server confirmed it is still current, otherwise None"""
+        if response.status_code == 304 and cached is not None:
+            self.cache.refresh(endpoint, params, cached)
+            return cached["response"]
+        return None
 
+    def retry_delay(self, method, endpoint, attempt, error, sent):
+        """Seconds to wait before repeating a failed attempt, or None when it must not be repeated"""
+        if attempt >= self.retry_policy.max_attempts or not self.retry_policy.can_replay(method, sent):
+            return None
+
+        delay = self.retry_policy.delay(attempt)
+        click.echo(f"{method} {endpoint} failed ({error}), retrying in {delay:.1f}s", err=True)
+        self._emit("retry", method=method, endpoint=endpoint, attempt=attempt, error=str(error))
+        return delay
+
+    def finish_request(self, method, endpoint, params, response, response_json):
+        """Track an error reported by Zoho, or keep a successful response in the cache"""
         if response_json.get("code", 0) != 0:
             self._handle_error(response_json)
-
+        else:
+            self._update_cache(method, endpoint, params, response, response_json)
         return response_json
 
+    def record_request(self, method, endpoint, started, response=None, bytes_out=0):
+        """Notify the hooks of a request sent at ``started``, without a response if it failed in transit"""
+        self._emit(
+            "request",
+            method=method,
+            endpoint=endpoint,
+            status=response.status_code if response is not None else None,
+            elapsed=time.perf_counter() - started,
+            bytes_out=bytes_out,
+            bytes_in=transferred_size(response) if response is not None else 0,
+        )
+
+    def response_action(self, method, endpoint, response, reauthenticated):
+        """How a request continues after a response: "reauthenticate" the first time the token
+        is rejected, "repeat" when Zoho throttled it, or None when the response is final"""
+        if response.status_code == 401 and not reauthenticated:
+            return "reauthenticate"
+        if self._is_throttled(response):
+            self._emit("throttle", method=method, endpoint=endpoint)
+            return "repeat"
+        return None
+
+    def _cached(self, method, endpoint, params):
+        """Cache entry usable for this request, fresh or needing revalidation"""
+        if self.cache is None:
+            return None
+
+        if method != "GET":
+            # Drop stale entries up front, so that verifying a failed write reads from the server
+            self._invalidate_cache(endpoint)
+            return None
+
+        entry = self.cache.get(endpoint, params)
+        if entry is not None and self.cache.is_fresh(entry):
+            self.cache.hits += 1
+        else:
+            self.cache.misses += 1
+        return entry
+
+    def _update_cache(self, method, endpoint, params, response, response_json):
+        if self.cache is None:
+            return
+
+        if method == "GET":
+            self.cache.set(
+                endpoint,
+                params,
+                response_json,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+            return
+
+        self._invalidate_cache(endpoint)
+
+    def _invalidate_cache(self, endpoint):
+        """Writes make the resource and the listing it appears in stale"""
+        self.cache.invalidate(endpoint)
+        if "/" in endpoint:
+            self.cache.invalidate(endpoint.rsplit("/", 1)[0])
+
+    def _emit(self, event, **data):
+        for hook in self.hooks:
+            hook(event, data)
+
+    def _send(self, method, endpoint, params, json_data, headers=None):
+        """Send a request, waiting out throttling and re-authenticating once if the token was rejected"""
+        import requests
+
+        url = f"{settings.BOOKS_BASE_URL}/{endpoint}"
+        reauthenticated = False
+        for _ in range(settings.RATE_LIMIT_MAX_WAITS):
+            self.ensure_access_token()
+            access_token = self.access_token
+
+            self.rate_limiter.acquire()
+            request_headers = {**self.headers, **(headers or {})}
+            started = time.perf_counter()
+            try:
+                response = self.session.request(
+                    method, url, params=params, json=json_data, headers=request_headers, timeout=self.timeout
+                )
+            except requests.RequestException:
+                self.record_request(method, endpoint, started)
+                raise
+            self.record_request(method, endpoint, started, response, len(response.request.body or b""))
+
+            action = self.response_action(method, endpoint, response, reauthenticated)
+            if action is None:
+                break
+            if action == "reauthenticate":
+                reauthenticated = True
+                self.invalidate_access_token(access_token)
+
+        return response
+
+    def _is_throttled(self, response):
+        """Feed the rate limiter from the response and tell whether the call must be repeated"""
+        daily_remaining = response.headers.get("X-Rate-Limit-Remaining")
+        daily_remaining = int(daily_remaining) if daily_remaining and daily_remaining.isdigit() else None
+
+        if response.status_code != 429:
+            self.rate_limiter.record_success(daily_remaining)
+            return False
+
+        if daily_remaining == 0:
+            self.rate_limiter.exhaust_daily()
+            return False
+
+        retry_after = response.headers.get("Retry-After")
+        retry_after = int(retry_after) if retry_after and retry_after.isdigit() else None
+        self.rate_limiter.throttle(retry_after)
+        # Status goes to stderr, keeping stdout for the output of commands
+        click.echo(f"Throttled by Zoho, waiting {retry_after or 60}s", err=True)
+        return True
+
     def _handle_error(self, response_json):
         """Handle API errors"""
         error_code = response_json.get("code")
         error_message = response_json.get("message", "Unknown error")
 
-        if error_code not in self.errors:
-            self.errors[error_code] = {
-                "error": error_message,
-                "items": [],
-            }
+        with self._lock:
+            if error_code not in self.errors:
+                self.errors[error_code] = {
+                    "error": error_message,
+                    "items": [],
+                }
 
-        # Add context to error tracking
-        if "name" in response_json:
-            self.errors[error_code]["items"].append(response_json["name"])
+            # Add context to error tracking
+            if "name" in response_json:
+                self.errors[error_code]["items"].append(response_json["name"])
 
         print(f"Error {error_code}: {error_message}")
 
@@ -70,21 +413,21 @@ class Client:
         """Make GET request"""
         return self._make_request("GET", endpoint, params=params)
 
-    def post(self, endpoint, json_data, params=None):
+    def post(self, endpoint, json_data, params=None, verify=None):
         """Make POST request"""
-        return self._make_request("POST", endpoint, params=params, json_data=json_data)
+        return self._make_request("POST", endpoint, params=params, json_data=json_data, verify=verify)
 
-    def put(self, endpoint, json_data, params=None):
+    def put(self, endpoint, json_data, params=None, verify=None):
         """Make PUT request"""
-        return self._make_request("PUT", endpoint, params=params, json_data=json_data)
+        return self._make_request("PUT", endpoint, params=params, json_data=json_data, verify=verify)
 
-    def delete(self, endpoint, params=None):
+    def delete(self, endpoint, params=None, verify=None):
         """Make DELETE request"""
-        return self._make_request("DELETE", endpoint, params=params)
+        return self._make_request("DELETE", endpoint, params=params, verify=verify)
 
     def get_self_client_access_token(self, client_id, client_secret, scope="ZohoBooks.fullaccess.all", soid=None):
         """Get access token using Self Client credentials flow"""
-        url = "https://accounts.zoho.com/oauth/v2/token"
+        url = f"{settings.ACCOUNTS_BASE_URL}/token"
         params = {
             "client_id": client_id,
             "client_secret": client_secret,
@@ -96,7 +439,7 @@ class Client:
         if soid:
             params["soid"] = soid
 
-        response = requests.post(url, params=params, timeout=30)
+        response = self.session.post(url, params=params, timeout=self.timeout)
 
         if response.status_code == 200:
             token_data = response.json()
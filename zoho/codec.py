@@ -0,0 +1,87 @@
+"""
+Decoding of API responses: the JSON backend and compact projected records
+"""
+
+import json
+import keyword
+from collections.abc import Mapping
+
+
+def get_loads(decoder="auto"):
+    """The JSON decoding function of a backend: "json", "orjson", or "auto" for orjson when installed"""
+    if decoder in ("auto", "orjson"):
+        try:
+            import orjson
+        except ImportError as e:
+            if decoder == "orjson":
+                raise ImportError("The orjson JSON decoder requires orjson (pip install orjson)") from e
+        else:
+            return orjson.loads
+
+    if decoder not in ("auto", "json"):
+        raise ValueError(f"Unknown JSON decoder {decoder!r}")
+    return json.loads
+
+
+class Record(Mapping):
+    """Read-only mapping keeping a few fields of a Zoho object in slots instead of a dict.
+
+    Fields missing from the object are left unset, so ``in`` and iteration only see the
+    fields the object had, like the dict it replaces.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, data):
+        for field in self.__slots__:
+            if field in data:
+                setattr(self, field, data[field])
+
+    def __getitem__(self, field):
+        if field not in self.__slots__:
+            raise KeyError(field)
+        try:
+            return getattr(self, field)
+        except AttributeError:
+            raise KeyError(field) from None
+
+    def __iter__(self):
+        return (field for field in self.__slots__ if hasattr(self, field))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self)!r})"
+
+
+_record_types = {}
+
+
+def _record_init(fields):
+    """__init__ copying the given fields, generated like namedtuple's to avoid a loop per record"""
+    lines = ["def __init__(self, data):"]
+    lines += [f"    if {field!r} in data: self.{field} = data[{field!r}]" for field in fields]
+    if not fields:
+        lines.append("    pass")
+    namespace = {}
+    exec("\n".join(lines), namespace)
+    return namespace["__init__"]
+
+
+def record_type(fields, name="Record"):
+    """A Record subclass holding the given fields, created once per set of fields"""
+    fields = tuple(dict.fromkeys(fields))
+    key = (name, fields)
+    cls = _record_types.get(key)
+    if cls is None:
+        invalid = [
+            field
+            for field in fields
+            if not field.isidentifier() or keyword.iskeyword(field) or field.startswith("__")
+        ]
+        if invalid:
+            raise ValueError(f"Cannot project fields {', '.join(invalid)}")
+        namespace = {"__slots__": fields, "__init__": _record_init(fields)}
+        cls = _record_types[key] = type(name, (Record,), namespace)
+    return cls
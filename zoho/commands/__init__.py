@@ -6,25 +6,115 @@ import click
 
 from .. import __version__
 from ..settings import settings
+from .lazy import LazyGroup
 
 
-from .config import config
-from .invoices import invoices
-
-
-@click.group()
+# Command groups are imported when used, and the API client only once a command needs it
+@click.group(
+    cls=LazyGroup,
+    lazy_subcommands={
+        "config": "zoho.commands.config:config",
+        "invoices": "zoho.commands.invoices:invoices",
+    },
+)
 @click.version_option(version=__version__)
 @click.option("--client-id", help="Zoho Client ID", envvar="ZOHO_CLIENT_ID")
 @click.option("--client-secret", help="Zoho Client Secret", envvar="ZOHO_CLIENT_SECRET")
 @click.option("--org-id", help="Zoho Organization ID", envvar="ZOHO_ORG_ID")
-def cli(client_id, client_secret, org_id):
+@click.option("--rate-per-minute", type=int, help="API calls allowed per minute", envvar="ZOHO_RATE_PER_MINUTE")
+@click.option("--rate-per-day", type=int, help="API calls allowed per day", envvar="ZOHO_RATE_PER_DAY")
+@click.option("--cache", is_flag=True, help="Cache GET responses in memory and on disk", envvar="ZOHO_CACHE")
+@click.option("--stats", is_flag=True, help="Print API request statistics when the command finishes")
+@click.option(
+    "--stats-format",
+    type=click.Choice(["text", "json", "prometheus"]),
+    default="text",
+    help="Format of the statistics",
+)
+@click.option("--stats-file", type=click.Path(dir_okay=False), help="Write the statistics to this file instead")
+@click.pass_context
+def cli(
+    ctx, client_id, client_secret, org_id, rate_per_minute, rate_per_day, cache, stats, stats_format, stats_file
+):
     """Zoho Books CLI - Manage your Zoho Books account."""
 
     settings.client_id = client_id
     settings.client_secret = client_secret
     settings.org_id = org_id
+    if rate_per_minute:
+        settings.RATE_LIMIT_PER_MINUTE = rate_per_minute
+    if rate_per_day:
+        settings.RATE_LIMIT_PER_DAY = rate_per_day
+    if cache:
+        from ..cache import ResponseCache
+        from ..client import client
+
+        client.cache = ResponseCache(
+            ttls=settings.CACHE_TTLS,
+            default_ttl=settings.CACHE_DEFAULT_TTL,
+            max_entries=settings.CACHE_MAX_ENTRIES,
+            directory=settings.CACHE_DIR,
+        )
+
+    ctx.call_on_close(report_api_budget)
+    ctx.call_on_close(record_latency)
+    if stats or stats_file:
+        ctx.call_on_close(lambda: report_stats(stats_format, stats_file))
+
+
+def report_api_budget():
+    """Print the remaining API budget of every organization a request was made for"""
+    from ..client import client
+
+    budgets = [("API budget", client.api_budget())]
+    budgets += [
+        (f"API budget of organization {org_id}", org_client.api_budget())
+        for org_id, org_client in client.org_clients.items()
+    ]
+    budgets = [(label, budget) for label, budget in budgets if budget is not None]
+
+    for label, budget in budgets:
+        click.echo(
+            f"{label}: {budget['minute']} calls left this minute, {budget['day']} left today "
+            f"({budget['used_today']} used, throttled {budget['throttled']} times)",
+            err=True,
+        )
+    if len(budgets) > 1:
+        used = sum(budget["used_today"] for _, budget in budgets)
+        throttled = sum(budget["throttled"] for _, budget in budgets)
+        click.echo(f"API calls in total: {used} used today, throttled {throttled} times", err=True)
+
+
+def record_latency():
+    """Keep the request latency of this run for the estimates of later runs.
+
+    Clients made for other organizations share the default client's metrics, so their requests count too.
+    """
+    from ..client import client
+    from ..planner import LatencyHistory
+
+    if client.metrics.empty:
+        return
+
+    try:
+        LatencyHistory().record(client.metrics)
+    except OSError:
+        pass
+
+
+def report_stats(stats_format, stats_file):
+    """Print or save the request metrics collected by the client"""
+    from ..client import client
 
+    if stats_format == "prometheus":
+        output = client.metrics.to_prometheus()
+    elif stats_format == "json":
+        output = client.metrics.to_json()
+    else:
+        output = client.metrics.to_text()
 
-# Add command groups to the main zoho group
-cli.add_command(config)
-cli.add_command(invoices)
+    if stats_file:
+        with open(stats_file, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        click.echo(output, err=True)
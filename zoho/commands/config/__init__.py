@@ -4,17 +4,16 @@ Configuration commands for Zoho Books CLI
 
 import click
 
+from ..lazy import LazyGroup
 
-from .org import org
-from .setup import setup
 
-
-@click.group()
+@click.group(
+    cls=LazyGroup,
+    lazy_subcommands={
+        "org": "zoho.commands.config.org:org",
+        "setup": "zoho.commands.config.setup:setup",
+    },
+)
 def config():
     """Manage Configuration."""
     pass
-
-
-# Add config commands to the group
-config.add_command(org)
-config.add_command(setup)
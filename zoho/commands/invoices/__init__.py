@@ -4,16 +4,19 @@ Invoices commands for Zoho Books CLI
 
 import click
 
-from .list import list as invoices_list
-from .report_gaps import report_gaps
+from ..lazy import LazyGroup
 
 
-@click.group()
+@click.group(
+    cls=LazyGroup,
+    lazy_subcommands={
+        "export": "zoho.commands.invoices.export:export",
+        "list": "zoho.commands.invoices.list:list",
+        "report-gaps": "zoho.commands.invoices.report_gaps:report_gaps",
+        "sync": "zoho.commands.invoices.sync:sync",
+        "watch": "zoho.commands.invoices.watch:watch",
+    },
+)
 def invoices():
     """Manage Zoho Books invoices."""
     pass
-
-
-# Add invoice commands to the group
-invoices.add_command(invoices_list)
-invoices.add_command(report_gaps)
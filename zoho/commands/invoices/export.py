@@ -0,0 +1,359 @@
+"""
+Export command for Zoho Books invoices
+"""
+
+import click
+import json
+import os
+from pathlib import Path
+
+from ...managers import InvoiceManager
+from ...mirror import InvoiceMirror
+from ...output import CsvWriter, JsonLinesWriter
+from ...planner import Estimate, format_duration
+from ...settings import settings
+from .filters import invoice_filters
+
+EXPORT_FORMATS = ("jsonl", "csv")
+
+# Invoice columns of a CSV export, repeated on the row of every line item
+INVOICE_COLUMNS = (
+    "invoice_id",
+    "invoice_number",
+    "reference_number",
+    "date",
+    "due_date",
+    "status",
+    "customer_id",
+    "customer_name",
+    "currency_code",
+    "exchange_rate",
+    "sub_total",
+    "tax_total",
+    "discount_total",
+    "total",
+    "balance",
+    "last_modified_time",
+)
+# Billing address fields, as billing_<field> columns
+ADDRESS_FIELDS = ("address", "city", "state", "zip", "country")
+# CSV column to line item field
+LINE_ITEM_COLUMNS = {
+    "line_item_id": "line_item_id",
+    "item_id": "item_id",
+    "item_name": "name",
+    "item_description": "description",
+    "quantity": "quantity",
+    "unit": "unit",
+    "rate": "rate",
+    "item_discount": "discount",
+    "tax_id": "tax_id",
+    "tax_name": "tax_name",
+    "tax_percentage": "tax_percentage",
+    "item_total": "item_total",
+}
+CSV_COLUMNS = [*INVOICE_COLUMNS, *(f"billing_{field}" for field in ADDRESS_FIELDS), *LINE_ITEM_COLUMNS]
+
+# Full invoices kept in the mirror per transaction
+STORE_BATCH_SIZE = 200
+
+
+def flatten(invoice):
+    """CSV rows of an invoice: one per line item, with the same columns for every invoice"""
+    row = {column: invoice.get(column) for column in INVOICE_COLUMNS}
+    billing_address = invoice.get("billing_address") or {}
+    for field in ADDRESS_FIELDS:
+        row[f"billing_{field}"] = billing_address.get(field)
+
+    line_items = invoice.get("line_items") or [{}]
+    return [{**row, **{column: item.get(field) for column, field in LINE_ITEM_COLUMNS.items()}} for item in line_items]
+
+
+class ExportProgress:
+    """JSON lines file next to an export recording what was written, to resume an interrupted export.
+
+    The first line holds the export options and the output size after its header, followed by one
+    entry per exported invoice with the output size once its rows were written.
+    """
+
+    def __init__(self, output_path):
+        self.path = Path(f"{output_path}.progress")
+        self._file = None
+
+    def exists(self):
+        return self.path.exists()
+
+    def start(self, job):
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._write(job)
+
+    def resume(self, output_size):
+        """The job, the IDs already exported and the output size to truncate to.
+
+        Entries are only trusted up to the last one the output file is long enough for.
+        """
+        # Entries with the end of their line in the progress file
+        job, entries = None, []
+        end = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                # A torn write at the end of an interrupted run
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                end += len(line)
+                if job is None:
+                    job, job_end = entry, end
+                else:
+                    entries.append((entry, end))
+
+        if job is None or job["offset"] > output_size:
+            return None, set(), 0
+
+        while entries and entries[-1][0]["offset"] > output_size:
+            entries.pop()
+        offset, end = (entries[-1][0]["offset"], entries[-1][1]) if entries else (job["offset"], job_end)
+
+        # Drop the entries not trusted, so that new ones are not appended to a torn line or after
+        # invoices about to be exported again
+        os.truncate(self.path, end)
+        self._file = open(self.path, "a", encoding="utf-8")
+        return job, {entry["invoice_id"] for entry, _ in entries}, offset
+
+    def record(self, invoice_id, offset):
+        self._write({"invoice_id": invoice_id, "offset": offset})
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def delete(self):
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+
+class InvoiceExporter:
+    """Exports full invoices, with line items, taxes and addresses, of an invoice listing.
+
+    Listed invoice IDs stream into InvoiceManager.iter_details, which fetches up to ``workers``
+    invoices at once. Full invoices are kept in the local mirror and reused while unmodified.
+    """
+
+    def __init__(
+        self, invoice_manager, query, path, output_format="jsonl", workers=8, concurrency=4, mirror=None, reuse=True
+    ):
+        self.invoice_manager = invoice_manager
+        self.query = query
+        self.path = Path(path)
+        self.output_format = output_format
+        self.workers = workers
+        self.concurrency = concurrency
+        # Where full invoices are kept, and whether unmodified ones are read from it instead of fetched
+        self.mirror = mirror
+        self.reuse = reuse and mirror is not None
+        self.progress = ExportProgress(self.path)
+        self.exported = 0
+        self.reused = 0
+        self.failed = 0
+        self.skipped = 0
+        self._reused_ids = set()
+        self._fetched = []
+
+    def job(self):
+        return {"format": self.output_format, "params": self.query.params(), "local_fields": self.query.local_fields}
+
+    def estimate(self):
+        """The API calls of an export: the listing is made to learn which invoices are not cached"""
+        estimate = Estimate()
+        listed = missing = 0
+        for invoice in self.query.iter_invoices(
+            concurrency=self.concurrency, fields=("invoice_id", "last_modified_time")
+        ):
+            listed += 1
+            modified = invoice.get("last_modified_time")
+            if not self.reuse or self.mirror.cached_details(invoice["invoice_id"], modified) is None:
+                missing += 1
+
+        if not isinstance(self.query.source, InvoiceMirror):
+            estimate.add_listing("invoices", listed, spent=True)
+        estimate.add("GET invoices/{id}", missing)
+        return estimate, listed
+
+    def _cached(self, listed):
+        invoice = self.mirror.cached_details(listed["invoice_id"], listed.get("last_modified_time"))
+        if invoice is not None:
+            self._reused_ids.add(listed["invoice_id"])
+        return invoice
+
+    def _store(self, flush=False):
+        if self.mirror is not None and self._fetched and (flush or len(self._fetched) >= STORE_BATCH_SIZE):
+            self.mirror.store_details(self._fetched)
+            self._fetched = []
+
+    def export(self, resume=False):
+        done = set()
+        if resume:
+            if not self.progress.exists() or not self.path.exists():
+                raise click.ClickException(f"No interrupted export of {self.path} to resume")
+            job, done, offset = self.progress.resume(self.path.stat().st_size)
+            if job is None:
+                raise click.ClickException(f"{self.progress.path} does not match {self.path}, start the export again")
+            if {name: value for name, value in job.items() if name != "offset"} != self.job():
+                self.progress.close()
+                raise click.ClickException("The interrupted export used other options, run it with the same ones")
+
+            # Drop anything written after the last invoice recorded as complete
+            os.truncate(self.path, offset)
+            self.skipped = len(done)
+            click.echo(f"Resuming after {len(done)} exported invoices", err=True)
+
+        with open(self.path, "a" if resume else "w", encoding="utf-8") as stream:
+            if self.output_format == "csv":
+                writer = CsvWriter(stream, CSV_COLUMNS, header=not resume)
+            else:
+                writer = JsonLinesWriter(stream, None)
+
+            if not resume:
+                stream.flush()
+                self.progress.start({**self.job(), "offset": stream.tell()})
+
+            try:
+                self._export(writer, stream, done)
+            finally:
+                self._store(flush=True)
+                writer.close()
+                self.progress.close()
+
+        # Failed invoices are retried by --resume
+        if not self.failed:
+            self.progress.delete()
+
+    def _export(self, writer, stream, done):
+        # Only the IDs and modification times of listed invoices are kept
+        listed = self.query.iter_invoices(
+            concurrency=self.concurrency, fields=("invoice_id", "last_modified_time")
+        )
+        listed = (invoice for invoice in listed if invoice["invoice_id"] not in done)
+        cached = self._cached if self.reuse else None
+
+        for summary, invoice in self.invoice_manager.iter_details(listed, workers=self.workers, cached=cached):
+            invoice_id = summary["invoice_id"]
+            if invoice is None:
+                self.failed += 1
+                continue
+
+            if invoice_id in self._reused_ids:
+                self._reused_ids.discard(invoice_id)
+                self.reused += 1
+            elif self.mirror is not None:
+                self._fetched.append(invoice)
+                self._store()
+
+            if self.output_format == "csv":
+                for row in flatten(invoice):
+                    writer.write(row)
+            else:
+                writer.write(invoice)
+            stream.flush()
+            self.progress.record(invoice_id, stream.tell())
+
+            self.exported += 1
+            if self.exported % 1000 == 0:
+                click.echo(f"{self.exported} invoices exported...", err=True)
+
+
+def show_export_estimate(estimate, listed, workers, client):
+    per_minute = client.rate_limit_per_minute or settings.RATE_LIMIT_PER_MINUTE
+    pages = sum(estimate.spent.values())
+    click.echo(f"{listed} invoices to export" + (f", listed with {pages} page fetches" if pages else ""))
+    click.echo(f"Invoices to fetch: {estimate.total} (the rest are unchanged in the mirror)")
+    click.echo(
+        f"Estimated time: {format_duration(estimate.seconds(workers, per_minute))} with {workers} worker(s) "
+        f"and {per_minute} calls per minute"
+    )
+    budget = client.api_budget()
+    if budget is not None and estimate.total > budget["day"]:
+        click.echo(
+            f"Only {budget['day']} API calls are left today, invoices not fetched before they run out "
+            f"can be exported later with --resume"
+        )
+
+
+@click.command()
+@invoice_filters
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(EXPORT_FORMATS),
+    default="jsonl",
+    help="JSON lines of full invoices, or CSV with one row per line item",
+)
+@click.option("--output", "-o", type=click.Path(dir_okay=False), required=True, help="Output file")
+@click.option("--workers", type=int, default=8, help="Number of invoices to fetch in parallel")
+@click.option("--concurrency", type=int, default=4, help="Number of invoice pages to fetch in parallel")
+@click.option("--local", is_flag=True, default=False, help="List invoice IDs from the local mirror (see sync)")
+@click.option(
+    "--refetch", is_flag=True, default=False, help="Fetch every invoice instead of reusing unmodified ones"
+)
+@click.option("--resume", is_flag=True, default=False, help="Continue an interrupted export of the same file")
+@click.option(
+    "--estimate",
+    "estimate_only",
+    is_flag=True,
+    default=False,
+    help="Only list the invoices and show the API calls and time the export would take",
+)
+def export(
+    invoice_query,
+    output_format,
+    output,
+    workers,
+    concurrency,
+    local,
+    refetch,
+    resume,
+    estimate_only,
+):
+    """Export full invoices with line items as JSON lines or CSV."""
+
+    mirror = InvoiceMirror(settings.MIRROR_FILE, settings.org_id)
+    invoice_manager = InvoiceManager()
+    query = invoice_query(mirror if local else invoice_manager).sort("invoice_number")
+
+    exporter = InvoiceExporter(
+        invoice_manager,
+        query,
+        output,
+        output_format=output_format,
+        workers=workers,
+        concurrency=concurrency,
+        mirror=mirror,
+        reuse=not refetch,
+    )
+    if estimate_only:
+        try:
+            estimate, listed = exporter.estimate()
+        finally:
+            mirror.close()
+        show_export_estimate(estimate, listed, workers, invoice_manager.client)
+        return
+
+    try:
+        exporter.export(resume=resume)
+    finally:
+        mirror.close()
+
+    click.echo(
+        f"Exported {exporter.exported} invoices to {output} "
+        f"({exporter.reused} unchanged since the last export, {exporter.skipped} already exported)"
+    )
+    if exporter.failed:
+        raise click.ClickException(f"{exporter.failed} invoices could not be fetched, retry them with --resume")
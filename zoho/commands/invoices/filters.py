@@ -0,0 +1,59 @@
+"""
+Invoice filter options shared by the commands working on an invoice listing
+"""
+
+import functools
+
+import click
+
+from ...managers import InvoiceQuery
+
+FILTER_OPTIONS = (
+    click.option("--status", multiple=True, help="Filter invoices by status (sent, draft, void, etc.), repeatable"),
+    click.option("--customer-id", help="Only invoices of this customer ID"),
+    click.option("--customer", help="Only invoices of this customer name"),
+    click.option("--from-date", help="Only invoices dated on or after YYYY-MM-DD"),
+    click.option("--to-date", help="Only invoices dated on or before YYYY-MM-DD"),
+    click.option("--modified-since", help="Only invoices modified since a timestamp (2024-01-15T10:30:00+0000)"),
+    click.option("--prefix", help="Only invoice numbers starting with this prefix"),
+    click.option("--from-number", type=int, help="Only invoice numbers from this numeric value"),
+    click.option("--to-number", type=int, help="Only invoice numbers up to this numeric value"),
+)
+
+
+def invoice_filters(command):
+    """Add the invoice filter options to a command.
+
+    The command gets them as ``invoice_query(source)``, which builds an InvoiceQuery of a
+    source with every filter given on the command line.
+    """
+
+    @functools.wraps(command)
+    def wrapper(
+        *args,
+        status,
+        customer_id,
+        customer,
+        from_date,
+        to_date,
+        modified_since,
+        prefix,
+        from_number,
+        to_number,
+        **kwargs,
+    ):
+        def invoice_query(source):
+            return (
+                InvoiceQuery(source)
+                .status(*status)
+                .customer(customer_id, customer)
+                .dates(from_date, to_date)
+                .modified(modified_since)
+                .numbers(prefix, None, from_number, to_number)
+            )
+
+        return command(*args, invoice_query=invoice_query, **kwargs)
+
+    for option in reversed(FILTER_OPTIONS):
+        wrapper = option(wrapper)
+    return wrapper
@@ -4,38 +4,89 @@ List command for Zoho Books invoices
 
 import click
 import sys
+import threading
+from itertools import islice
 from pathlib import Path
 
+from ...fanout import fan_out, resolve_orgs
 from ...managers import InvoiceManager
+from ...mirror import InvoiceMirror
+from ...output import WRITERS, get_writer
 from ...settings import settings
+from .filters import invoice_filters
+
+DEFAULT_FIELDS = "invoice_number,date,status,customer_name,total"
 
 
 @click.command()
-@click.option("--status", help="Filter invoices by status (sent, draft, void, etc.)")
-@click.option("--limit", type=int, default=20, help="Limit number of results")
-def list(status, limit):
+@invoice_filters
+@click.option("--limit", type=int, default=20, help="Limit number of results (0 for no limit)")
+@click.option("--concurrency", type=int, default=1, help="Number of pages to fetch in parallel")
+@click.option("--local", is_flag=True, default=False, help="Read invoices from the local mirror (see sync)")
+@click.option(
+    "--format", "output_format", type=click.Choice(sorted(WRITERS)), default="text", help="Output format"
+)
+@click.option("--fields", default=DEFAULT_FIELDS, show_default=True, help="Comma separated invoice fields to output")
+@click.option("--output", "-o", type=click.Path(dir_okay=False, allow_dash=True), default="-", help="Output file")
+@click.option("--orgs", "--org", "orgs", help='List from several organizations at once: comma separated IDs, or "all"')
+def list(
+    invoice_query,
+    limit,
+    concurrency,
+    local,
+    output_format,
+    fields,
+    output,
+    orgs,
+):
     """List invoices in Zoho Books."""
 
-    transaction_manager = InvoiceManager()
+    fields = [field.strip() for field in fields.split(",") if field.strip()]
+    if not fields:
+        raise click.BadParameter("at least one field is required", param_hint="--fields")
 
-    params = {}
-    if status:
-        params["status"] = status
+    def iter_invoices(source):
+        query = invoice_query(source)
 
-    invoices = transaction_manager.list_invoices(params)
-    invoices = invoices[:limit]
+        # Only fetch as many pages as needed to satisfy the limit
+        per_page = min(limit, 200) if limit > 0 else 200
+        # Only the output fields are kept of each invoice
+        invoices = query.iter_invoices(per_page=per_page, concurrency=concurrency, fields=fields)
+        return islice(invoices, limit) if limit > 0 else invoices
 
-    if not invoices:
-        click.echo("No invoices found.")
-        return
+    # Rows are written as each page arrives, nothing is buffered beyond the current page
+    with click.open_file(output, "w", encoding="utf-8") as stream:
+        if not orgs:
+            if local:
+                source = InvoiceMirror(settings.MIRROR_FILE, settings.org_id)
+            else:
+                source = InvoiceManager()
+
+            writer = get_writer(output_format, stream, fields)
+            for invoice in iter_invoices(source):
+                writer.write(invoice)
+        else:
+            if "organization_id" not in fields:
+                fields = ["organization_id", *fields]
+            writer = get_writer(output_format, stream, fields)
+            lock = threading.Lock()
 
-    click.echo(f"Found {len(invoices)} invoices:")
-    click.echo("-" * 80)
+            def list_org(org_id, org_client):
+                source = InvoiceMirror(settings.MIRROR_FILE, org_id) if local else InvoiceManager(org_client)
+                for invoice in iter_invoices(source):
+                    with lock:
+                        writer.write({**invoice, "organization_id": org_id})
+
+            # Organizations are listed concurrently, rows are labeled with their organization
+            for result in fan_out(resolve_orgs(orgs), list_org):
+                if result.error is not None:
+                    click.echo(f"Organization {result.org_id} failed: {result.error}", err=True)
+        writer.close()
+
+    # Keep stdout clean for machine readable formats
+    to_stderr = output_format != "text" or output != "-"
+    if not writer.count:
+        click.echo("No invoices found.", err=to_stderr)
+        return
 
-    for invoice in invoices:
-        click.echo(f"Number: {invoice.get('invoice_number', 'N/A')}")
-        click.echo(f"Date: {invoice.get('date', 'N/A')}")
-        click.echo(f"Status: {invoice.get('status', 'N/A')}")
-        click.echo(f"Customer: {invoice.get('customer_name', 'N/A')}")
-        click.echo(f"Amount: {invoice.get('total', 'N/A')}")
-        click.echo("-" * 40)
+    click.echo(f"Found {writer.count} invoices.", err=to_stderr)
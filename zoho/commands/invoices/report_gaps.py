@@ -3,186 +3,903 @@ Renumber command for Zoho Books invoices
 """
 
 import click
-import re
 import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
 from pathlib import Path
 
-from ...managers import InvoiceManager
+from ...managers import InvoiceManager, InvoiceQuery
+from ...fanout import fan_out, resolve_orgs
+from ...journal import RenumberingJournal
+from ...mirror import InvoiceMirror
+from ...planner import Estimate, Schedule, format_duration, parse_window
+from ...numbering import (
+    STRATEGIES,
+    SeriesReport,
+    analyze_series,
+    count_cycles,
+    count_out_of_order,
+    parse_number,
+)
+from ...settings import settings
+
+# Invoices are parked on TMP-<invoice ID> while they swap numbers with others
+TEMPORARY_PREFIX = "TMP-"
+
 
 class InvoiceRenumberingPlan:
     invoice: dict
     prefix: str
     suffix: str
+    old_number: str
+    old_numeric_index: int
     new_numeric_index: int
 
-    def __init__(self, invoice, prefix, suffix):
+    # Fields of the listed invoices a plan needs until the invoice is loaded or updated
+    LISTED_FIELDS = ("invoice_id", "invoice_number", "date", "customer_id", "status")
+
+    def __init__(self, invoice, prefix, suffix, old_numeric_index=None):
         self.invoice = invoice
         self.prefix = prefix
         self.suffix = suffix
+        self.conflict = None
+        # Set on the extra move parking an invoice while it swaps numbers with others
+        self.temporary_number = None
 
-    @property
-    def old_number(self):
-        return self.invoice.get("invoice_number", None)
+        # Parsed once, the invoice itself is replaced when it is loaded and renumbered.
+        # An invoice left on a temporary number keeps its place in the series, given by
+        # the number it had before it was parked.
+        self.old_number = invoice.get("invoice_number", None)
+        if old_numeric_index is None:
+            record = parse_number(self.old_number, prefix, suffix)
+            old_numeric_index = record.value if record else 0
+        self.old_numeric_index = old_numeric_index
 
-    @property
-    def old_numeric_index(self):
-        if not self.old_number:
-            return 0
+    @classmethod
+    def from_journal(cls, entry, prefix, suffix):
+        """Rebuild a plan from its journal entry without fetching the invoice"""
+        invoice = {"invoice_id": entry["invoice_id"], "invoice_number": entry["old_number"], "date": entry["date"]}
+        plan = cls(invoice, prefix, suffix, entry.get("old_numeric_index"))
+        plan.new_numeric_index = entry["new_numeric_index"]
+        return plan
 
-        # Remove prefix and suffix
-        invoice_number = self.old_number.replace(self.prefix, "").replace(self.suffix, "")
+    def to_journal(self):
+        return {
+            "invoice_id": self.invoice_id,
+            "old_number": self.old_number,
+            "old_numeric_index": self.old_numeric_index,
+            "date": self.date,
+            "new_numeric_index": self.new_numeric_index,
+        }
 
-        # Try to extract numbers from the invoice number
-        numbers = re.findall(r"\d+", str(invoice_number))
-        if numbers:
-            return int(numbers[0])
-        return 0
+    @property
+    def invoice_id(self):
+        return self.invoice.get("invoice_id", "Unknown")
 
     @property
     def date(self):
         return self.invoice.get("date", "Unknown date")
 
+    @property
+    def on_temporary_number(self):
+        return (self.old_number or "").startswith(TEMPORARY_PREFIX)
+
     @property
     def new_number(self):
+        if self.temporary_number:
+            return self.temporary_number
         return f"{self.prefix}{self.new_numeric_index:06d}{self.suffix}"
 
-    def in_range(self, from_number=None, to_number=None):
-        if from_number is not None and self.old_numeric_index < from_number:
-            return False
+    def parked(self):
+        """A move of this invoice to a temporary number, freeing its number to break a cycle"""
+        park = InvoiceRenumberingPlan(self.invoice, self.prefix, self.suffix)
+        park.new_numeric_index = self.new_numeric_index
+        park.temporary_number = f"{TEMPORARY_PREFIX}{self.invoice_id}"
+        return park
 
-        if to_number is not None and self.old_numeric_index > to_number:
-            return False
+    def describe(self):
+        return f"{self.old_numeric_index:3d}. {self.old_number:15s} → {self.new_number:15s} ({self.date})"
 
-        return True
+    def load(self, invoice_manager):
+        """Fetch the full invoice, keeping the listed summary if that fails"""
+        invoice_id = self.invoice.get("invoice_id", "Unknown")
 
-    def show(self):
-        click.echo(
-            f"{self.old_numeric_index:3d}. {self.old_number:15s} → {self.new_number:15s} ({self.date})"
+        invoice = invoice_manager.get(invoice_id)
+        if invoice:
+            self.invoice = invoice
+        return invoice
+
+    def apply(self, invoice_manager):
+        """Write the new number on the loaded invoice"""
+        self.invoice["invoice_number"] = self.new_number
+        self.invoice["reason"] = "Invoice renumbering"
+        return invoice_manager.update(
+            self.invoice, params={"ignore_auto_number_generation": True}, changed=("invoice_number",)
         )
 
-    def save(self, invoice_manager):
-        invoice_id = self.invoice.get("invoice_id", "Unknown")
+    def save(self, invoice_manager, minimal=False):
+        if minimal:
+            result = self.save_minimal(invoice_manager)
+            if result:
+                return result
 
-        self.invoice = invoice_manager.get(invoice_id)
-        if not self.invoice:
+        if not self.load(invoice_manager):
             return None
 
-        self.invoice["invoice_number"] = self.new_number
-        self.invoice["reason"] = "Invoice renumbering"
-        return invoice_manager.update(self.invoice, params={"ignore_auto_number_generation": True})
+        return self.apply(invoice_manager)
+
+    def save_minimal(self, invoice_manager):
+        """Send only the new number, trusting the listed invoice instead of fetching it first.
+
+        The returned invoice is compared with the listed one, so changes made since the
+        listing are reported in ``conflict``.
+        """
+        invoice_id = self.invoice.get("invoice_id", "Unknown")
+        fields = {"invoice_number": self.new_number, "reason": "Invoice renumbering"}
+
+        result = invoice_manager.update_fields(invoice_id, fields, params={"ignore_auto_number_generation": True})
+        if result:
+            changed = [
+                field
+                for field in ("date", "customer_id", "status")
+                if field in self.invoice and field in result and self.invoice[field] != result[field]
+            ]
+            if changed:
+                self.conflict = f"{self.old_number} changed since it was listed ({', '.join(changed)})"
+        return result
 
 class InvoiceRenumberer:
     """Handles invoice renumbering operations"""
 
-    def __init__(self, invoice_manager, start_number, prefix, suffix, from_number, to_number):
+    def __init__(
+        self,
+        invoice_manager,
+        start_number,
+        prefix,
+        suffix,
+        from_number,
+        to_number,
+        concurrency=1,
+        workers=1,
+        source=None,
+        minimal=False,
+        journal=None,
+        strategy="sequential",
+        schedule=None,
+        spread=False,
+        output=None,
+        two_phase="auto",
+        parked=None,
+    ):
         self.invoice_manager = invoice_manager
+        # Stream reports are written to, stdout by default
+        self.output = output
+        # Where invoices are listed from, the API by default or the local mirror
+        self.source = source or invoice_manager
+        # Send only the new number instead of re-fetching and re-sending whole invoices
+        self.minimal = minimal
+        # Progress is journaled so that an interrupted run can be resumed
+        self.journal = journal
+        self.resumed = False
+        # How gaps are closed, one of numbering.STRATEGIES
+        self.strategy = strategy
+        self.concurrency = concurrency
+        self.workers = workers
+        # Whether workers park wanted invoices first and write final numbers in a second pass:
+        # "on", "off", or "auto" when the longest chain would outlast everything else
+        self.two_phase = two_phase
         self.start_number = start_number
         self.prefix = prefix
         self.suffix = suffix
         self.from_number = from_number
         self.to_number = to_number
+        # Numeric values invoices parked on temporary numbers by an earlier job had, by invoice ID
+        self.parked = parked or {}
         self.renumbered_count = 0
         self.errors = []
         self.renumbering_plan = None
+        # Series analyzed by analyze_invoice_numbering, or by analyze_all_series keyed by series
+        self.report = None
+        self.series = None
+        # planner.Schedule fitting the writes into the API quota, and whether to wait for
+        # the next day or window once it is used up instead of stopping
+        self.schedule = schedule
+        self.spread = spread
+        self.stopped = False
+        # Expected seconds per call, measured once per run to check a move fits in the window
+        self._call_seconds = None
+
+    def echo(self, message=""):
+        click.echo(message, file=self.output)
 
     def get_sorted_invoices(self):
-        """Get all invoices sorted by date"""
-        params = {
-            "invoice_number_starts_with": self.prefix,
-            "invoice_number_contains": self.suffix,
-            "sort_column": "invoice_number",
-            "sort_order": "A",
-        }
+        """Iterate over the invoices in range sorted by invoice number"""
+        query = (
+            InvoiceQuery(self.source)
+            .numbers(self.prefix, self.suffix, self.from_number, self.to_number)
+            .sort("invoice_number")
+        )
+        # Plans hold on to every listed invoice, so only the fields they use are kept
+        return query.iter_invoices(concurrency=self.concurrency, fields=InvoiceRenumberingPlan.LISTED_FIELDS)
+
+    def get_parked_plans(self):
+        """Plans of the invoices of the series an interrupted job left on temporary numbers.
 
-        return self.invoice_manager.list(params)
+        They are listed apart, as their numbers do not match the series. Returns the plans, and
+        the temporary numbers of invoices whose place in the series is unknown.
+        """
+        if self.prefix.startswith(TEMPORARY_PREFIX):
+            return [], []
+
+        plans, unknown = [], []
+        query = InvoiceQuery(self.source).numbers(TEMPORARY_PREFIX).sort("invoice_number")
+        for invoice in query.iter_invoices(fields=InvoiceRenumberingPlan.LISTED_FIELDS):
+            value = self.parked.get(invoice["invoice_id"])
+            if value is None:
+                unknown.append(invoice["invoice_number"])
+            elif (self.from_number is None or value >= self.from_number) and (
+                self.to_number is None or value <= self.to_number
+            ):
+                plans.append(InvoiceRenumberingPlan(invoice, self.prefix, self.suffix, value))
+        return plans, unknown
 
     def analyze_invoice_numbering(self):
         """Analyze current invoice numbering to identify patterns and gaps"""
 
-        click.echo(f"Prefix: {self.prefix}")
-        click.echo(f"Suffix: {self.suffix}")
-        click.echo(f"From number: {self.from_number}")
-        click.echo(f"To number: {self.to_number}")
-        click.echo(f"Start number: {self.start_number}")
-        click.echo("-" * 80)
+        self.echo(f"Prefix: {self.prefix}")
+        self.echo(f"Suffix: {self.suffix}")
+        self.echo(f"From number: {self.from_number}")
+        self.echo(f"To number: {self.to_number}")
+        self.echo(f"Start number: {self.start_number}")
+        self.echo("-" * 80)
 
         invoices = self.get_sorted_invoices()
         self.renumbering_plan = []
         for invoice in invoices:
-            invoice_renumbering_plan = InvoiceRenumberingPlan(invoice, self.prefix, self.suffix)
-            if invoice_renumbering_plan.in_range(self.from_number, self.to_number):
-                self.renumbering_plan.append(invoice_renumbering_plan)
-
-        # Find gaps
-        gaps = []
-        for i in range(len(self.renumbering_plan) - 1):
-            next_index = self.renumbering_plan[i + 1].old_numeric_index
-            current_index = self.renumbering_plan[i].old_numeric_index
-            if next_index - current_index > 1:
-                gaps.append((current_index, next_index))
-
-        if gaps:
-            click.echo(f"\nGaps found ({len(gaps)}):")
-            for gap_start, gap_end in gaps:
-                missing_count = gap_end - gap_start - 1
-                click.echo(f"  {gap_start} → {gap_end} (missing {missing_count} numbers)")
-        else:
-            click.echo("\nNo gaps found in numbering.")
+            self.renumbering_plan.append(InvoiceRenumberingPlan(invoice, self.prefix, self.suffix))
+
+        # Invoices parked by an interrupted job get a number of the series again
+        parked, unknown = self.get_parked_plans()
+        self.renumbering_plan += parked
+        if parked:
+            self.echo(f"{len(parked)} invoices of the series are parked on temporary numbers")
+        if unknown:
+            self.echo(
+                f"Warning: {len(unknown)} invoices are parked on temporary numbers by a job of another series "
+                f"and are left as they are: {', '.join(unknown)}"
+            )
+
+        report = SeriesReport(self.prefix, self.suffix)
+        for plan in self.renumbering_plan:
+            report.add(plan.old_numeric_index, plan.old_number, plan.date)
+        report.analyze()
+        self.report = report
+
+        # Renumber in numeric order rather than the server's string order
+        self.renumbering_plan = [self.renumbering_plan[i] for i in report.order]
+
+        show_series_report(report, file=self.output)
+        show_strategies(report, self.start_number, self.strategy, file=self.output)
 
         # Assign new numeric indices
-        for i, renumbering_plan in enumerate(self.renumbering_plan):
-            renumbering_plan.new_numeric_index = i + self.start_number
+        for plan, value in zip(self.renumbering_plan, report.renumbering(self.start_number, self.strategy)):
+            plan.new_numeric_index = value
 
         # Filter invoices that don't need any changes
-        self.renumbering_plan = [plan for plan in self.renumbering_plan if plan.new_numeric_index != plan.old_numeric_index]
+        self.renumbering_plan = [
+            plan
+            for plan in self.renumbering_plan
+            if plan.new_numeric_index != plan.old_numeric_index or plan.on_temporary_number
+        ]
 
         if not self.renumbering_plan:
-            click.echo("No invoices need to be renumbered.")
+            self.echo("No invoices need to be renumbered.")
             return
 
-        click.echo("Invoice Numbering Analysis")
-        click.echo("=" * 50)
+        self.echo("Invoice Numbering Analysis")
+        self.echo("=" * 50)
 
         for plan in self.renumbering_plan:
-            plan.show()
+            self.echo(plan.describe())
+
+        show_estimate(self)
+
+    def analyze_all_series(self):
+        """Report gaps, duplicates and out-of-order dates for every numbering series in the organization"""
+        params = {"sort_column": "invoice_number", "sort_order": "A"}
+        series, unparsed = analyze_series(self.source.iter_invoices(params, concurrency=self.concurrency))
+        self.series = series
+
+        for report in sorted(series.values(), key=lambda report: (report.prefix, report.suffix)):
+            self.echo(f"\nSeries {report.prefix}#{report.suffix}: {report.count} invoices")
+            self.echo(f"Numbers {report.first} → {report.last}")
+            show_series_report(report, file=self.output)
+
+        if unparsed:
+            self.echo(f"\nInvoice numbers without a counter ({len(unparsed)}): {', '.join(map(str, unparsed))}")
+
+    def resume(self):
+        """Load the plan of an interrupted run from the journal, skipping invoices already renumbered"""
+        job, entries, done = self.journal.resume()
+        if job is None:
+            raise click.ClickException(f"No renumbering job found in {self.journal.path}")
+
+        self.prefix = job["prefix"]
+        self.suffix = job["suffix"]
+        self.start_number = job["start_number"]
+        self.from_number = job["from_number"]
+        self.to_number = job["to_number"]
+        self.renumbering_plan = [
+            InvoiceRenumberingPlan.from_journal(entry, self.prefix, self.suffix)
+            for entry in entries
+            if entry["invoice_id"] not in done
+        ]
+        self.resumed = True
+
+        self.echo(f"Resuming job started {job['started_at']} ({self.prefix}#{self.suffix})")
+        self.echo(f"{len(done)} of {len(entries)} invoices already renumbered")
+        self.echo(f"{len(self.renumbering_plan)} invoices remaining")
+        if self.renumbering_plan:
+            show_estimate(self)
+
+    def estimate(self):
+        """Estimate of the calls renumbering will make"""
+        estimate = Estimate()
+        if self.report is not None:
+            estimate.add_listing("invoices", self.report.count, spent=True)
+
+        invoices = len(self.renumbering_plan)
+        if self.two_phases():
+            # Parked invoices are loaded once, for the park, and get their final number from that copy
+            gets, puts = invoices, invoices + len(self.parks())
+        else:
+            ready, _ = self._chains()
+            gets = puts = invoices + sum(1 for plan in ready if plan.temporary_number)
+        if not self.minimal:
+            estimate.add("GET invoices/{id}", gets)
+        estimate.add("PUT invoices/{id}", puts)
+        return estimate
+
+    def critical_path(self):
+        """Moves of the longest chain, which are made one after the other however many workers there are"""
+        ready, dependents = self._chains()
+        longest = 0
+        for plan in ready:
+            moves = 0
+            while plan is not None:
+                moves += 1
+                plan = dependents.get(plan)
+            longest = max(longest, moves)
+        return longest
+
+    def two_phases(self):
+        """Whether workers renumber in two phases, see _renumber_in_two_phases"""
+        if self.workers <= 1 or self.two_phase == "off":
+            return False
+        if self.two_phase == "on":
+            return True
+        # A move along a chain waits for its PUT only, its GET was prefetched. Two phases take
+        # every GET and PUT, and a PUT more for each parked invoice, but split over the workers.
+        invoices = len(self.renumbering_plan)
+        calls = invoices + len(self.parks()) + (0 if self.minimal else invoices)
+        return self.critical_path() > calls / self.workers
+
+    @property
+    def move_calls(self):
+        """API calls of one move, a PUT when minimal, otherwise a GET and a PUT"""
+        return 1 if self.minimal else 2
+
+    def _reserve(self, calls, wait=True):
+        """Reserve room in the schedule for ``calls`` calls, waiting for it with ``spread`` and ``wait``.
+
+        Returns False when the calls cannot be made now.
+        """
+        if self.schedule is None:
+            return True
+
+        if self._call_seconds is None:
+            self._call_seconds = Estimate().latency("PUT invoices/{id}")
+        seconds = calls * self._call_seconds
+        while not self.schedule.allows(calls, seconds):
+            if not wait:
+                return False
+            if not self.spread:
+                self.stopped = True
+                return False
+            opening = self.schedule.next_opening(calls)
+            self.echo(f"API budget used up, waiting until {opening:%Y-%m-%d %H:%M}...")
+            time.sleep(max((opening - datetime.now()).total_seconds(), 1))
+
+        self.schedule.take(calls)
+        return True
+
+    def _release(self, calls):
+        """Give back calls reserved with _reserve once they were made, or will not be"""
+        if self.schedule is not None:
+            self.schedule.release(calls)
 
     def renumber_invoices(self):
         """Renumber invoices sequentially"""
 
         if self.renumbering_plan is None:
-            click.echo("No renumbering plan found. Attempting to analyze invoice numbering...")
+            self.echo("No renumbering plan found. Attempting to analyze invoice numbering...")
             self.analyze_invoice_numbering()
 
         if len(self.renumbering_plan) == 0:
-            click.echo("No invoices need to be renumbered. Exiting.")
+            self.echo("No invoices need to be renumbered. Exiting.")
             return
 
-        click.echo("Renumbering invoices...")
-        click.echo("-" * 80)
-        # Process each invoice
-        for i, plan in enumerate(self.renumbering_plan):
-            try:
-                plan.show()
-                result = plan.save(self.invoice_manager)
-                if result:
-                    self.renumbered_count += 1
-                    click.echo("    ✓ Successfully renumbered")
-                else:
-                    self.errors.append(f"Failed to renumber {plan.old_number}")
-                    click.echo("    ✗ Failed to renumber")
-            except Exception as e:
-                error_msg = f"Error renumbering {plan.old_number}: {str(e)}"
-                self.errors.append(error_msg)
-                click.echo(f"    ✗ {error_msg}")
+        if self.journal is not None and not self.resumed:
+            job = {
+                "prefix": self.prefix,
+                "suffix": self.suffix,
+                "start_number": self.start_number,
+                "from_number": self.from_number,
+                "to_number": self.to_number,
+                "strategy": self.strategy,
+                "started_at": datetime.now().isoformat(timespec="seconds"),
+            }
+            self.journal.start(job, [plan.to_journal() for plan in self.renumbering_plan])
+
+        try:
+            self._renumber()
+        finally:
+            if self.journal is not None:
+                self.journal.close()
+
+    def _renumber(self):
+        self.echo("Renumbering invoices...")
+        self.echo("-" * 80)
+        if self.workers > 1:
+            self._renumber_concurrently()
+        else:
+            # Process each chain in order, an invoice is written once its new number was freed
+            ready, dependents = self._chains()
+            for plan in ready:
+                # Moves are reserved one at a time: a chain stopped midway, even with an invoice
+                # parked on a temporary number, is planned again from where it stopped by --resume
+                while plan is not None and self._reserve(self.move_calls):
+                    try:
+                        self.echo(plan.describe())
+                        result = plan.save(self.invoice_manager, minimal=self.minimal)
+                        self._record_result(plan, result)
+                    except Exception as e:
+                        result = None
+                        self._record_exception(plan, e)
+                    self._release(self.move_calls)
+
+                    plan = dependents.get(plan)
+                    if plan is not None and not result:
+                        self._skip_chain(plan, dependents)
+                        break
+
+                if self.stopped:
+                    break
 
-        click.echo("-" * 80)
+        self.echo("-" * 80)
 
-        click.echo("RENUMBERING COMPLETE: Successfully renumbered {} invoices".format(self.renumbered_count))
+        self.echo("RENUMBERING COMPLETE: Successfully renumbered {} invoices".format(self.renumbered_count))
+
+        if self.stopped:
+            self.echo(
+                "\nStopped within the API budget before every invoice was renumbered, "
+                "continue later with --resume (or run with --spread to wait for the next day)"
+            )
 
         if self.errors:
-            click.echo("\nErrors encountered ({}):".format(len(self.errors)))
+            self.echo("\nErrors encountered ({}):".format(len(self.errors)))
             for error in self.errors:
-                click.echo(f"  - {error}")
+                self.echo(f"  - {error}")
+
+    def _chains(self):
+        """Order the plans so that every new number is free by the time it is written.
+
+        Returns the plans that can be written right away, and a mapping from each plan to the
+        plan waiting for the number it currently holds. Plans waiting on each other in a cycle
+        (numbers being swapped) get an extra move parking one invoice on a temporary number.
+        """
+        dependents = {}
+        waiting = set()
+        for plan, holder in self._holders().items():
+            dependents[holder] = plan
+            waiting.add(plan)
+
+        ready = [plan for plan in self.renumbering_plan if plan not in waiting]
+        chained = set()
+        for plan in ready:
+            while plan is not None and plan not in chained:
+                chained.add(plan)
+                plan = dependents.get(plan)
+
+        # Whatever no chain reaches is part of a cycle
+        for plan in self.renumbering_plan:
+            if plan in chained:
+                continue
+
+            member = plan
+            while member not in chained:
+                chained.add(member)
+                member = dependents[member]
+
+            # The plan that waited for this number now waits for the park, which needs nothing.
+            # The plan itself still waits for the holder of its new number, at the end of the cycle.
+            park = plan.parked()
+            dependents[park] = dependents.pop(plan)
+            ready.append(park)
+
+        return ready, dependents
+
+    def _holders(self):
+        """The plan holding the new number of each plan that has to wait for it to be moved away"""
+        holders = {plan.old_number: plan for plan in self.renumbering_plan}
+        return {
+            plan: holders[plan.new_number]
+            for plan in self.renumbering_plan
+            if holders.get(plan.new_number, plan) is not plan
+        }
+
+    def parks(self):
+        """Plans parked by the first of two phases: those waiting for a number while holding a wanted one"""
+        holders = self._holders()
+        held = set(holders.values())
+        return [plan for plan in self.renumbering_plan if plan in holders and plan in held]
+
+    def _skip_chain(self, plan, dependents, progress=None):
+        """Report the plans that cannot be applied because a number before them is still held"""
+        while plan is not None:
+            if progress is not None:
+                self.echo(f"[{progress()}] {plan.describe()}")
+            error_msg = f"Skipped {plan.old_number}: {plan.new_number} is still in use"
+            self.errors.append(error_msg)
+            self.echo(f"    ✗ {error_msg}")
+            plan = dependents.get(plan)
+
+    def _record_result(self, plan, result):
+        if plan.temporary_number:
+            # Parking is journaled apart, the invoice is only done once it has its final number
+            if self.journal is not None:
+                self.journal.record("parked" if result else "failed", plan.invoice_id, new_number=plan.new_number)
+            if result:
+                self.echo("    ✓ Moved to a temporary number")
+            else:
+                self.errors.append(f"Failed to move {plan.old_number} to a temporary number")
+                self.echo("    ✗ Failed to move to a temporary number")
+            return
+
+        if self.journal is not None:
+            self.journal.record("done" if result else "failed", plan.invoice_id, new_number=plan.new_number)
+
+        if result:
+            self.renumbered_count += 1
+            self.echo("    ✓ Successfully renumbered")
+            if plan.conflict:
+                self.errors.append(f"Renumbered, but {plan.conflict}")
+                self.echo(f"    ! {plan.conflict}")
+        else:
+            self.errors.append(f"Failed to renumber {plan.old_number}")
+            self.echo("    ✗ Failed to renumber")
+
+    def _record_exception(self, plan, e):
+        if self.journal is not None:
+            self.journal.record("failed", plan.invoice_id, error=str(e))
+
+        error_msg = f"Error renumbering {plan.old_number}: {str(e)}"
+        self.errors.append(error_msg)
+        self.echo(f"    ✗ {error_msg}")
+
+    def _renumber_concurrently(self):
+        """Renumber invoices on a pool of workers.
+
+        An invoice is only written once the invoice currently holding its new number has
+        been moved away, so each plan waits on at most one other plan. Its GET is prefetched
+        as soon as that holder is submitted, leaving only the PUT on the critical path
+        (in minimal mode there is no GET to prefetch). When the longest chain would still
+        outlast everything else, see _renumber_in_two_phases.
+        """
+        two_phases = self.two_phases()
+        parks = self.parks() if two_phases else []
+        ready, dependents = self._chains()
+        if two_phases:
+            total = len(self.renumbering_plan) + len(parks)
+        else:
+            total = len(self.renumbering_plan) + sum(1 for plan in ready if plan.temporary_number)
+        completed = 0
+
+        def progress():
+            nonlocal completed
+            completed += 1
+            return f"{completed}/{total}"
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="renumber") as executor:
+            if two_phases:
+                self._renumber_in_two_phases(executor, parks, progress)
+            else:
+                self._run_moves(executor, ready, dependents, progress)
+
+    def _renumber_in_two_phases(self, executor, parks, progress):
+        """Renumber without waiting along chains, which are made a move at a time and leave workers idle.
+
+        The first phase parks every invoice that waits for a number while holding one that is
+        wanted, and writes the final numbers that are free already. Every number is then free,
+        so the second phase writes all remaining final numbers in parallel as well. This takes
+        an extra PUT per parked invoice, its GET is not repeated.
+        """
+        holders = self._holders()
+        parks = {plan: plan.parked() for plan in parks}
+        first = [parks.get(plan, plan) for plan in self.renumbering_plan if plan in parks or plan not in holders]
+        results = self._run_moves(executor, first, {}, progress)
+        if self.stopped:
+            return
+
+        # Parked invoices get their final number on the copy loaded for the park
+        loaded = set()
+        for plan, park in parks.items():
+            if results.get(park) and not self.minimal:
+                plan.invoice = park.invoice
+                loaded.add(plan)
+
+        second = [plan for plan in self.renumbering_plan if plan in holders]
+        dependents = {}
+        skipped = []
+        for plan in second:
+            holder = holders[plan]
+            if results.get(parks.get(holder, holder)):
+                continue
+            if holder in parks:
+                # The holder could not be parked, so it has to get its final number first
+                dependents[holder] = plan
+            else:
+                skipped.append(plan)
+
+        waiting = set(dependents.values()) | set(skipped)
+        ready = [plan for plan in second if plan not in waiting]
+        reached = set()
+        for plan in ready + skipped:
+            while plan is not None:
+                reached.add(plan)
+                plan = dependents.get(plan)
+
+        for plan in skipped:
+            self._skip_chain(plan, dependents, progress)
+        # Invoices that could not be parked and wait on each other in a cycle
+        for plan in second:
+            if plan not in reached:
+                self._skip_chain(plan, {}, progress)
+
+        finals = self._run_moves(executor, ready, dependents, progress, loaded)
+        stranded = [plan for plan, park in parks.items() if results.get(park) and not finals.get(plan)]
+        if stranded and not self.stopped:
+            self.errors.append(f"{len(stranded)} invoices left on temporary numbers, finish with --resume")
+
+    def _run_moves(self, executor, ready, dependents, progress, loaded=()):
+        """Make the moves of chains starting at ``ready`` on the executor, each once the one before it succeeded.
+
+        Plans in ``loaded`` already hold their full invoice and only need the PUT. Returns the
+        result of each move made, by plan.
+        """
+        loads = {}
+        running = {}
+        results = {}
+        # Plans whose move was reserved when their GET was prefetched
+        reserved = set()
+
+        def move_calls(plan):
+            return 1 if plan in loaded else self.move_calls
+
+        def submit(plan):
+            reserved.discard(plan)
+            load = loads.pop(plan, None)
+            if plan in loaded:
+                future = executor.submit(plan.apply, self.invoice_manager)
+            elif load is None:
+                future = executor.submit(plan.save, self.invoice_manager, self.minimal)
+            else:
+                future = executor.submit(lambda: load.result() and plan.apply(self.invoice_manager))
+            running[future] = plan
+
+            dependent = dependents.get(plan)
+            if (
+                dependent is not None
+                and not self.minimal
+                and dependent not in loaded
+                and self._reserve(move_calls(dependent), wait=False)
+            ):
+                reserved.add(dependent)
+                loads[dependent] = executor.submit(dependent.load, self.invoice_manager)
+
+        # Moves waiting for a worker, or for budget, continuing chains first
+        pending = deque(ready)
+
+        def start_moves():
+            # Moves are started while workers are free; when the budget is used up the
+            # running moves finish before waiting for the next opening, or stopping
+            while pending and len(running) < self.workers:
+                if pending[0] not in reserved and not self._reserve(move_calls(pending[0]), wait=not running):
+                    return
+                submit(pending.popleft())
+
+        start_moves()
+        while running:
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                plan = running.pop(future)
+                self._release(move_calls(plan))
+                self.echo(f"[{progress()}] {plan.describe()}")
+                try:
+                    result = future.result()
+                    self._record_result(plan, result)
+                except Exception as e:
+                    result = None
+                    self._record_exception(plan, e)
+                results[plan] = result
+
+                dependent = dependents.get(plan)
+                if dependent is None:
+                    continue
+                if result:
+                    pending.appendleft(dependent)
+                    continue
+
+                # The number is still held, so nothing further down this chain can be applied
+                load = loads.pop(dependent, None)
+                if dependent in reserved:
+                    reserved.discard(dependent)
+                    # Its prefetched GET may still be running
+                    calls = move_calls(dependent)
+                    if load is None:
+                        self._release(calls)
+                    else:
+                        load.add_done_callback(lambda _, calls=calls: self._release(calls))
+                self._skip_chain(dependent, dependents, progress)
+
+            start_moves()
+
+        return results
+
+
+def show_strategies(report, start_number, selected, file=None):
+    """Dry-run cost of every renumbering strategy"""
+    old = [report.values[i] for i in report.order]
+    dates = [report.dates[i] for i in report.order]
+
+    click.echo("\nRenumbering strategies:", file=file)
+    for strategy, description in STRATEGIES.items():
+        new = report.renumbering(start_number, strategy)
+        moves = sum(1 for old_value, new_value in zip(old, new) if old_value != new_value)
+        swaps = count_cycles(old, new)
+        marker = "*" if strategy == selected else " "
+        click.echo(
+            f" {marker} {strategy:10s} {moves + swaps:7d} writes ({swaps} temporary), "
+            f"{count_out_of_order(new, dates)} out of date order: {description}",
+            file=file,
+        )
+
+
+def show_estimate(renumberer):
+    """API calls, time and days of API budget the renumbering plan is expected to take"""
+    estimate = renumberer.estimate()
+    per_minute = renumberer.invoice_manager.client.rate_limit_per_minute or settings.RATE_LIMIT_PER_MINUTE
+    workers = renumberer.workers
+    calls = ", ".join(f"{count} {label.split(' ', 1)[0]}" for label, count in estimate.calls.items())
+    spent = sum(estimate.spent.values())
+
+    renumberer.echo(
+        f"\nEstimated API calls: {estimate.total} ({calls})" + (f", after {spent} listing" if spent else "")
+    )
+    if all(estimate.history.latency(label) is not None for label in estimate.calls):
+        basis = "the latency of earlier runs"
+    else:
+        basis = f"{settings.PLANNER_DEFAULT_LATENCY * 1000:.0f} ms per call where no latency was measured yet"
+    seconds = estimate.seconds(workers, per_minute)
+    longest = renumberer.critical_path()
+    two_phases = renumberer.two_phases()
+    if workers > 1 and not two_phases:
+        # Moves along a chain are made one at a time, only their GETs are prefetched
+        seconds = max(seconds, longest * estimate.latency("PUT invoices/{id}"))
+    renumberer.echo(
+        f"Estimated time: {format_duration(seconds)} with {workers} worker(s) "
+        f"and {per_minute} calls per minute, from {basis}"
+    )
+    if two_phases:
+        renumberer.echo(
+            f"Longest chain: {longest} moves, renumbering in two phases "
+            f"with {len(renumberer.parks())} invoices parked on temporary numbers first"
+        )
+    elif workers > 1 and longest > 1:
+        renumberer.echo(f"Longest chain: {longest} moves, made one after the other")
+        if longest > estimate.total / workers:
+            renumberer.echo("More workers will not make it faster, see --two-phase")
+
+    if renumberer.schedule is None:
+        return
+    calls_per_second = estimate.calls_per_second(workers, per_minute)
+    days = renumberer.schedule.days(estimate.total, calls_per_second, step=renumberer.move_calls)
+    if len(days) == 1:
+        renumberer.echo("Fits in today's API budget")
+    else:
+        renumberer.echo(f"Needs {len(days)} days of API budget, calls per day: {', '.join(str(day) for day in days)}")
+        renumberer.echo(
+            "--fix stops when today's budget is used up (continue with --resume), --spread waits for the next day"
+        )
+
+
+def journaled_values(job, plans, prefix, suffix):
+    """Numeric values the invoices of a journaled job had in the prefix/suffix series, by invoice ID"""
+    if job is None or (job["prefix"], job["suffix"]) != (prefix, suffix):
+        return {}
+
+    values = {}
+    for plan in plans:
+        value = plan.get("old_numeric_index")
+        if value is None:
+            record = parse_number(plan["old_number"], prefix, suffix)
+            value = record.value if record else None
+        if value is not None:
+            values[plan["invoice_id"]] = value
+    return values
+
+
+def open_mirror(org_id, file=None):
+    """The local mirror of an organization, warning when invoices deleted since its last full sync may be in it"""
+    mirror = InvoiceMirror(settings.MIRROR_FILE, org_id)
+    age = mirror.full_sync_age()
+    if age is None:
+        click.echo(
+            "Warning: the local mirror was never fully synced, run zoho invoices sync --full first", file=file
+        )
+    elif age >= timedelta(hours=settings.MIRROR_FULL_SYNC_HOURS):
+        click.echo(
+            f"Warning: the local mirror was last fully synced {format_duration(age.total_seconds())} ago, "
+            "invoices deleted since are still in it and the gaps they left are not reported "
+            "(run zoho invoices sync)",
+            file=file,
+        )
+    return mirror
+
+
+def show_series_report(report, file=None):
+    if report.gaps:
+        click.echo(f"\nGaps found ({len(report.gaps)}, missing {report.missing_count} numbers):", file=file)
+        for gap_start, gap_end in report.gaps:
+            missing_count = gap_end - gap_start - 1
+            click.echo(f"  {gap_start} → {gap_end} (missing {missing_count} numbers)", file=file)
+    else:
+        click.echo("\nNo gaps found in numbering.", file=file)
+
+    if report.duplicates:
+        click.echo(f"\nDuplicate numbers ({len(report.duplicates)}):", file=file)
+        for first, second in report.duplicates:
+            click.echo(f"  {first} / {second}", file=file)
+
+    if report.out_of_order:
+        click.echo(f"\nNumbers dated before the previous number ({len(report.out_of_order)}):", file=file)
+        for number, date, previous_number, previous_date in report.out_of_order:
+            click.echo(f"  {number} ({date}) after {previous_number} ({previous_date})", file=file)
+
+
+def show_organizations_summary(results):
+    """One line per organization of a report-gaps run over several organizations"""
+    click.echo("\n" + "=" * 50)
+    click.echo(
+        f"{'Organization':20s} {'Invoices':>8s} {'Gaps':>6s} {'Missing':>8s} {'Dupes':>6s} "
+        f"{'Order':>6s} {'Renumber':>8s}"
+    )
+    for result in results:
+        if result.error is not None:
+            click.echo(f"{result.org_id:20s} failed: {result.error}")
+            continue
+
+        renumberer = result.result
+        reports = list(renumberer.series.values()) if renumberer.series is not None else [renumberer.report]
+        renumber = len(renumberer.renumbering_plan) if renumberer.renumbering_plan is not None else "-"
+        click.echo(
+            f"{result.org_id:20s} {sum(report.count for report in reports):8d} "
+            f"{sum(len(report.gaps) for report in reports):6d} {sum(report.missing_count for report in reports):8d} "
+            f"{sum(len(report.duplicates) for report in reports):6d} "
+            f"{sum(len(report.out_of_order) for report in reports):6d} {renumber:>8}"
+        )
 
 
 @click.command()
@@ -197,23 +914,188 @@ class InvoiceRenumberer:
     default=False,
     help="Fix the gaps by renumbering the invoices",
 )
-def report_gaps(from_number, to_number, prefix, suffix, start_number, fix):
+@click.option("--concurrency", type=int, default=4, help="Number of invoice pages to fetch in parallel")
+@click.option("--workers", type=int, default=1, help="Number of invoices to renumber in parallel with --fix")
+@click.option(
+    "--two-phase",
+    type=click.Choice(["auto", "on", "off"]),
+    default="auto",
+    show_default=True,
+    help="With --workers, park chained invoices on temporary numbers first so that long chains run in parallel",
+)
+@click.option("--local", is_flag=True, default=False, help="Analyze the local mirror instead of listing from the API")
+@click.option("--all-series", is_flag=True, default=False, help="Report on every numbering series, ignoring --prefix")
+@click.option(
+    "--minimal",
+    is_flag=True,
+    default=False,
+    help="With --fix, send only the new number instead of fetching and re-sending each invoice",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    default=False,
+    help="Continue the last interrupted --fix run from its journal, without listing invoices again",
+)
+@click.option(
+    "--discard-journal",
+    is_flag=True,
+    default=False,
+    help="With --fix, start over even though the last --fix run is unfinished, instead of --resume",
+)
+@click.option(
+    "--strategy",
+    type=click.Choice(list(STRATEGIES)),
+    default="sequential",
+    show_default=True,
+    help="How gaps are closed: keep the order, follow invoice dates, or move the fewest invoices",
+)
+@click.option(
+    "--orgs",
+    "--org",
+    "orgs",
+    help='Analyze several organizations at once: comma separated IDs, or "all"',
+)
+@click.option(
+    "--daily-budget",
+    type=click.IntRange(min=2),
+    default=None,
+    help="API calls --fix may use per day, all that is left by default",
+)
+@click.option("--window", help="Only renumber within this daily time window, e.g. 22:00-06:00")
+@click.option(
+    "--spread",
+    is_flag=True,
+    default=False,
+    help="Wait for the next day or window when the budget is used up, instead of stopping",
+)
+def report_gaps(
+    from_number,
+    to_number,
+    prefix,
+    suffix,
+    start_number,
+    fix,
+    concurrency,
+    workers,
+    two_phase,
+    local,
+    all_series,
+    minimal,
+    resume,
+    discard_journal,
+    strategy,
+    orgs,
+    daily_budget,
+    window,
+    spread,
+):
     """Report gaps in invoice numbering."""
     if start_number is None:
         start_number = from_number
 
+    try:
+        window = parse_window(window) if window else None
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--window")
+
+    if discard_journal and (not fix or resume):
+        raise click.UsageError("--discard-journal only applies to --fix without --resume")
+
+    if orgs:
+        if fix or resume:
+            raise click.UsageError("--fix and --resume renumber one organization at a time, use --org-id")
+
+        def analyze(org_id, org_client, output):
+            renumberer = InvoiceRenumberer(
+                InvoiceManager(org_client),
+                start_number=start_number,
+                prefix=prefix,
+                suffix=suffix,
+                from_number=from_number,
+                to_number=to_number,
+                concurrency=concurrency,
+                source=open_mirror(org_id, output) if local else None,
+                strategy=strategy,
+                output=output,
+            )
+            if all_series:
+                renumberer.analyze_all_series()
+            else:
+                renumberer.analyze_invoice_numbering()
+            return renumberer
+
+        def show(result):
+            click.echo(f"\n{'=' * 20} Organization {result.org_id} {'=' * 20}")
+            click.echo(result.output, nl=False)
+            if result.error is not None:
+                click.echo(f"✗ {result.error}")
+
+        # Organizations are analyzed concurrently, each report is shown once it is complete
+        results = fan_out(resolve_orgs(orgs), analyze, capture_output=True, on_done=show)
+        show_organizations_summary(results)
+        return
+
     invoice_manager = InvoiceManager()
-    renumberer = InvoiceRenumberer(invoice_manager,
-            start_number=start_number,
-            prefix=prefix,
-            suffix=suffix,
-            from_number=from_number,
-            to_number=to_number,
+    journal = RenumberingJournal(Path(settings.JOURNAL_DIR) / f"renumber-{settings.org_id}.jsonl")
+    parked = {}
+    if journal.exists() and not resume:
+        job, plans, done = journal.read()
+        remaining = sum(1 for plan in plans if plan["invoice_id"] not in done)
+        if fix and remaining and not discard_journal:
+            raise click.ClickException(
+                f"The renumbering job started {job['started_at']} is unfinished, with {remaining} of "
+                f"{len(plans)} invoices left, some possibly parked on temporary numbers. "
+                "Continue it with --resume, or start over with --discard-journal"
+            )
+        # Invoices it left on temporary numbers are renumbered again from the place they had
+        parked = journaled_values(job, plans, prefix, suffix)
+    # Writes are fitted into what Zoho says is left of today's quota, and the given budget and window
+    schedule = Schedule(
+        per_day=daily_budget,
+        window=window,
+        remaining=lambda: (invoice_manager.client.api_budget() or {}).get("day"),
+    )
+    renumberer = InvoiceRenumberer(
+        invoice_manager,
+        start_number=start_number,
+        prefix=prefix,
+        suffix=suffix,
+        from_number=from_number,
+        to_number=to_number,
+        concurrency=concurrency,
+        workers=workers,
+        source=open_mirror(settings.org_id) if local else None,
+        minimal=minimal,
+        journal=journal if fix or resume else None,
+        strategy=strategy,
+        schedule=schedule,
+        spread=spread,
+        two_phase=two_phase,
+        parked=parked,
     )
 
     click.echo("Zoho Books Invoice Renumbering Tool")
     click.echo("=" * 50)
 
+    if all_series:
+        renumberer.analyze_all_series()
+        return
+
+    if resume:
+        if not journal.exists():
+            raise click.ClickException(f"No renumbering journal found at {journal.path}")
+
+        click.echo("\n1. Loading the interrupted renumbering plan...")
+        renumberer.resume()
+
+        click.echo("\n2. Resuming renumbering process...")
+        renumberer.renumber_invoices()
+
+        click.echo("\n" + "=" * 50)
+        click.echo("Process completed!")
+        return
+
     # First, analyze current numbering
     click.echo("\n1. Analyzing current invoice numbering...")
     renumberer.analyze_invoice_numbering()
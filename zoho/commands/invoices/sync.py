@@ -0,0 +1,39 @@
+"""
+Sync command for the local Zoho Books invoice mirror
+"""
+
+import click
+from datetime import timedelta
+
+from ...managers import InvoiceManager
+from ...mirror import InvoiceMirror
+from ...settings import settings
+
+
+@click.command()
+@click.option(
+    "--full",
+    is_flag=True,
+    default=False,
+    help="Download every invoice again and drop deleted ones, done every MIRROR_FULL_SYNC_HOURS anyway",
+)
+@click.option("--concurrency", type=int, default=4, help="Number of invoice pages to fetch in parallel")
+def sync(full, concurrency):
+    """Sync invoices modified since the last run into the local mirror."""
+
+    full_after = timedelta(hours=settings.MIRROR_FULL_SYNC_HOURS)
+    with InvoiceMirror(settings.MIRROR_FILE, settings.org_id) as mirror:
+        state = mirror.sync_state()
+        age = mirror.full_sync_age()
+        if full or state is None or age is None or age >= full_after:
+            full = True
+            click.echo("Fetching all invoices...")
+        else:
+            click.echo(f"Fetching invoices modified since {state['last_modified_time'] or state['synced_at']}...")
+
+        synced, deleted = mirror.sync(InvoiceManager(), full=full, concurrency=concurrency)
+
+        click.echo(
+            f"Synced {synced} invoices" + (f", removed {deleted} deleted" if deleted else "")
+            + f", {mirror.count()} invoices in {mirror.path}"
+        )
@@ -0,0 +1,244 @@
+"""
+Watch command for Zoho Books invoice numbering
+"""
+
+import click
+import hmac
+import json
+import queue
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from ...managers import InvoiceManager, InvoiceQuery
+from ...mirror import parse_timestamp
+from ...numbering import GapTracker
+
+# Fields of the listed invoices the tracker needs
+WATCHED_FIELDS = ("invoice_id", "invoice_number", "last_modified_time")
+
+
+class InvoiceWatcher:
+    """Keeps the numbering series of an organization in memory and reports when their gaps change.
+
+    The series are listed once, then only invoices modified since the latest modification seen
+    are fetched on every poll, and webhook events are applied as they arrive.
+    """
+
+    def __init__(self, invoice_manager, prefix=None, suffix=None, concurrency=4, output_json=False):
+        self.invoice_manager = invoice_manager
+        self.prefix = prefix
+        self.suffix = suffix
+        self.concurrency = concurrency
+        self.output_json = output_json
+        self.tracker = GapTracker(prefix, suffix)
+        self.since = None
+        self._since_parsed = None
+
+    def _seen(self, invoice):
+        modified = parse_timestamp(invoice.get("last_modified_time"))
+        if modified and (self._since_parsed is None or modified > self._since_parsed):
+            self.since, self._since_parsed = invoice["last_modified_time"], modified
+
+    def _seen_all(self, invoices):
+        for invoice in invoices:
+            self._seen(invoice)
+            yield invoice
+
+    def load(self):
+        """List every invoice of the watched series, replacing the tracked state.
+
+        Gaps that differ from the previous state are reported as changes, so a reload also
+        catches invoices deleted since, which polling cannot see.
+        """
+        first = not self.tracker.numbers
+        query = InvoiceQuery(self.invoice_manager).numbers(self.prefix, self.suffix)
+        self.tracker.rebuild(self._seen_all(query.iter_invoices(concurrency=self.concurrency, fields=WATCHED_FIELDS)))
+        if first:
+            # The initial gaps are the baseline, not a change
+            self.tracker.changes()
+        return self
+
+    def poll(self):
+        """Apply invoices created or modified since the last poll, returning how many were listed"""
+        # Not filtered by number, so that invoices renumbered out of a series are seen too
+        query = InvoiceQuery(self.invoice_manager).modified(self.since)
+        count = 0
+        for invoice in query.iter_invoices(concurrency=1, fields=WATCHED_FIELDS):
+            self.tracker.update(invoice)
+            self._seen(invoice)
+            count += 1
+        return count
+
+    def apply(self, event):
+        """Apply a webhook event, ("updated", invoice) or ("deleted", invoice)"""
+        kind, invoice = event
+        if kind == "deleted":
+            self.tracker.remove(invoice["invoice_id"])
+        else:
+            self.tracker.update(invoice)
+            self._seen(invoice)
+
+    def summary(self):
+        gaps = sum(len(series.gaps) for series in self.tracker.series.values())
+        return f"Watching {len(self.tracker.numbers)} invoices in {len(self.tracker.series)} series, {gaps} gaps"
+
+    def report(self):
+        """Show the gaps opened and closed since the last report, if any"""
+        opened, closed = self.tracker.changes()
+        if not opened and not closed:
+            return False
+
+        now = datetime.now().isoformat(timespec="seconds")
+        if self.output_json:
+            click.echo(
+                json.dumps(
+                    {
+                        "time": now,
+                        "opened": [{"prefix": key[0], "suffix": key[1], "gap": list(gap)} for key, gap in opened],
+                        "closed": [{"prefix": key[0], "suffix": key[1], "gap": list(gap)} for key, gap in closed],
+                        "gaps": len(self.tracker.gaps()),
+                    }
+                )
+            )
+            return True
+
+        for key, (start, end) in opened:
+            click.echo(f"[{now}] {key[0]}#{key[1]}: gap {start} → {end} opened (missing {end - start - 1} numbers)")
+        for key, (start, end) in closed:
+            click.echo(f"[{now}] {key[0]}#{key[1]}: gap {start} → {end} closed")
+        return True
+
+    def run(self, interval=60, full_every=0, events=None, max_ticks=None):
+        """Poll every ``interval`` seconds (never with 0) and apply ``events`` from a queue as they come.
+
+        Every ``full_every`` polls the series are listed again instead. A failing poll is reported
+        and retried on the next tick.
+        """
+        ticks = 0
+        next_tick = time.monotonic() + interval
+        while max_ticks is None or ticks < max_ticks:
+            wait = max(next_tick - time.monotonic(), 0) if interval else None
+            if events is not None:
+                try:
+                    self.apply(events.get(timeout=wait))
+                    while True:
+                        self.apply(events.get_nowait())
+                except queue.Empty:
+                    pass
+            elif wait:
+                time.sleep(wait)
+
+            if interval and time.monotonic() >= next_tick:
+                ticks += 1
+                next_tick = max(next_tick + interval, time.monotonic())
+                try:
+                    if full_every and ticks % full_every == 0:
+                        self.load()
+                    else:
+                        self.poll()
+                except Exception as e:
+                    click.echo(f"Poll failed: {e}", err=True)
+
+            self.report()
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    """Queues invoice webhooks from Zoho Books.
+
+    The body is the invoice as JSON, either bare or under "invoice", or a form with a JSONString
+    field. Deleted invoices are sent to the URL with ``?event=deleted``.
+    """
+
+    events = None
+    secret = None
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+
+        token = self.headers.get("X-Webhook-Token") or query.get("token") or ""
+        if self.secret and not hmac.compare_digest(token.encode(), self.secret.encode()):
+            return self._reply(401, {"code": 1, "message": "Invalid webhook token"})
+
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        try:
+            if self.headers.get("Content-Type", "").startswith("application/x-www-form-urlencoded"):
+                body = parse_qs(body.decode())["JSONString"][-1]
+            payload = json.loads(body)
+        except (KeyError, ValueError):
+            payload = None
+        invoice = payload.get("invoice", payload) if isinstance(payload, dict) else None
+        if not isinstance(invoice, dict) or "invoice_id" not in invoice:
+            return self._reply(400, {"code": 2, "message": "Expected an invoice"})
+
+        self.events.put(("deleted" if query.get("event") == "deleted" else "updated", invoice))
+        self._reply(200, {"code": 0, "message": "success"})
+
+    def _reply(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_webhook_server(address, events, secret=None):
+    """Serve WebhookHandler on "host:port" from a daemon thread"""
+    host, _, port = address.rpartition(":")
+    handler = type("Handler", (WebhookHandler,), {"events": events, "secret": secret})
+    server = ThreadingHTTPServer((host or "127.0.0.1", int(port)), handler)
+    threading.Thread(target=server.serve_forever, name="webhooks", daemon=True).start()
+    return server
+
+
+@click.command()
+@click.option("--prefix", default=None, help="Only watch numbers with this prefix, every series by default")
+@click.option("--suffix", default=None, help="Only watch numbers with this suffix")
+@click.option(
+    "--interval",
+    type=int,
+    default=60,
+    show_default=True,
+    help="Seconds between polls, 0 to only use webhooks",
+)
+@click.option(
+    "--full-every",
+    type=int,
+    default=0,
+    help="List the series again every N polls, to notice deleted invoices without webhooks",
+)
+@click.option("--listen", help="Accept Zoho Books invoice webhooks on host:port, e.g. 127.0.0.1:8765")
+@click.option("--webhook-secret", envvar="ZOHO_WEBHOOK_SECRET", help="Token webhooks must send")
+@click.option("--concurrency", type=int, default=4, help="Number of invoice pages to fetch in parallel")
+@click.option("--json", "output_json", is_flag=True, default=False, help="Print changes as JSON lines")
+def watch(prefix, suffix, interval, full_every, listen, webhook_secret, concurrency, output_json):
+    """Watch invoice numbering and report gaps as they open or close."""
+    if not interval and not listen:
+        raise click.UsageError("--interval 0 needs --listen, otherwise nothing would be watched")
+
+    watcher = InvoiceWatcher(
+        InvoiceManager(), prefix=prefix, suffix=suffix, concurrency=concurrency, output_json=output_json
+    )
+    watcher.load()
+    click.echo(watcher.summary(), err=output_json)
+    for key, (start, end) in sorted(watcher.tracker.gaps()):
+        click.echo(f"  {key[0]}#{key[1]}: {start} → {end} (missing {end - start - 1} numbers)", err=output_json)
+
+    events = None
+    if listen:
+        events = queue.Queue()
+        server = start_webhook_server(listen, events, webhook_secret)
+        click.echo(f"Accepting webhooks on http://{server.server_address[0]}:{server.server_address[1]}/", err=True)
+
+    try:
+        watcher.run(interval=interval, full_every=full_every, events=events)
+    except KeyboardInterrupt:
+        click.echo(watcher.summary(), err=True)
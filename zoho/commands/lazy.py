@@ -0,0 +1,34 @@
+"""
+Click group that imports its subcommands only when they are used
+"""
+
+import importlib
+
+import click
+
+
+class LazyGroup(click.Group):
+    """Group whose subcommands are given as "module:attribute" import paths.
+
+    A subcommand's module is imported the first time the command is looked up, so running one
+    command does not pay for importing every other command and its dependencies.
+    """
+
+    def __init__(self, *args, lazy_subcommands=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_subcommands = lazy_subcommands or {}
+
+    def list_commands(self, ctx):
+        return sorted({*super().list_commands(ctx), *self.lazy_subcommands})
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name not in self.commands and cmd_name in self.lazy_subcommands:
+            self.add_command(self._load(cmd_name), cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+    def _load(self, cmd_name):
+        module_name, attribute = self.lazy_subcommands[cmd_name].split(":")
+        command = getattr(importlib.import_module(module_name), attribute)
+        if not isinstance(command, click.Command):
+            raise ValueError(f"{self.lazy_subcommands[cmd_name]} is not a click command")
+        return command
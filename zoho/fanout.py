@@ -0,0 +1,85 @@
+"""
+Running a command against several Zoho Books organizations at once
+"""
+
+import io
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .client import Client, client as default_client
+from .settings import settings
+
+
+def resolve_orgs(spec):
+    """Organization IDs from "a,b,c", or every organization the credentials can access for "all" """
+    if spec.strip().lower() == "all":
+        organizations = default_client.get("organizations").get("organizations") or []
+        org_ids = [organization["organization_id"] for organization in organizations]
+    else:
+        org_ids = [org_id.strip() for org_id in spec.split(",") if org_id.strip()]
+    return list(dict.fromkeys(org_ids))
+
+
+class OrganizationError(Exception):
+    """Zoho answered the calls made for an organization with errors"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__("; ".join(f"Error {code}: {entry['error']}" for code, entry in errors.items()))
+
+
+class OrgResult:
+    __slots__ = ("org_id", "result", "error", "output")
+
+    def __init__(self, org_id, result=None, error=None, output=""):
+        self.org_id = org_id
+        self.result = result
+        self.error = error
+        self.output = output
+
+
+def fan_out(org_ids, func, workers=None, capture_output=False, on_done=None):
+    """Call ``func(org_id, client)`` for every organization concurrently.
+
+    Every organization gets its own Client, and so its own token and rate limit budget, kept in
+    the default client's ``org_clients`` for the budget report. The response cache and request
+    metrics are shared with the default client so that --cache and --stats cover all of them. With
+    ``capture_output`` the call is ``func(org_id, client, output)`` and what it writes to ``output``
+    is kept in its OrgResult instead of interleaving. An organization fails when ``func`` raises
+    or when Zoho answered any of its calls with an error, such as an invalid organization.
+    ``on_done(result)`` is called from the calling thread as each organization finishes.
+    Returns the OrgResults in the order of ``org_ids``; a failing organization does not stop the others.
+    """
+
+    def run(org_id):
+        org_client = Client(org_id=org_id, cache=default_client.cache)
+        org_client.metrics = default_client.metrics
+        org_client.hooks = default_client.hooks
+        default_client.org_clients[org_id] = org_client
+        result = OrgResult(org_id)
+        output = io.StringIO() if capture_output else None
+        try:
+            if output is None:
+                result.result = func(org_id, org_client)
+            else:
+                result.result = func(org_id, org_client, output)
+            if org_client.errors:
+                result.error = OrganizationError(org_client.errors)
+        except Exception as e:
+            result.error = e
+        finally:
+            if output is not None:
+                result.output = output.getvalue()
+            org_client.close()
+        return result
+
+    results = {}
+    with ThreadPoolExecutor(
+        max_workers=workers or settings.FANOUT_WORKERS, thread_name_prefix="organizations"
+    ) as executor:
+        for future in as_completed([executor.submit(run, org_id) for org_id in org_ids]):
+            result = future.result()
+            results[result.org_id] = result
+            if on_done is not None:
+                on_done(result)
+
+    return [results[org_id] for org_id in org_ids]
@@ -0,0 +1,20 @@
+"""
+Files shared between CLI invocations, written so that concurrent runs never see them half written
+"""
+
+import json
+import os
+import tempfile
+
+
+def write_json(path, data, prefix=".tmp-"):
+    """Write ``data`` as JSON to a private temporary file next to ``path`` and swap it in"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=prefix)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
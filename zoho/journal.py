@@ -0,0 +1,108 @@
+"""
+Append-only journal of renumbering jobs, used to resume interrupted runs
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+
+
+class RenumberingJournal:
+    """JSON lines journal holding a renumbering plan and per-invoice progress.
+
+    The first line describes the job, followed by one ``plan`` entry per invoice and then
+    ``done`` / ``failed`` entries as invoices are processed. Entries are flushed as they are
+    written and fsynced in batches, every ``sync_every`` entries or ``sync_interval`` seconds.
+    """
+
+    def __init__(self, path, sync_every=50, sync_interval=1.0):
+        self.path = Path(path).expanduser()
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self._file = None
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+
+    def exists(self):
+        return self.path.exists()
+
+    def start(self, job, plans):
+        """Begin a new journal, replacing any previous one"""
+        self.close()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "w", encoding="utf-8")
+
+        self._write({"type": "job", **job})
+        for plan in plans:
+            self._write({"type": "plan", **plan})
+        self.sync()
+
+    def read(self):
+        """The job, its plan entries and the IDs already done, without touching the journal"""
+        return self._read()[:3]
+
+    def _read(self):
+        job, plans, done = None, [], set()
+        # End of the last complete entry, where appending resumes
+        end = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                # A torn write at the end of an interrupted run
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                end += len(line)
+
+                kind = entry.pop("type")
+                if kind == "job":
+                    job = entry
+                elif kind == "plan":
+                    plans.append(entry)
+                elif kind == "done":
+                    done.add(entry["invoice_id"])
+        return job, plans, done, end
+
+    def resume(self):
+        """Load the job, its plan entries and the IDs already done, and keep appending to the journal"""
+        job, plans, done, end = self._read()
+
+        self.close()
+        # Drop the torn entry, or the next one would be appended to it and lost with it
+        os.truncate(self.path, end)
+        self._file = open(self.path, "a", encoding="utf-8")
+        return job, plans, done
+
+    def record(self, kind, invoice_id, **extra):
+        self._write({"type": kind, "invoice_id": invoice_id, **extra})
+
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every or time.monotonic() - self._synced_at >= self.sync_interval:
+            self.sync()
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+
+    def sync(self):
+        if self._file is None:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+
+    def close(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
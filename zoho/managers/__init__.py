@@ -1,5 +1,18 @@
+from .base import ResourceManager, UpdateResult
+from .bills import BillManager
+from .contacts import ContactManager
+from .credit_notes import CreditNoteManager
 from .invoices import InvoiceManager
+from .items import ItemManager
+from .query import InvoiceQuery
 
 __all__ = [
+    "BillManager",
+    "ContactManager",
+    "CreditNoteManager",
     "InvoiceManager",
+    "InvoiceQuery",
+    "ItemManager",
+    "ResourceManager",
+    "UpdateResult",
 ]
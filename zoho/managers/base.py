@@ -0,0 +1,360 @@
+import asyncio
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from ..async_client import AsyncClient, async_client as default_async_client
+from ..client import client as default_client
+from ..codec import record_type
+
+
+class UpdateResult:
+    """Outcome of one update of a bulk update: the updated record, or the message of what stopped it"""
+
+    __slots__ = ("record_id", "record", "error")
+
+    def __init__(self, record_id, record=None, error=None):
+        self.record_id = record_id
+        self.record = record
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class ResourceManager:
+    """Listing, fetching and updating of one Zoho Books resource type.
+
+    Subclasses name the endpoint and the keys Zoho wraps records in; pagination, page
+    prefetching, minimal and bulk updates and their async variants are shared.
+    """
+
+    # e.g. "invoices", the list endpoint and the key holding a page of records
+    endpoint = None
+    collection_key = None
+    # e.g. "invoice", the key holding a single record, and its ID field
+    resource_key = None
+    id_field = None
+    # Field identifying a record in progress messages
+    label_field = None
+    # Class name of the compact records listings yield when given fields
+    record_name = "Record"
+
+    # Fields returned by Zoho that shouldn't be sent in an update
+    READ_ONLY_FIELDS = []
+    # Fields Zoho sets itself on every write, which never match what was sent
+    SERVER_MANAGED_FIELDS = ("created_time", "last_modified_time", "last_modified_by_id")
+
+    def __init__(self, client=None, async_client=None):
+        # The shared clients by default, or those of one organization when working on several
+        self.client = client or default_client
+        if async_client is None:
+            async_client = AsyncClient(client) if client is not None else default_async_client
+        self.async_client = async_client
+
+    def _label(self, record, record_id=None):
+        return record.get(self.label_field) or record.get(self.id_field, record_id)
+
+    def list(self, params=None, fields=None):
+        """List records with optional filtering, across all pages"""
+        return list(self.iter_records(params, fields=fields))
+
+    def _records(self, response, fields):
+        """The records of a page, as dicts or as compact records of only the given fields"""
+        records = response.get(self.collection_key, [])
+        if fields is None:
+            return records
+        make_record = record_type(fields, self.record_name)
+        return [make_record(record) for record in records]
+
+    def iter_records(self, params=None, per_page=200, concurrency=1, fields=None):
+        """Lazily iterate over records, in server sort order.
+
+        With concurrency > 1, up to that many following pages are fetched in parallel
+        while the current page is being consumed. With ``fields``, records are read-only
+        mappings of only those fields, which take a fraction of the memory of full dicts.
+        """
+        if concurrency > 1:
+            yield from self._iter_records_prefetched(params, per_page, concurrency, fields)
+            return
+
+        page = 1
+        while True:
+            response = self._get_page(params, page, per_page)
+            yield from self._records(response, fields)
+
+            if not response.get("page_context", {}).get("has_more_page"):
+                return
+            page += 1
+
+    def _get_page(self, params, page, per_page):
+        """Fetch a single page of records"""
+        params = dict(params or {})
+        params["page"] = page
+        params["per_page"] = per_page
+        return self.client.get(self.endpoint, params=params)
+
+    def _iter_records_prefetched(self, params, per_page, concurrency, fields=None):
+        """Fetch pages with a bounded thread pool and yield them back in page order"""
+        response = self._get_page(params, 1, per_page)
+        yield from self._records(response, fields)
+
+        page_context = response.get("page_context", {})
+        if not page_context.get("has_more_page"):
+            return
+
+        # Zoho only reports the page count on some endpoints, otherwise only the page
+        # after the last one said to have more is known to exist.
+        total_pages = page_context.get("total_pages")
+
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f"{self.endpoint}-pages")
+        pending = deque()
+        page = 1
+        next_page = 2
+        try:
+            while True:
+                while len(pending) < concurrency and next_page <= self._last_page_to_fetch(page, total_pages):
+                    pending.append(executor.submit(self._get_page, params, next_page, per_page))
+                    next_page += 1
+
+                if not pending:
+                    return
+
+                response = pending.popleft().result()
+                page += 1
+                yield from self._records(response, fields)
+
+                if not response.get("page_context", {}).get("has_more_page"):
+                    return
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _last_page_to_fetch(page, total_pages):
+        """The last page worth requesting once ``page`` reported more pages.
+
+        Without a page count, speculate one page past the next, so a short listing costs
+        at most one wasted request.
+        """
+        return total_pages if total_pages is not None else page + 2
+
+    def get(self, record_id):
+        """Get a specific record by ID"""
+        response = self.client.get(f"{self.endpoint}/{record_id}")
+        return response.get(self.resource_key)
+
+    def _get_safely(self, record_id):
+        try:
+            return self.get(record_id)
+        except Exception as e:
+            print(f"{record_id}: {e}")
+            return None
+
+    def iter_details(self, records, workers=8, cached=None):
+        """Fetch the full record of every listed record, yielding (listed, full) in listing order.
+
+        Listings only hold summaries, so each record is fetched on its own, up to ``workers`` at
+        once. Listing is consumed only a few records ahead of the fetches, a record listed twice is
+        fetched once, and ``cached(listed)`` may return the full record to skip fetching it.
+        ``full`` is None when the record could not be fetched.
+        """
+        seen = set()
+        pending = deque()
+        window = max(workers, 1) * 2
+        executor = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix=f"{self.endpoint}-details")
+        try:
+            for listed in records:
+                record_id = listed[self.id_field]
+                if record_id in seen:
+                    continue
+                seen.add(record_id)
+
+                full = cached(listed) if cached is not None else None
+                if full is not None:
+                    future = Future()
+                    future.set_result(full)
+                else:
+                    future = executor.submit(self._get_safely, record_id)
+                pending.append((listed, future))
+
+                while pending and (len(pending) >= window or pending[0][1].done()):
+                    listed, future = pending.popleft()
+                    yield listed, future.result()
+
+            while pending:
+                listed, future = pending.popleft()
+                yield listed, future.result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def update(self, record, params=None, changed=None):
+        """Update a record.
+
+        ``changed`` names the fields this update is meant to change, which are the ones checked
+        when verifying a failed attempt; every field sent is checked by default.
+        """
+        # Remove fields that shouldn't be sent in update
+        for field in self.READ_ONLY_FIELDS:
+            record.pop(field, None)
+
+        response = self.client.put(
+            f"{self.endpoint}/{record[self.id_field]}",
+            record,
+            params=params,
+            verify=lambda: self._verify_update(record, changed),
+        )
+        print(f"{self._label(record)}({response.get('code', 0)}): {response.get('message', '')}")
+        return response.get(self.resource_key)
+
+    def update_fields(self, record_id, fields, params=None):
+        """Update only the given fields of a record, without fetching it first"""
+        return self._put_fields(record_id, fields, params).get(self.resource_key)
+
+    def _put_fields(self, record_id, fields, params=None):
+        payload = dict(fields)
+        response = self.client.put(
+            f"{self.endpoint}/{record_id}",
+            payload,
+            params=params,
+            verify=lambda: self._verify_update({self.id_field: record_id, **payload}),
+        )
+        print(f"{self._label(payload, record_id)}({response.get('code', 0)}): {response.get('message', '')}")
+        return response
+
+    def bulk_update(self, updates, params=None, workers=4):
+        """Apply (record_id, fields) updates, returning an UpdateResult per update in the same order.
+
+        Zoho Books has no batch endpoint for editing fields, so updates are sent as minimal PUTs
+        in parallel over the shared connection pool. A failing update does not stop the others.
+        """
+        executor = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix=f"{self.endpoint}-updates")
+        with executor:
+            futures = [
+                executor.submit(self._update_fields_result, record_id, fields, params) for record_id, fields in updates
+            ]
+            return [future.result() for future in futures]
+
+    def _update_fields_result(self, record_id, fields, params=None):
+        try:
+            response = self._put_fields(record_id, fields, params)
+        except Exception as e:
+            print(f"{record_id}: {e}")
+            return UpdateResult(record_id, error=str(e))
+        return self._update_result(record_id, response)
+
+    def _update_result(self, record_id, response):
+        if response.get("code", 0) != 0:
+            return UpdateResult(record_id, error=response.get("message", "Unknown error"))
+        return UpdateResult(record_id, record=response.get(self.resource_key))
+
+    def _verify_update(self, record, changed=None):
+        """Check whether an update that failed in transit was applied anyway"""
+        return self._verified_response(record, self.get(record[self.id_field]), changed)
+
+    def _verified_response(self, record, current, changed=None):
+        if not current:
+            return None
+
+        for field in changed if changed is not None else record:
+            if field in self.SERVER_MANAGED_FIELDS or field not in record or field not in current:
+                continue
+            value = record[field]
+            if isinstance(value, (str, int, float, bool)) and current[field] != value:
+                return None
+
+        return {"code": 0, "message": "Update verified after a failed attempt", self.resource_key: current}
+
+    async def iter_records_async(self, params=None, per_page=200, concurrency=1, fields=None):
+        """Asynchronously iterate over records in server sort order, keeping up to ``concurrency`` pages in flight"""
+        response = await self._get_page_async(params, 1, per_page)
+        for record in self._records(response, fields):
+            yield record
+
+        if not response.get("page_context", {}).get("has_more_page"):
+            return
+
+        total_pages = response.get("page_context", {}).get("total_pages")
+        pending = deque()
+        page = 1
+        next_page = 2
+        try:
+            while True:
+                while len(pending) < max(concurrency, 1) and next_page <= self._last_page_to_fetch(page, total_pages):
+                    pending.append(asyncio.ensure_future(self._get_page_async(params, next_page, per_page)))
+                    next_page += 1
+
+                if not pending:
+                    return
+
+                response = await pending.popleft()
+                page += 1
+                for record in self._records(response, fields):
+                    yield record
+
+                if not response.get("page_context", {}).get("has_more_page"):
+                    return
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _get_page_async(self, params, page, per_page):
+        params = dict(params or {})
+        params["page"] = page
+        params["per_page"] = per_page
+        return await self.async_client.get(self.endpoint, params=params)
+
+    async def list_async(self, params=None, concurrency=1, fields=None):
+        """List records with optional filtering, across all pages"""
+        return [record async for record in self.iter_records_async(params, concurrency=concurrency, fields=fields)]
+
+    async def get_async(self, record_id):
+        """Get a specific record by ID"""
+        response = await self.async_client.get(f"{self.endpoint}/{record_id}")
+        return response.get(self.resource_key)
+
+    async def update_async(self, record, params=None, changed=None):
+        """Update a record, see update"""
+        for field in self.READ_ONLY_FIELDS:
+            record.pop(field, None)
+
+        response = await self.async_client.put(
+            f"{self.endpoint}/{record[self.id_field]}",
+            record,
+            params=params,
+            verify=lambda: self._verify_update_async(record, changed),
+        )
+        print(f"{self._label(record)}({response.get('code', 0)}): {response.get('message', '')}")
+        return response.get(self.resource_key)
+
+    async def update_fields_async(self, record_id, fields, params=None):
+        """Update only the given fields of a record, without fetching it first"""
+        return (await self._put_fields_async(record_id, fields, params)).get(self.resource_key)
+
+    async def _put_fields_async(self, record_id, fields, params=None):
+        payload = dict(fields)
+        response = await self.async_client.put(
+            f"{self.endpoint}/{record_id}",
+            payload,
+            params=params,
+            verify=lambda: self._verify_update_async({self.id_field: record_id, **payload}),
+        )
+        print(f"{self._label(payload, record_id)}({response.get('code', 0)}): {response.get('message', '')}")
+        return response
+
+    async def bulk_update_async(self, updates, params=None, concurrency=4):
+        """Apply (record_id, fields) updates with up to ``concurrency`` in flight, see bulk_update"""
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+        async def update(record_id, fields):
+            async with semaphore:
+                try:
+                    response = await self._put_fields_async(record_id, fields, params)
+                except Exception as e:
+                    print(f"{record_id}: {e}")
+                    return UpdateResult(record_id, error=str(e))
+            return self._update_result(record_id, response)
+
+        return await asyncio.gather(*(update(record_id, fields) for record_id, fields in updates))
+
+    async def _verify_update_async(self, record, changed=None):
+        return self._verified_response(record, await self.get_async(record[self.id_field]), changed)
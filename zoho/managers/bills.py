@@ -0,0 +1,17 @@
+from .base import ResourceManager
+
+
+class BillManager(ResourceManager):
+    """Manages Zoho Books bills"""
+
+    endpoint = "bills"
+    collection_key = "bills"
+    resource_key = "bill"
+    id_field = "bill_id"
+    label_field = "bill_number"
+
+    READ_ONLY_FIELDS = [
+        "billing_address",
+        "contact_persons_details",
+        "bill_url",
+    ]
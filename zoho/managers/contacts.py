@@ -0,0 +1,18 @@
+from .base import ResourceManager
+
+
+class ContactManager(ResourceManager):
+    """Manages Zoho Books contacts (customers and vendors)"""
+
+    endpoint = "contacts"
+    collection_key = "contacts"
+    resource_key = "contact"
+    id_field = "contact_id"
+    label_field = "contact_name"
+
+    READ_ONLY_FIELDS = [
+        "outstanding_receivable_amount",
+        "outstanding_payable_amount",
+        "unused_credits_receivable_amount",
+        "unused_credits_payable_amount",
+    ]
@@ -0,0 +1,17 @@
+from .base import ResourceManager
+
+
+class CreditNoteManager(ResourceManager):
+    """Manages Zoho Books credit notes"""
+
+    endpoint = "creditnotes"
+    collection_key = "creditnotes"
+    resource_key = "creditnote"
+    id_field = "creditnote_id"
+    label_field = "creditnote_number"
+
+    READ_ONLY_FIELDS = [
+        "billing_address",
+        "shipping_address",
+        "contact_persons_details",
+    ]
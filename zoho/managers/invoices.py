@@ -1,39 +1,32 @@
-from ..client import client
+from .base import ResourceManager
 
-class InvoiceManager():
-    """Manages Zoho Books invoices"""
-
-    def list(self, params=None):
-        """List invoices with optional filtering"""
-        response = client.get("invoices", params=params)
-        return response.get("invoices", [])
 
-    def get(self, invoice_id):
-        """Get a specific invoice by ID"""
-        response = client.get(f"invoices/{invoice_id}")
-        return response.get("invoice")
+class InvoiceManager(ResourceManager):
+    """Manages Zoho Books invoices"""
 
-    def update(self, invoice, params=None):
-        """Update an invoice"""
-        # Remove fields that shouldn't be sent in update
-        fields_to_remove = [
-            "tax_treatment",
-            "billing_address",
-            "shipping_address",
-            "shipping_charge_account_id",
-            "customer_default_billing_address",
-            "contact_persons_details",
-            "contact",
-            "invoice_url",
-            "qr_code",
-            "sales_channel",
-            "transaction_rounding_type",
-            "zcrm_potential_name",
-        ]
+    endpoint = "invoices"
+    collection_key = "invoices"
+    resource_key = "invoice"
+    id_field = "invoice_id"
+    label_field = "invoice_number"
+    record_name = "InvoiceRecord"
 
-        for field in fields_to_remove:
-            invoice.pop(field, None)
+    # Fields returned by Zoho that shouldn't be sent in an update
+    READ_ONLY_FIELDS = [
+        "tax_treatment",
+        "billing_address",
+        "shipping_address",
+        "shipping_charge_account_id",
+        "customer_default_billing_address",
+        "contact_persons_details",
+        "contact",
+        "invoice_url",
+        "qr_code",
+        "sales_channel",
+        "transaction_rounding_type",
+        "zcrm_potential_name",
+    ]
 
-        response = client.put(f"invoices/{invoice['invoice_id']}", invoice, params=params)
-        print(f"{invoice['invoice_number']}({response.get('code', 0)}): {response.get('message', '')}")
-        return response.get("invoice")
+    # Listing sources (this manager, the local mirror) are iterated with iter_invoices
+    iter_invoices = ResourceManager.iter_records
+    iter_invoices_async = ResourceManager.iter_records_async
@@ -0,0 +1,11 @@
+from .base import ResourceManager
+
+
+class ItemManager(ResourceManager):
+    """Manages Zoho Books items"""
+
+    endpoint = "items"
+    collection_key = "items"
+    resource_key = "item"
+    id_field = "item_id"
+    label_field = "name"
@@ -0,0 +1,169 @@
+"""
+Request metrics collected from Client hooks
+"""
+
+import json
+import re
+import threading
+from bisect import bisect_left
+
+# Latency histogram bucket upper bounds, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float("inf"))
+
+ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def endpoint_label(endpoint):
+    """Collapse resource IDs so that e.g. invoices/123 and invoices/456 share one series"""
+    return ID_SEGMENT.sub("/{id}", endpoint)
+
+
+class EndpointMetrics:
+    __slots__ = ("calls", "errors", "bytes_out", "bytes_in", "retries", "throttled", "cache_hits", "buckets", "total")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.retries = 0
+        self.throttled = 0
+        self.cache_hits = 0
+        self.buckets = [0] * len(BUCKETS)
+        self.total = 0.0
+
+    def quantile(self, q):
+        """Estimate a latency quantile by interpolating within its histogram bucket"""
+        if not self.calls:
+            return None
+
+        rank = q * self.calls
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            if count and seen + count >= rank:
+                lower = BUCKETS[i - 1] if i else 0.0
+                upper = BUCKETS[i] if BUCKETS[i] != float("inf") else lower * 2 or 1.0
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return BUCKETS[-2]
+
+
+class Metrics:
+    """Thread-safe per-endpoint counters and latency histograms.
+
+    Instances are Client hooks: they are called with an event name and its data.
+    """
+
+    def __init__(self):
+        self.endpoints = {}
+        self._lock = threading.Lock()
+
+    def _endpoint(self, method, endpoint):
+        label = f"{method} {endpoint_label(endpoint)}"
+        metrics = self.endpoints.get(label)
+        if metrics is None:
+            metrics = self.endpoints[label] = EndpointMetrics()
+        return metrics
+
+    def __call__(self, event, data):
+        with self._lock:
+            metrics = self._endpoint(data["method"], data["endpoint"])
+            if event == "request":
+                metrics.calls += 1
+                if data["status"] is None or data["status"] >= 400:
+                    metrics.errors += 1
+                metrics.bytes_out += data["bytes_out"]
+                metrics.bytes_in += data["bytes_in"]
+                metrics.total += data["elapsed"]
+                metrics.buckets[bisect_left(BUCKETS, data["elapsed"])] += 1
+            elif event == "retry":
+                metrics.retries += 1
+            elif event == "throttle":
+                metrics.throttled += 1
+            elif event == "cache_hit":
+                metrics.cache_hits += 1
+
+    @property
+    def empty(self):
+        return not self.endpoints
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                label: {
+                    "calls": metrics.calls,
+                    "errors": metrics.errors,
+                    "retries": metrics.retries,
+                    "throttled": metrics.throttled,
+                    "cache_hits": metrics.cache_hits,
+                    "bytes_out": metrics.bytes_out,
+                    "bytes_in": metrics.bytes_in,
+                    "latency_seconds": {
+                        "total": metrics.total,
+                        "p50": metrics.quantile(0.5),
+                        "p95": metrics.quantile(0.95),
+                        "p99": metrics.quantile(0.99),
+                    },
+                }
+                for label, metrics in sorted(self.endpoints.items())
+            }
+
+    def to_json(self):
+        return json.dumps(self.as_dict(), indent=2)
+
+    def to_prometheus(self):
+        """Prometheus text exposition format"""
+        lines = []
+
+        def counter(name, help_text, attribute):
+            lines.append(f"# HELP zoho_api_{name} {help_text}")
+            lines.append(f"# TYPE zoho_api_{name} counter")
+            for label, metrics in sorted(self.endpoints.items()):
+                method, endpoint = label.split(" ", 1)
+                value = getattr(metrics, attribute)
+                lines.append(f'zoho_api_{name}{{method="{method}",endpoint="{endpoint}"}} {value}')
+
+        with self._lock:
+            counter("requests_total", "API requests sent.", "calls")
+            counter("errors_total", "API requests that failed or returned an HTTP error.", "errors")
+            counter("retries_total", "API requests retried after a transient failure.", "retries")
+            counter("throttled_total", "API requests throttled by Zoho.", "throttled")
+            counter("cache_hits_total", "GET requests served from the response cache.", "cache_hits")
+            counter("sent_bytes_total", "Request body bytes sent.", "bytes_out")
+            counter("received_bytes_total", "Response body bytes received.", "bytes_in")
+
+            lines.append("# HELP zoho_api_request_duration_seconds API request latency.")
+            lines.append("# TYPE zoho_api_request_duration_seconds histogram")
+            for label, metrics in sorted(self.endpoints.items()):
+                method, endpoint = label.split(" ", 1)
+                labels = f'method="{method}",endpoint="{endpoint}"'
+                cumulative = 0
+                for bound, count in zip(BUCKETS, metrics.buckets):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'zoho_api_request_duration_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f"zoho_api_request_duration_seconds_sum{{{labels}}} {metrics.total}")
+                lines.append(f"zoho_api_request_duration_seconds_count{{{labels}}} {metrics.calls}")
+
+        return "\n".join(lines) + "\n"
+
+    def to_text(self):
+        """Human readable summary table"""
+        rows = self.as_dict()
+        lines = [
+            f"{'Endpoint':32s} {'Calls':>6s} {'Errors':>6s} {'Retry':>5s} {'Thrtl':>5s} {'Cache':>5s} "
+            f"{'p50 ms':>7s} {'p95 ms':>7s} {'p99 ms':>7s} {'KB out':>8s} {'KB in':>8s}",
+            "-" * 107,
+        ]
+
+        def ms(value):
+            return f"{value * 1000:7.0f}" if value is not None else f"{'-':>7s}"
+
+        for label, row in rows.items():
+            latency = row["latency_seconds"]
+            lines.append(
+                f"{label[:32]:32s} {row['calls']:6d} {row['errors']:6d} {row['retries']:5d} {row['throttled']:5d} "
+                f"{row['cache_hits']:5d} {ms(latency['p50'])} {ms(latency['p95'])} {ms(latency['p99'])} "
+                f"{row['bytes_out'] / 1024:8.1f} {row['bytes_in'] / 1024:8.1f}"
+            )
+        return "\n".join(lines)
@@ -0,0 +1,243 @@
+"""
+Local SQLite mirror of Zoho Books invoices
+"""
+
+import json
+import sqlite3
+from datetime import datetime, timezone
+from itertools import islice
+from pathlib import Path
+
+from .codec import record_type
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS invoices (
+    org_id TEXT NOT NULL,
+    invoice_id TEXT NOT NULL,
+    invoice_number TEXT,
+    date TEXT,
+    status TEXT,
+    customer_name TEXT,
+    last_modified_time TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (org_id, invoice_id)
+);
+CREATE INDEX IF NOT EXISTS invoices_number ON invoices (org_id, invoice_number);
+CREATE TABLE IF NOT EXISTS invoice_details (
+    org_id TEXT NOT NULL,
+    invoice_id TEXT NOT NULL,
+    last_modified_time TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (org_id, invoice_id)
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    org_id TEXT PRIMARY KEY,
+    last_modified_time TEXT,
+    synced_at TEXT NOT NULL,
+    full_synced_at TEXT
+);
+"""
+
+# Columns that can be sorted on when reading from the mirror
+SORT_COLUMNS = {"invoice_number", "date", "customer_name", "last_modified_time"}
+
+
+def parse_timestamp(value):
+    """Parse a Zoho timestamp such as 2024-01-15T10:30:00+0530"""
+    try:
+        return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S%z")
+    except (TypeError, ValueError):
+        return None
+
+
+class InvoiceMirror:
+    """Invoices of one organization kept in a local SQLite database"""
+
+    def __init__(self, path, org_id):
+        self.path = Path(path).expanduser()
+        self.org_id = org_id or ""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.executescript(SCHEMA)
+
+        # Mirrors created before full syncs were tracked
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(sync_state)")}
+        if "full_synced_at" not in columns:
+            with self.connection:
+                self.connection.execute("ALTER TABLE sync_state ADD COLUMN full_synced_at TEXT")
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def sync_state(self):
+        """Last seen modification time, and when the last sync and the last full sync finished"""
+        row = self.connection.execute(
+            "SELECT last_modified_time, synced_at, full_synced_at FROM sync_state WHERE org_id = ?", (self.org_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"last_modified_time": row[0], "synced_at": row[1], "full_synced_at": row[2]}
+
+    def full_sync_age(self):
+        """Time since deleted invoices were last removed by a full sync, None if there never was one"""
+        state = self.sync_state()
+        if state is None or not state["full_synced_at"]:
+            return None
+        return datetime.now(timezone.utc) - datetime.fromisoformat(state["full_synced_at"])
+
+    def count(self):
+        return self.connection.execute("SELECT COUNT(*) FROM invoices WHERE org_id = ?", (self.org_id,)).fetchone()[0]
+
+    def upsert(self, invoices):
+        """Insert or replace invoices, returning how many were written"""
+        with self.connection:
+            return self._upsert(invoices)
+
+    def _upsert(self, invoices):
+        rows = [
+            (
+                self.org_id,
+                invoice["invoice_id"],
+                invoice.get("invoice_number"),
+                invoice.get("date"),
+                invoice.get("status"),
+                invoice.get("customer_name"),
+                invoice.get("last_modified_time"),
+                json.dumps(invoice),
+            )
+            for invoice in invoices
+        ]
+        self.connection.executemany("INSERT OR REPLACE INTO invoices VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def cached_details(self, invoice_id, last_modified_time):
+        """The full invoice stored by store_details, if it was not modified since"""
+        if not last_modified_time:
+            return None
+        row = self.connection.execute(
+            "SELECT data FROM invoice_details WHERE org_id = ? AND invoice_id = ? AND last_modified_time = ?",
+            (self.org_id, invoice_id, last_modified_time),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def store_details(self, invoices):
+        """Keep full invoices, with their line items, for cached_details"""
+        rows = [
+            (self.org_id, invoice["invoice_id"], invoice.get("last_modified_time"), json.dumps(invoice))
+            for invoice in invoices
+        ]
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO invoice_details VALUES (?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def sync(self, invoice_manager, full=False, concurrency=1, batch_size=500):
+        """Fetch invoices modified since the last sync (or all of them) into the mirror.
+
+        Listing modified invoices never shows deleted ones, so a full sync lists every invoice and
+        drops those no longer listed. It runs in a single transaction, so a failed listing leaves
+        the mirror as it was. Returns how many invoices were synced and deleted.
+        """
+        state = self.sync_state()
+        since = None if full or state is None else state["last_modified_time"]
+
+        params = {}
+        if since:
+            params["last_modified_time"] = since
+
+        latest, latest_parsed = since, parse_timestamp(since)
+        synced = deleted = 0
+        listed = set()
+
+        # Incremental batches are committed as they come, a full sync all at once
+        with self.connection:
+            invoices = invoice_manager.iter_invoices(params, concurrency=concurrency)
+            while True:
+                batch = list(islice(invoices, batch_size))
+                if not batch:
+                    break
+
+                synced += self._upsert(batch)
+                if full:
+                    listed.update(invoice["invoice_id"] for invoice in batch)
+                else:
+                    self.connection.commit()
+                for invoice in batch:
+                    modified = parse_timestamp(invoice.get("last_modified_time"))
+                    if modified and (latest_parsed is None or modified > latest_parsed):
+                        latest, latest_parsed = invoice["last_modified_time"], modified
+
+            now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+            full_synced_at = state and state["full_synced_at"]
+            if full:
+                deleted = self._delete_unlisted(listed)
+                full_synced_at = now
+            self.connection.execute(
+                "INSERT OR REPLACE INTO sync_state (org_id, last_modified_time, synced_at, full_synced_at) "
+                "VALUES (?, ?, ?, ?)",
+                (self.org_id, latest, now, full_synced_at),
+            )
+        return synced, deleted
+
+    def _delete_unlisted(self, listed):
+        rows = self.connection.execute("SELECT invoice_id FROM invoices WHERE org_id = ?", (self.org_id,))
+        mirrored = {invoice_id for (invoice_id,) in rows}
+        gone = [(self.org_id, invoice_id) for invoice_id in mirrored - listed]
+        self.connection.executemany("DELETE FROM invoices WHERE org_id = ? AND invoice_id = ?", gone)
+        self.connection.executemany("DELETE FROM invoice_details WHERE org_id = ? AND invoice_id = ?", gone)
+        return len(gone)
+
+    def iter_invoices(self, params=None, fields=None, **kwargs):
+        """Iterate over mirrored invoices, understanding the listing parameters used by the commands.
+
+        With ``fields``, invoices are compact records of only those fields, as from InvoiceManager.
+        """
+        params = params or {}
+        where = ["org_id = ?"]
+        args = [self.org_id]
+
+        if params.get("status"):
+            where.append("status = ?")
+            args.append(params["status"])
+        if params.get("customer_id"):
+            where.append("json_extract(data, '$.customer_id') = ?")
+            args.append(params["customer_id"])
+        if params.get("customer_name"):
+            where.append("customer_name = ?")
+            args.append(params["customer_name"])
+        if params.get("date_start"):
+            where.append("date >= ?")
+            args.append(params["date_start"])
+        if params.get("date_end"):
+            where.append("date <= ?")
+            args.append(params["date_end"])
+        if params.get("last_modified_time"):
+            where.append("last_modified_time >= ?")
+            args.append(params["last_modified_time"])
+        if params.get("invoice_number_startswith"):
+            where.append("substr(invoice_number, 1, ?) = ?")
+            args += [len(params["invoice_number_startswith"]), params["invoice_number_startswith"]]
+        if params.get("invoice_number_contains"):
+            where.append("instr(invoice_number, ?) > 0")
+            args.append(params["invoice_number_contains"])
+
+        sort_column = params.get("sort_column") if params.get("sort_column") in SORT_COLUMNS else "invoice_number"
+        sort_order = "DESC" if params.get("sort_order") == "D" else "ASC"
+
+        cursor = self.connection.execute(
+            f"SELECT data FROM invoices WHERE {' AND '.join(where)} ORDER BY {sort_column} {sort_order}", args
+        )
+        if fields is None:
+            for (data,) in cursor:
+                yield json.loads(data)
+            return
+
+        make_record = record_type(fields, "InvoiceRecord")
+        for (data,) in cursor:
+            yield make_record(json.loads(data))
@@ -0,0 +1,402 @@
+"""
+Invoice number parsing and gap analysis across numbering series
+"""
+
+import re
+from array import array
+from bisect import bisect_left
+
+DIGITS = re.compile(r"\d+")
+
+# Ways of closing the gaps of a series, see SeriesReport.renumbering
+STRATEGIES = {
+    "sequential": "keep the current order, moving every invoice after the first gap",
+    "date": "number invoices in date order, swapping through temporary numbers where needed",
+    "fill": "move the fewest invoices, the last ones into the gaps, without keeping date order",
+}
+
+
+class NumberRecord:
+    """An invoice number split into series prefix, numeric counter and series suffix"""
+
+    __slots__ = ("prefix", "value", "width", "suffix")
+
+    def __init__(self, prefix, value, width, suffix):
+        self.prefix = prefix
+        self.value = value
+        self.width = width
+        self.suffix = suffix
+
+    @property
+    def series(self):
+        return (self.prefix, self.suffix)
+
+    def format(self, value):
+        return f"{self.prefix}{value:0{self.width}d}{self.suffix}"
+
+
+def parse_number(number, prefix=None, suffix=None, counters=None):
+    """Parse an invoice number, or return None if it holds no counter.
+
+    With a known prefix and suffix they are stripped and the first run of digits is the
+    counter. Otherwise the counter is the run of digits ``counters`` (see find_counters) names
+    for numbers of this shape, or else the longest run, preferring the last one, so fiscal-year
+    parts such as INV/24-25/0001 end up in the series key.
+    """
+    if not number:
+        return None
+
+    if prefix is not None or suffix is not None:
+        prefix, suffix = prefix or "", suffix or ""
+        match = DIGITS.search(number.replace(prefix, "").replace(suffix, ""))
+        if not match:
+            return None
+        return NumberRecord(prefix, int(match.group()), len(match.group()), suffix)
+
+    matches = list(DIGITS.finditer(number))
+    if not matches:
+        return None
+
+    index = counters.get(number_shape(number)) if counters else None
+    if index is not None:
+        counter = matches[index]
+    else:
+        counter = max(reversed(matches), key=lambda match: len(match.group()))
+    return NumberRecord(number[: counter.start()], int(counter.group()), len(counter.group()), number[counter.end():])
+
+
+def number_shape(number):
+    """A number with its runs of digits replaced by #, e.g. INV-#-# for INV-0001-2024"""
+    return DIGITS.sub("#", number)
+
+
+def find_counters(numbers):
+    """Which run of digits is the counter, for every shape of number in a listing.
+
+    The counter is the run taking the most distinct values among numbers of the same shape, so
+    INV-0001-2024 and INV-0002-2024 count in their first run while a fiscal year stays in the
+    series key. Shapes where no single run varies most are left out of the returned
+    {shape: run index}, leaving them to the default of parse_number.
+    """
+    values = {}
+    for number in numbers:
+        runs = DIGITS.findall(number or "")
+        if not runs:
+            continue
+        distinct = values.get(number_shape(number))
+        if distinct is None:
+            distinct = values[number_shape(number)] = [set() for _ in runs]
+        for seen, run in zip(distinct, runs):
+            seen.add(int(run))
+
+    counters = {}
+    for shape, distinct in values.items():
+        counts = [len(seen) for seen in distinct]
+        most = max(counts)
+        if counts.count(most) == 1:
+            counters[shape] = counts.index(most)
+    return counters
+
+
+class SeriesReport:
+    """Gaps, duplicates and out-of-order dates within one numbering series"""
+
+    def __init__(self, prefix, suffix):
+        self.prefix = prefix
+        self.suffix = suffix
+        self.values = array("q")
+        self.numbers = []
+        self.dates = []
+
+        self.order = []
+        self.gaps = []
+        self.duplicates = []
+        self.out_of_order = []
+
+    @property
+    def count(self):
+        return len(self.values)
+
+    @property
+    def first(self):
+        return self.values[self.order[0]] if self.count else None
+
+    @property
+    def last(self):
+        return self.values[self.order[-1]] if self.count else None
+
+    @property
+    def missing_count(self):
+        return sum(end - start - 1 for start, end in self.gaps)
+
+    def add(self, value, number, date):
+        self.values.append(value)
+        self.numbers.append(number)
+        self.dates.append(date or "")
+
+    def analyze(self):
+        """Sort the series once and collect gaps, duplicates and numbers dated before their predecessor"""
+        values, dates = self.values, self.dates
+        self.order = order = sorted(range(len(values)), key=lambda i: (values[i], dates[i]))
+        self.gaps, self.duplicates, self.out_of_order = [], [], []
+
+        for previous, current in zip(order, order[1:]):
+            step = values[current] - values[previous]
+            if step == 0:
+                self.duplicates.append((self.numbers[previous], self.numbers[current]))
+                continue
+
+            if step > 1:
+                self.gaps.append((values[previous], values[current]))
+            if dates[current] < dates[previous]:
+                self.out_of_order.append(
+                    (self.numbers[current], dates[current], self.numbers[previous], dates[previous])
+                )
+
+        return self
+
+    def renumbering(self, start, strategy="sequential"):
+        """New values closing every gap from ``start``, for the invoices in ``order``"""
+        values, dates, order = self.values, self.dates, self.order
+        count = len(order)
+
+        if strategy == "sequential":
+            return [start + i for i in range(count)]
+
+        if strategy == "date":
+            new = [0] * count
+            ranked = sorted(range(count), key=lambda i: (dates[order[i]], values[order[i]]))
+            for rank, i in enumerate(ranked):
+                new[i] = start + rank
+            return new
+
+        if strategy == "fill":
+            # Invoices already within the final range keep their number, the others fill the holes in order
+            end = start + count
+            new = [None] * count
+            taken = set()
+            for i, index in enumerate(order):
+                value = values[index]
+                if start <= value < end and value not in taken:
+                    new[i] = value
+                    taken.add(value)
+
+            holes = (value for value in range(start, end) if value not in taken)
+            return [value if value is not None else next(holes) for value in new]
+
+        raise ValueError(f"Unknown renumbering strategy {strategy!r}")
+
+
+def count_cycles(old, new):
+    """Number of renumbering cycles, where every invoice waits for a number held by the next one.
+
+    Each cycle needs one extra write, parking an invoice on a temporary number.
+    """
+    holders = {value: i for i, value in enumerate(old) if value != new[i]}
+    state = {}
+    cycles = 0
+    for start in holders.values():
+        i = start
+        while i is not None and i not in state:
+            state[i] = start
+            i = holders.get(new[i])
+        if i is not None and state[i] == start:
+            cycles += 1
+    return cycles
+
+
+def count_out_of_order(new, dates):
+    """Invoices dated before the invoice numbered just below them once renumbered"""
+    ranked = sorted(range(len(new)), key=lambda i: new[i])
+    return sum(1 for previous, current in zip(ranked, ranked[1:]) if dates[current] < dates[previous])
+
+
+def analyze_series(invoices, prefix=None, suffix=None):
+    """Group invoices into numbering series and analyze each series.
+
+    Returns a dict of (prefix, suffix) to SeriesReport, plus the numbers that could not be parsed.
+    """
+    series = {}
+    unparsed = []
+
+    counters = None
+    if prefix is None and suffix is None:
+        # Which part of a number counts depends on the other numbers of its shape
+        invoices = [(invoice.get("invoice_number"), invoice.get("date")) for invoice in invoices]
+        counters = find_counters(number for number, date in invoices)
+    else:
+        invoices = ((invoice.get("invoice_number"), invoice.get("date")) for invoice in invoices)
+
+    for number, date in invoices:
+        record = parse_number(number, prefix, suffix, counters)
+        if record is None:
+            unparsed.append(number)
+            continue
+
+        report = series.get(record.series)
+        if report is None:
+            report = series[record.series] = SeriesReport(record.prefix, record.suffix)
+        report.add(record.value, number, date)
+
+    for report in series.values():
+        report.analyze()
+
+    return series, unparsed
+
+
+class SeriesGaps:
+    """Distinct numbers of one series kept sorted, with the gaps between them"""
+
+    def __init__(self, prefix, suffix):
+        self.prefix = prefix
+        self.suffix = suffix
+        self.values = []
+        self.counts = {}
+        self.gaps = set()
+
+    def _neighbours(self, index):
+        values = self.values
+        previous = values[index - 1] if index > 0 else None
+        following = values[index] if index < len(values) else None
+        return previous, following
+
+    def add(self, value):
+        """Add a number, returning the gaps it opened and closed"""
+        count = self.counts.get(value, 0)
+        self.counts[value] = count + 1
+        if count:
+            return [], []
+
+        index = bisect_left(self.values, value)
+        previous, following = self._neighbours(index)
+        self.values.insert(index, value)
+
+        opened, closed = [], []
+        if previous is not None and following is not None and following - previous > 1:
+            closed.append((previous, following))
+        if previous is not None and value - previous > 1:
+            opened.append((previous, value))
+        if following is not None and following - value > 1:
+            opened.append((value, following))
+        self.gaps.difference_update(closed)
+        self.gaps.update(opened)
+        return opened, closed
+
+    def remove(self, value):
+        """Remove a number, returning the gaps it opened and closed"""
+        count = self.counts.get(value, 0)
+        if count > 1:
+            self.counts[value] = count - 1
+            return [], []
+        if not count:
+            return [], []
+
+        del self.counts[value]
+        index = bisect_left(self.values, value)
+        del self.values[index]
+        previous, following = self._neighbours(index)
+
+        opened, closed = [], []
+        if previous is not None and value - previous > 1:
+            closed.append((previous, value))
+        if following is not None and following - value > 1:
+            closed.append((value, following))
+        if previous is not None and following is not None and following - previous > 1:
+            opened.append((previous, following))
+        self.gaps.difference_update(closed)
+        self.gaps.update(opened)
+        return opened, closed
+
+
+class GapTracker:
+    """Gaps of every numbering series, kept up to date as invoices are created, renumbered or deleted.
+
+    A change costs a bisection in its series rather than a new analysis of every invoice. Gaps
+    opened and closed are collected until ``changes`` is called; a gap opened and closed in
+    between is not reported.
+    """
+
+    def __init__(self, prefix=None, suffix=None):
+        self.prefix = prefix
+        self.suffix = suffix
+        self.series = {}
+        # Invoice ID to the (series, value) it currently holds
+        self.numbers = {}
+        # Counter of every shape of number, learnt from the last full listing without a prefix
+        self.counters = None
+        self._opened = set()
+        self._closed = set()
+
+    def _parse(self, number):
+        if not number:
+            return None
+        # Numbers of other series, e.g. a temporary number, leave the watched series
+        if self.prefix is not None and not number.startswith(self.prefix):
+            return None
+        if self.suffix is not None and not number.endswith(self.suffix):
+            return None
+        return parse_number(number, self.prefix, self.suffix, self.counters)
+
+    def update(self, invoice):
+        """Apply a created or modified invoice"""
+        record = self._parse(invoice.get("invoice_number"))
+        self._move(invoice["invoice_id"], (record.series, record.value) if record else None)
+
+    def remove(self, invoice_id):
+        """Apply a deleted invoice"""
+        self._move(invoice_id, None)
+
+    def _move(self, invoice_id, number):
+        current = self.numbers.get(invoice_id)
+        if current == number:
+            return
+
+        if current is not None:
+            self._record(current[0], *self.series[current[0]].remove(current[1]))
+            del self.numbers[invoice_id]
+
+        if number is not None:
+            series = self.series.get(number[0])
+            if series is None:
+                series = self.series[number[0]] = SeriesGaps(*number[0])
+            self._record(number[0], *series.add(number[1]))
+            self.numbers[invoice_id] = number
+
+    def _record(self, key, opened, closed):
+        for gap in closed:
+            if (key, gap) in self._opened:
+                self._opened.remove((key, gap))
+            else:
+                self._closed.add((key, gap))
+        for gap in opened:
+            if (key, gap) in self._closed:
+                self._closed.remove((key, gap))
+            else:
+                self._opened.add((key, gap))
+
+    def rebuild(self, invoices):
+        """Replace every tracked invoice with a full listing.
+
+        Gaps that differ from what ``changes`` last reported become the new changes, which
+        also covers invoices deleted without notice.
+        """
+        reported = (self.gaps() - self._opened) | self._closed
+        self.series, self.numbers = {}, {}
+        if self.prefix is None and self.suffix is None:
+            invoices = list(invoices)
+            self.counters = find_counters(invoice.get("invoice_number") for invoice in invoices)
+        for invoice in invoices:
+            self.update(invoice)
+        current = self.gaps()
+        self._opened, self._closed = current - reported, reported - current
+        return self
+
+    def gaps(self):
+        """Every gap as (series, (before, after))"""
+        return {(key, gap) for key, series in self.series.items() for gap in series.gaps}
+
+    def changes(self):
+        """Gaps opened and closed since the last call, as sorted lists of (series, (before, after))"""
+        opened, closed = sorted(self._opened), sorted(self._closed)
+        self._opened, self._closed = set(), set()
+        return opened, closed
@@ -0,0 +1,111 @@
+"""
+Streaming writers for listing commands
+"""
+
+import csv
+import json
+
+
+class Writer:
+    """Writes records one at a time, keeping only the projected fields, or whole records without fields"""
+
+    def __init__(self, stream, fields):
+        self.stream = stream
+        self.fields = fields
+        self.count = 0
+
+    def project(self, record):
+        if self.fields is None:
+            return record
+        return {field: record.get(field) for field in self.fields}
+
+    def write(self, record):
+        self.count += 1
+        self._write(self.project(record))
+
+    def _write(self, row):
+        raise NotImplementedError
+
+    def close(self):
+        self.stream.flush()
+
+
+class TextWriter(Writer):
+    """One block of "Label: value" lines per record"""
+
+    labels = {
+        "organization_id": "Organization",
+        "invoice_number": "Number",
+        "customer_name": "Customer",
+        "total": "Amount",
+    }
+
+    def _write(self, row):
+        if self.count == 1:
+            self.stream.write("-" * 80 + "\n")
+        for field, value in row.items():
+            label = self.labels.get(field) or field.replace("_", " ").capitalize()
+            self.stream.write(f"{label}: {'N/A' if value is None else value}\n")
+        self.stream.write("-" * 40 + "\n")
+
+
+class TableWriter(Writer):
+    """Fixed-width columns, so rows can be written before the widest value is known"""
+
+    width = 20
+
+    def __init__(self, stream, fields):
+        super().__init__(stream, fields)
+        self.stream.write(self._line(fields))
+        self.stream.write(self._line("-" * self.width for _ in fields))
+
+    def _line(self, values):
+        return " ".join(f"{str(value)[: self.width]:{self.width}s}" for value in values).rstrip() + "\n"
+
+    def _write(self, row):
+        self.stream.write(self._line("" if value is None else value for value in row.values()))
+
+
+class CsvWriter(Writer):
+    def __init__(self, stream, fields, header=True):
+        super().__init__(stream, fields)
+        self.writer = csv.DictWriter(stream, fieldnames=fields, extrasaction="ignore", lineterminator="\n")
+        # No header when appending to an existing file
+        if header:
+            self.writer.writeheader()
+
+    def _write(self, row):
+        self.writer.writerow(row)
+
+
+class JsonLinesWriter(Writer):
+    def _write(self, row):
+        self.stream.write(json.dumps(row) + "\n")
+
+
+class JsonWriter(Writer):
+    """A JSON array, written element by element"""
+
+    def __init__(self, stream, fields):
+        super().__init__(stream, fields)
+        self.stream.write("[")
+
+    def _write(self, row):
+        self.stream.write(("\n  " if self.count == 1 else ",\n  ") + json.dumps(row))
+
+    def close(self):
+        self.stream.write("\n]\n" if self.count else "]\n")
+        super().close()
+
+
+WRITERS = {
+    "text": TextWriter,
+    "table": TableWriter,
+    "csv": CsvWriter,
+    "jsonl": JsonLinesWriter,
+    "json": JsonWriter,
+}
+
+
+def get_writer(output_format, stream, fields):
+    return WRITERS[output_format](stream, fields)
@@ -0,0 +1,232 @@
+"""
+Planning of bulk commands: the API calls they make, how long they take and how they fit the quota
+"""
+
+import json
+import math
+import threading
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+
+from .files import write_json
+from .settings import settings
+
+
+class LatencyHistory:
+    """Mean latency per endpoint over recent runs, an exponentially weighted average kept on disk"""
+
+    def __init__(self, path=None, weight=0.3):
+        self.path = Path(path or settings.LATENCY_HISTORY_FILE).expanduser()
+        self.weight = weight
+        self.endpoints = self._read()
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self):
+        write_json(self.path, self.endpoints, prefix=".latency-")
+
+    def latency(self, label):
+        """Mean seconds per call of an endpoint such as "PUT invoices/{id}", or None if never measured"""
+        entry = self.endpoints.get(label)
+        return entry["mean"] if entry else None
+
+    def record(self, metrics):
+        """Fold the request latency measured by a run's Metrics into the history"""
+        for label, row in metrics.as_dict().items():
+            if not row["calls"]:
+                continue
+            mean = row["latency_seconds"]["total"] / row["calls"]
+            entry = self.endpoints.get(label)
+            if entry is None:
+                self.endpoints[label] = {"mean": mean, "calls": row["calls"]}
+            else:
+                entry["mean"] += self.weight * (mean - entry["mean"])
+                entry["calls"] += row["calls"]
+        self._write()
+
+
+class Estimate:
+    """API calls a job is expected to make per endpoint, and how long they take.
+
+    Latency comes from the LatencyHistory of earlier runs, or PLANNER_DEFAULT_LATENCY for
+    endpoints never measured. Calls already made, such as the listing a plan was computed
+    from, are kept apart in ``spent``.
+    """
+
+    def __init__(self, history=None):
+        self.history = history if history is not None else LatencyHistory()
+        self.calls = {}
+        self.spent = {}
+
+    def add(self, label, calls, spent=False):
+        counts = self.spent if spent else self.calls
+        counts[label] = counts.get(label, 0) + calls
+        return self
+
+    def add_listing(self, endpoint, records, per_page=200, spent=False):
+        """The page fetches of listing ``records`` records"""
+        return self.add(f"GET {endpoint}", max(math.ceil(records / per_page), 1), spent=spent)
+
+    @property
+    def total(self):
+        return sum(self.calls.values())
+
+    def latency(self, label):
+        measured = self.history.latency(label)
+        return measured if measured is not None else settings.PLANNER_DEFAULT_LATENCY
+
+    def seconds(self, workers=1, per_minute=None):
+        """Expected duration of the remaining calls, made ``workers`` at a time within the per-minute limit"""
+        busy = sum(calls * self.latency(label) for label, calls in self.calls.items())
+        seconds = busy / max(workers, 1)
+        if per_minute:
+            seconds = max(seconds, self.total * 60 / per_minute)
+        return seconds
+
+    def calls_per_second(self, workers=1, per_minute=None):
+        seconds = self.seconds(workers, per_minute)
+        return self.total / seconds if seconds else float("inf")
+
+
+def format_duration(seconds):
+    seconds = int(math.ceil(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+
+
+def parse_window(value):
+    """(start, end) times of a daily window such as "22:00-06:00", which may wrap past midnight"""
+    try:
+        start, end = (time.fromisoformat(part.strip()) for part in value.split("-"))
+    except ValueError as e:
+        raise ValueError(f"Expected a time window such as 22:00-06:00, not {value!r}") from e
+    if start == end:
+        raise ValueError("The time window is empty")
+    return start, end
+
+
+class Schedule:
+    """When a job may make calls: at most ``per_day`` calls a day, optionally only within a daily window.
+
+    ``remaining`` may return the calls Zoho says are left today, which caps the budget too.
+    Work is reserved a move at a time with ``allows`` and ``take``, so that a job stops between
+    two moves instead of failing midway through one once the quota runs out. Calls reserved
+    are in flight until given back with ``release``, and until then Zoho does not count them.
+    """
+
+    def __init__(self, per_day=None, window=None, remaining=None):
+        self.per_day = per_day
+        self.window = window
+        self.remaining = remaining
+        self.day = date.today()
+        self.used_today = 0
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def _roll(self, now):
+        if now.date() != self.day:
+            self.day = now.date()
+            self.used_today = 0
+
+    def in_window(self, now):
+        if self.window is None:
+            return True
+        start, end = self.window
+        if start < end:
+            return start <= now.time() < end
+        return now.time() >= start or now.time() < end
+
+    def window_end(self, now):
+        """When the window ``now`` falls in closes, None without a window"""
+        if self.window is None:
+            return None
+        end = datetime.combine(now.date(), self.window[1])
+        return end if end > now else end + timedelta(days=1)
+
+    def window_seconds(self):
+        """Length of the daily window"""
+        if self.window is None:
+            return 86400
+        start, end = (datetime.combine(date.today(), moment) for moment in self.window)
+        return ((end - start).total_seconds()) % 86400
+
+    def left_today(self, now=None):
+        self._roll(now or datetime.now())
+        left = self.per_day - self.used_today if self.per_day is not None else None
+        reported = self.remaining() if self.remaining is not None else None
+        if reported is not None:
+            reported -= self.in_flight
+            left = reported if left is None else min(left, reported)
+        return left
+
+    def allows(self, calls, seconds=0, now=None):
+        """Whether ``calls`` calls taking ``seconds`` fit in what is left of today and of the window"""
+        now = now or datetime.now()
+        if not self.in_window(now):
+            return False
+        end = self.window_end(now)
+        if end is not None and now + timedelta(seconds=seconds) > end:
+            return False
+
+        left = self.left_today(now)
+        return left is None or calls <= left
+
+    def take(self, calls):
+        with self._lock:
+            self.used_today += calls
+            self.in_flight += calls
+
+    def release(self, calls):
+        """Give back calls reserved with ``take`` once they were made, or will not be"""
+        with self._lock:
+            self.in_flight -= calls
+
+    def next_opening(self, calls=1, now=None):
+        """When ``calls`` calls can be made again: the next day once the budget is spent, or the next window"""
+        now = now or datetime.now()
+        left = self.left_today(now)
+        if left is not None and calls > left:
+            earliest = datetime.combine(now.date() + timedelta(days=1), time())
+        elif self.window is not None and self.in_window(now):
+            # Within the window, but the calls would outlast it
+            earliest = self.window_end(now)
+        else:
+            earliest = now
+        if self.in_window(earliest):
+            return earliest
+        start = datetime.combine(earliest.date(), self.window[0])
+        return start if start >= earliest else start + timedelta(days=1)
+
+    def days(self, calls, calls_per_second, step=1, now=None):
+        """Calls made on each day when ``calls`` calls, reserved ``step`` at a time, are run from ``now``"""
+        now = now or datetime.now()
+        per_day = self.window_seconds() * calls_per_second
+        if self.per_day is not None:
+            per_day = min(per_day, self.per_day)
+        # A day always has room for at least one step, or the job could never finish
+        per_day = max(int(per_day) // step * step, step)
+
+        # Today only has what is left of the budget and of the window
+        today = self.left_today(now)
+        today = per_day if today is None else min(today, per_day)
+        if self.in_window(now):
+            end = self.window_end(now) or datetime.combine(now.date() + timedelta(days=1), time())
+            today = min(today, (end - now).total_seconds() * calls_per_second)
+        else:
+            today = 0
+
+        days = []
+        capacity = max(int(today), 0) // step * step
+        while calls > 0 or not days:
+            days.append(min(calls, capacity))
+            calls -= days[-1]
+            capacity = per_day
+        return days
@@ -0,0 +1,116 @@
+"""
+Client-side rate limiting for the Zoho Books API
+"""
+
+import threading
+import time
+from datetime import date
+
+
+class RateLimitExceeded(Exception):
+    """Raised when the daily API budget has been used up"""
+
+
+class RateLimiter:
+    """Thread-safe token bucket with a per-minute refill and a daily budget.
+
+    The bucket refills continuously at ``per_minute`` calls per minute. When Zoho reports
+    throttling the effective rate is halved and requests pause until the advised time;
+    each successful call then restores a small fraction of the configured rate. The daily
+    budget is ``per_day`` until Zoho reports the calls left (X-Rate-Limit-Remaining).
+    """
+
+    def __init__(self, per_minute, per_day=None):
+        self.per_minute = per_minute
+        self.per_day = per_day
+
+        self.rate = per_minute / 60.0
+        self.tokens = float(per_minute)
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+
+        self.day = date.today()
+        self.used_today = 0
+        self.daily_remaining = None
+        self.throttled_count = 0
+
+        self._lock = threading.Lock()
+
+    @property
+    def max_rate(self):
+        return self.per_minute / 60.0
+
+    def _refill(self, now):
+        self.tokens = min(float(self.per_minute), self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+        if date.today() != self.day:
+            self.day = date.today()
+            self.used_today = 0
+            self.daily_remaining = None
+
+    def _daily_exhausted(self):
+        # Once Zoho has reported what is left today it wins, ``per_day`` only applies until then
+        if self.daily_remaining is not None:
+            return self.daily_remaining <= 0
+        return self.per_day is not None and self.used_today >= self.per_day
+
+    def reserve(self):
+        """Take a token if one is available, otherwise return how many seconds to wait"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+
+            if self._daily_exhausted():
+                raise RateLimitExceeded(f"Daily API budget exhausted ({self.used_today} calls made today)")
+
+            if now >= self.paused_until and self.tokens >= 1:
+                self.tokens -= 1
+                self.used_today += 1
+                if self.daily_remaining is not None:
+                    self.daily_remaining -= 1
+                return 0
+
+            return max(self.paused_until - now, (1 - self.tokens) / self.rate)
+
+    def acquire(self):
+        """Block until a call may be made"""
+        while True:
+            wait = self.reserve()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    def record_success(self, daily_remaining=None):
+        """Additively restore the rate after a successful call"""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+            if daily_remaining is not None:
+                self.daily_remaining = daily_remaining
+
+    def throttle(self, retry_after=None):
+        """Back off after Zoho reported throttling"""
+        with self._lock:
+            self.throttled_count += 1
+            self.rate = max(self.max_rate / 60, self.rate / 2)
+            self.tokens = 0.0
+            self.paused_until = max(self.paused_until, time.monotonic() + (retry_after or 60))
+
+    def exhaust_daily(self):
+        """Mark the daily budget as used up after Zoho said so"""
+        with self._lock:
+            self.daily_remaining = 0
+
+    def remaining(self):
+        """Remaining calls for the current minute and day"""
+        with self._lock:
+            self._refill(time.monotonic())
+            daily = self.daily_remaining
+            if daily is None and self.per_day is not None:
+                daily = self.per_day - self.used_today
+            return {
+                "minute": int(self.tokens),
+                "day": daily,
+                "used_today": self.used_today,
+                "throttled": self.throttled_count,
+            }
@@ -0,0 +1,39 @@
+"""
+Retry policy for transient Zoho Books API failures
+"""
+
+import random
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter.
+
+    Requests that never reached the server are always retried. Requests that may have
+    been applied are retried only if their method is safe to replay, unless a verify
+    callback can tell whether the first attempt went through.
+    """
+
+    RETRY_STATUSES = frozenset({500, 502, 503, 504})
+    REPLAYABLE_METHODS = frozenset({"GET", "PUT", "DELETE"})
+
+    def __init__(self, max_attempts=4, backoff=0.5, max_backoff=30.0):
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def delay(self, attempt):
+        """Seconds to wait before the given retry (1-based)"""
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def is_retryable_status(self, status_code):
+        return status_code in self.RETRY_STATUSES
+
+    @staticmethod
+    def was_sent(error):
+        """Whether the failed request may have reached the server"""
+        import requests
+
+        return not isinstance(error, requests.ConnectTimeout)
+
+    def can_replay(self, method, sent):
+        return not sent or method in self.REPLAYABLE_METHODS
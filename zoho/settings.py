@@ -7,6 +7,54 @@ class Settings:
     BOOKS_BASE_URL: str = "https://books.zoho.com"
 
     ENV_FILE: str = ".env"
+    TOKEN_CACHE_FILE: str = "~/.zoho/tokens.json"
+    MIRROR_FILE: str = "~/.zoho/mirror.sqlite3"
+    JOURNAL_DIR: str = "~/.zoho/journals"
+    CACHE_DIR: str = "~/.zoho/cache"
+    LATENCY_HISTORY_FILE: str = "~/.zoho/latency.json"
+    # Hours after which sync lists every invoice again, dropping those deleted since from the mirror
+    MIRROR_FULL_SYNC_HOURS: int = 24
+
+    # Response cache (enabled with --cache): seconds to keep GET responses, first matching endpoint pattern wins
+    CACHE_TTLS: dict = {
+        "organizations": 3600,
+        "invoices/*": 300,
+        "invoices": 60,
+    }
+    CACHE_DEFAULT_TTL: int = 60
+    CACHE_MAX_ENTRIES: int = 1024
+
+    # Refresh access tokens this many seconds before they expire
+    TOKEN_REFRESH_MARGIN: int = 300
+
+    # HTTP transport: number of per-host pools kept alive, connections per pool
+    # and whether to block (instead of opening throwaway connections) when a pool is exhausted.
+    HTTP_POOL_CONNECTIONS: int = 4
+    HTTP_POOL_MAXSIZE: int = 16
+    HTTP_POOL_BLOCK: bool = True
+    HTTP_TIMEOUT: int = 30
+    # Ask for compressed responses: gzip and deflate, and brotli when the brotli package is installed
+    HTTP_COMPRESSION: bool = True
+    # Decoder for response bodies: "orjson", "json", or "auto" for orjson when it is installed
+    JSON_DECODER: str = "auto"
+    # Connections the asyncio client may keep open at once
+    ASYNC_MAX_CONNECTIONS: int = 100
+
+    # Zoho Books API quotas per organization (the daily limit depends on the plan)
+    RATE_LIMIT_PER_MINUTE: int = 100
+    RATE_LIMIT_PER_DAY: int = 1000
+    RATE_LIMIT_MAX_WAITS: int = 5
+
+    # Seconds per API call assumed by estimates until the latency of an endpoint has been measured
+    PLANNER_DEFAULT_LATENCY: float = 0.5
+
+    # Organizations worked on at once with --orgs, each with its own client and rate limits
+    FANOUT_WORKERS: int = 8
+
+    # Retries for timeouts, dropped connections and 5xx responses
+    RETRY_MAX_ATTEMPTS: int = 4
+    RETRY_BACKOFF: float = 0.5
+    RETRY_MAX_BACKOFF: float = 30.0
 
     def __init__(self, client_id, client_secret, org_id=None):
         self.client_id = client_id
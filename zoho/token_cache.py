@@ -0,0 +1,52 @@
+"""
+On-disk cache of OAuth access tokens shared between CLI invocations
+"""
+
+import json
+import time
+from pathlib import Path
+
+from .files import write_json
+
+
+class TokenCache:
+    """Access tokens stored as JSON, keyed by client ID and organization ID"""
+
+    def __init__(self, path):
+        self.path = Path(path).expanduser()
+
+    @staticmethod
+    def key(client_id, org_id):
+        return f"{client_id}:{org_id or ''}"
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, tokens):
+        write_json(self.path, tokens, prefix=".tokens-")
+
+    def get(self, key, margin=0):
+        """Cached token data, or None if missing or expiring within ``margin`` seconds"""
+        token = self._read().get(key)
+        if not token or token.get("expires_at", 0) - margin <= time.time():
+            return None
+        return token
+
+    def set(self, key, access_token, expires_in):
+        tokens = self._read()
+        now = time.time()
+
+        # Drop entries that have already expired while we are rewriting the file anyway
+        tokens = {k: v for k, v in tokens.items() if v.get("expires_at", 0) > now}
+        tokens[key] = {"access_token": access_token, "expires_at": now + int(expires_in or 0)}
+        self._write(tokens)
+        return tokens[key]
+
+    def delete(self, key):
+        tokens = self._read()
+        if tokens.pop(key, None) is not None:
+            self._write(tokens)